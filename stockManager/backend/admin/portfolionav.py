@@ -1,6 +1,14 @@
 """净值相关 Admin"""
-from backend.admin.base import UserScopedModelAdmin, admin
-from backend.models import PortfolioNavDaily, StockDailyPrice
+from django.utils import timezone
+
+from backend.admin.base import UserScopedModelAdmin, admin, messages
+from backend.models import (
+    FxDailyRate,
+    PortfolioNavDaily,
+    StockDailyPrice,
+    StockPriceCoverage,
+    StockPriceMissing,
+)
 
 
 @admin.register(PortfolioNavDaily)
@@ -33,3 +41,59 @@ class StockDailyPriceAdmin(admin.ModelAdmin):
 
     def has_change_permission(self, request, obj=None):
         return False
+
+
+@admin.register(StockPriceCoverage)
+class StockPriceCoverageAdmin(admin.ModelAdmin):
+    list_display = ['code', 'start', 'end']
+    search_fields = ['code']
+    ordering = ['code', 'start']
+    readonly_fields = ['code', 'start', 'end']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockPriceMissing)
+class StockPriceMissingAdmin(admin.ModelAdmin):
+    """多轮补拉仍缺的日收盘区间；重置（删除）后下次净值刷新重新回源"""
+
+    list_display = ['code', 'start', 'end', 'expires_at', 'is_active', 'created_at']
+    list_filter = ['expires_at']
+    search_fields = ['code']
+    ordering = ['code', 'start']
+    readonly_fields = ['code', 'start', 'end', 'expires_at', 'created_at']
+    actions = ['reset_missing']
+
+    @admin.display(boolean=True, description="生效中")
+    def is_active(self, obj: StockPriceMissing) -> bool:
+        return obj.expires_at > timezone.now()
+
+    @admin.action(description="重置所选（下次净值刷新重新回源）")
+    def reset_missing(self, request, queryset):
+        deleted, _ = queryset.delete()
+        messages.info(request, f"已重置 {deleted} 条缺失记录")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(FxDailyRate)
+class FxDailyRateAdmin(admin.ModelAdmin):
+    list_display = ['pair', 'date', 'rate']
+    list_filter = ['pair']
+    date_hierarchy = 'date'
+    ordering = ['-date', 'pair']
+    readonly_fields = ['pair', 'date', 'rate']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -3,7 +3,7 @@
 提供装饰器、响应工具、常量等可复用组件
 """
 from backend.common.constants import ResponseStatus, OperationType
-from backend.common.cache import Cache
+from backend.common.cache import Cache, InvalidationBatcher, LocalCache
 from backend.common.web import (
     authenticated_user,
     get_client_ip,
@@ -33,5 +33,7 @@ __all__ = [
     'json_response',
     'get_client_ip',
     'Cache',
+    'LocalCache',
+    'InvalidationBatcher',
     'authenticated_user',
 ]
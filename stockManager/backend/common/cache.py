@@ -1,12 +1,43 @@
 """底层缓存工具类"""
-from typing import Any, cast
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Callable, Hashable, Iterable, Iterator
+from contextlib import contextmanager
+from typing import Any, TypeVar, cast
 
 from django.core.cache import cache
+from django.db import transaction
 from django_redis import get_redis_connection
 
+logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# tag 集合（Redis SET，成员为完整 key）与「旧 key 已 SCAN 兜底」标记的逻辑前缀
+_TAG_PREFIX = "tag:"
+_TAG_SWEPT_PREFIX = "tag_swept:"
+# SCAN count / SPOP / UNLINK 每批 key 数
+_BATCH_SIZE = 500
+
+# L1 全部 namespace 合计条目上限（LRU 淘汰）与失效广播频道（逻辑名）
+_L1_MAX_ENTRIES = 1024
+_L1_CHANNEL = "l1:invalidate"
+_L1_RECONNECT_SEC = 1.0
+
+# 失效合并计数（HASH：executed 实际执行数、coalesced 合并省去的次数）
+_INVALIDATION_STATS_KEY = "cache:invalidation_stats"
+
+
+def _decode_key(key: bytes | str) -> str:
+    return key.decode() if isinstance(key, bytes) else key
+
 
 class Cache:
-    """底层缓存工具类，提供批量操作和模式删除"""
+    """底层缓存工具类，提供批量操作、tag 失效和模式删除"""
 
     @staticmethod
     def _redis() -> Any:
@@ -44,8 +75,20 @@ class Cache:
             return {key: cache.get(key) for key in keys}
 
     @staticmethod
-    def set_many(mapping: dict[str, Any], timeout: int | None = None) -> None:
-        """批量设置缓存；mapping 的 key 为逻辑 key，序列化/前缀与 cache.set 一致"""
+    def _tag_key(tag: str) -> str:
+        return cache.make_key(_TAG_PREFIX + tag)
+
+    @staticmethod
+    def set_many(
+        mapping: dict[str, Any],
+        timeout: int | None = None,
+        *,
+        tags: Iterable[str] = (),
+    ) -> None:
+        """批量设置缓存；mapping 的 key 为逻辑 key，序列化/前缀与 cache.set 一致。
+
+        tags 非空时同一 Pipeline 内把完整 key 登记进各 tag 集合，供 invalidate_tag 精确删除。
+        """
         if not mapping:
             return
 
@@ -53,26 +96,376 @@ class Cache:
             redis_client = Cache._redis()
             client = cast(Any, cache).client
             pipe = redis_client.pipeline()
+            full_keys: list[str] = []
             for logical_key, value in mapping.items():
                 if value is not None:
                     client.set(logical_key, value, timeout, client=pipe)
+                    full_keys.append(cache.make_key(logical_key))
+            if full_keys:
+                for tag in tags:
+                    tag_key = Cache._tag_key(tag)
+                    pipe.sadd(tag_key, *full_keys)
+                    # 集合随成员一起过期，已过期成员在下次失效时 UNLINK 空转即可
+                    if timeout is not None:
+                        pipe.expire(tag_key, timeout)
             pipe.execute()
         except Exception:
             for logical_key, value in mapping.items():
                 if value is not None:
                     cache.set(logical_key, value, timeout)
 
+    @staticmethod
+    def set(
+        key: str,
+        value: Any,
+        timeout: int | None = None,
+        *,
+        tags: Iterable[str] = (),
+    ) -> None:
+        """单条写入并登记 tag；无 tag 时直接走 cache.set"""
+        if not tags:
+            cache.set(key, value, timeout)
+            return
+        Cache.set_many({key: value}, timeout, tags=tags)
+
+    @staticmethod
+    def invalidate_tag(tag: str, *, legacy_patterns: Iterable[str] = ()) -> int:
+        """删除 tag 下登记的全部 key，返回实际删除数。
+
+        SPOP 分批取出成员后 UNLINK，期间新登记的 key 留待下次失效；
+        legacy_patterns 为未登记 tag 的旧 key 兜底，每个 tag 仅首次调用时 SCAN 一次。
+        """
+        try:
+            redis_client = Cache._redis()
+            tag_key = Cache._tag_key(tag)
+            deleted = 0
+            while members := redis_client.spop(tag_key, _BATCH_SIZE):
+                deleted += redis_client.unlink(*members)
+            if legacy_patterns and redis_client.set(
+                cache.make_key(_TAG_SWEPT_PREFIX + tag), 1, nx=True
+            ):
+                deleted += sum(Cache.delete_pattern(p) for p in legacy_patterns)
+            return deleted
+        except Exception:
+            return 0
+
+    @staticmethod
+    def tag_counts() -> dict[str, int]:
+        """各 tag 当前登记的 key 数（可能含已过期成员）"""
+        prefix = Cache.make_key(_TAG_PREFIX)
+        try:
+            redis_client = Cache._redis()
+            return {
+                _decode_key(key)[len(prefix):]: int(redis_client.scard(key))
+                for key in redis_client.scan_iter(match=prefix + "*", count=_BATCH_SIZE)
+            }
+        except Exception:
+            return {}
+
+    @staticmethod
+    def add_members(key: str, members: Iterable[str], timeout: int | None = None) -> None:
+        """原生 SADD（成员为纯字符串，不经序列化）"""
+        if not (members := list(members)):
+            return
+        full_key = cache.make_key(key)
+        try:
+            pipe = Cache._redis().pipeline()
+            pipe.sadd(full_key, *members)
+            if timeout is not None:
+                pipe.expire(full_key, timeout)
+            pipe.execute()
+        except Exception:
+            pass
+
+    @staticmethod
+    def pop_members(key: str) -> frozenset[str]:
+        """原子取出并清空集合全部成员"""
+        full_key = cache.make_key(key)
+        try:
+            pipe = Cache._redis().pipeline(transaction=True)
+            pipe.smembers(full_key)
+            pipe.delete(full_key)
+            members, _ = pipe.execute()
+            return frozenset(_decode_key(m) for m in members)
+        except Exception:
+            return frozenset()
+
+    @staticmethod
+    def get_fields(key: str, fields: list[str]) -> dict[str, bytes | None]:
+        """原生 HMGET，单次往返；值为原始 bytes，由调用方解码"""
+        if not fields:
+            return {}
+        try:
+            values = Cache._redis().hmget(cache.make_key(key), fields)
+            return dict(zip(fields, values, strict=False))
+        except Exception:
+            return {field: None for field in fields}
+
+    @staticmethod
+    def set_fields(key: str, mapping: dict[str, bytes], timeout: int | None = None) -> None:
+        """原生 HSET 批量写字段；timeout 作用于整个哈希"""
+        if not mapping:
+            return
+        full_key = cache.make_key(key)
+        try:
+            pipe = Cache._redis().pipeline()
+            pipe.hset(full_key, mapping=mapping)
+            if timeout is not None:
+                pipe.expire(full_key, timeout)
+            pipe.execute()
+        except Exception:
+            pass
+
+    @staticmethod
+    def incr_field(key: str, field: str, amount: int = 1) -> None:
+        """原生 HINCRBY 计数"""
+        try:
+            Cache._redis().hincrby(cache.make_key(key), field, amount)
+        except Exception:
+            pass
+
+    @staticmethod
+    def get_counters(key: str) -> dict[str, int]:
+        """读取 incr_field 写入的全部计数"""
+        try:
+            raw = Cache._redis().hgetall(cache.make_key(key))
+            return {_decode_key(f): int(v) for f, v in raw.items()}
+        except Exception:
+            return {}
+
     @staticmethod
     def delete_pattern(pattern: str, *, logical: bool = True) -> int:
-        """按模式删除缓存，返回删除的 key 数量；默认 pattern 为逻辑通配符"""
+        """按模式删除缓存（SCAN + 分批 UNLINK，不阻塞 Redis），返回删除的 key 数量；默认 pattern 为逻辑通配符"""
         if logical:
             pattern = Cache.make_pattern(pattern)
         try:
             redis_client = Cache._redis()
-            matched = redis_client.keys(pattern)
-            if matched:
-                redis_client.delete(*matched)
-                return len(matched)
-            return 0
+            deleted = 0
+            batch: list[bytes] = []
+            for key in redis_client.scan_iter(match=pattern, count=_BATCH_SIZE):
+                batch.append(key)
+                if len(batch) >= _BATCH_SIZE:
+                    deleted += redis_client.unlink(*batch)
+                    batch = []
+            if batch:
+                deleted += redis_client.unlink(*batch)
+            return deleted
         except Exception:
             return 0
+
+    @staticmethod
+    def clear_all() -> tuple[int, dict[str, int]]:
+        """删除本应用命名空间下全部 key（含各 worker 的 L1），返回 (删除数, 清理前各 tag 登记数)"""
+        tag_counts = Cache.tag_counts()
+        deleted = Cache.delete_pattern("*")
+        LocalCache.evict()
+        return deleted, tag_counts
+
+
+class LocalCache:
+    """进程内 L1：读穿 Redis 后缓存解码好的对象，按 namespace 独立 TTL，合计条目数超限按 LRU 淘汰。
+
+    失效经 Redis pub/sub 广播到所有 worker；订阅线程未就绪或断线期间直通 loader，不读可能过期的 L1。
+    值在进程内共享，调用方只读不改。
+    """
+
+    _ttls: dict[str, float] = {}
+    _entries: OrderedDict[tuple[str, str], tuple[float, Any]] = OrderedDict()
+    # 每次失效自增；loader 返回时代数已变则不回填，避免把失效前读到的旧值写回
+    _generations: Counter[str] = Counter()
+    _hits: Counter[str] = Counter()
+    _misses: Counter[str] = Counter()
+    _lock = threading.Lock()
+    _pid: int | None = None
+    _subscribed = threading.Event()
+
+    @classmethod
+    def register(cls, namespace: str, ttl: float) -> None:
+        cls._ttls[namespace] = ttl
+
+    @classmethod
+    def get_or_load(cls, namespace: str, key: str, loader: Callable[[], _T]) -> _T:
+        """命中且未过期返回 L1 值；否则调用 loader（通常为 Redis cache-aside 读取）并回填。"""
+        if not cls._listening():
+            return loader()
+        entry_key = (namespace, key)
+        now = time.monotonic()
+        with cls._lock:
+            if (entry := cls._entries.get(entry_key)) is not None and entry[0] > now:
+                cls._entries.move_to_end(entry_key)
+                cls._hits[namespace] += 1
+                return entry[1]
+            cls._misses[namespace] += 1
+            generation = cls._generations[namespace]
+
+        value = loader()
+        with cls._lock:
+            if cls._generations[namespace] == generation:
+                cls._entries[entry_key] = (now + cls._ttls[namespace], value)
+                cls._entries.move_to_end(entry_key)
+                while len(cls._entries) > _L1_MAX_ENTRIES:
+                    cls._entries.popitem(last=False)
+        return value
+
+    @classmethod
+    def evict(cls, namespace: str | None = None, key: str | None = None) -> None:
+        """本进程立即失效并广播；namespace 为空清全部，key 为空清整个 namespace。"""
+        cls._evict_local(namespace, key)
+        try:
+            Cache._redis().publish(cache.make_key(_L1_CHANNEL), json.dumps([namespace, key]))
+        except Exception as e:
+            logger.warning(f"[L1] 失效广播失败 {namespace}:{key}: {e}")
+
+    @classmethod
+    def stats(cls) -> dict[str, dict[str, int]]:
+        """本进程各 namespace 命中 / 未命中次数与当前条目数"""
+        with cls._lock:
+            sizes = Counter(namespace for namespace, _ in cls._entries)
+            return {
+                namespace: {"hits": cls._hits[namespace], "misses": cls._misses[namespace], "size": sizes[namespace]}
+                for namespace in cls._ttls
+            }
+
+    @classmethod
+    def _evict_local(cls, namespace: str | None, key: str | None) -> None:
+        with cls._lock:
+            if namespace is None:
+                cls._entries.clear()
+                for ns in cls._ttls:
+                    cls._generations[ns] += 1
+                return
+            cls._generations[namespace] += 1
+            if key is not None:
+                cls._entries.pop((namespace, key), None)
+                return
+            for entry_key in [k for k in cls._entries if k[0] == namespace]:
+                del cls._entries[entry_key]
+
+    @classmethod
+    def _listening(cls) -> bool:
+        """确保本进程订阅线程已启动；preload 后 fork 的 worker 丢弃继承条目并自行订阅。"""
+        if cls._pid != (pid := os.getpid()):
+            with cls._lock:
+                if cls._pid != pid:
+                    cls._pid = pid
+                    cls._entries.clear()
+                    cls._subscribed = threading.Event()
+                    threading.Thread(
+                        target=cls._listen,
+                        args=(cls._subscribed,),
+                        name="l1-invalidate",
+                        daemon=True,
+                    ).start()
+        return cls._subscribed.is_set()
+
+    @classmethod
+    def _listen(cls, subscribed: threading.Event) -> None:
+        channel = cache.make_key(_L1_CHANNEL)
+        while True:
+            try:
+                pubsub = Cache._redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(channel)
+                subscribed.set()
+                for message in pubsub.listen():
+                    namespace, key = json.loads(message["data"])
+                    cls._evict_local(namespace, key)
+            except Exception as e:
+                logger.warning(f"[L1] 失效订阅断开，{_L1_RECONNECT_SEC}s 后重连: {e}")
+            # 断线期间可能漏收失效消息，整体作废后直通，重连成功再启用
+            subscribed.clear()
+            cls._evict_local(None, None)
+            time.sleep(_L1_RECONNECT_SEC)
+
+
+class _PendingInvalidations:
+    """一组待执行失效（按 (函数, 参数) 去重）；自身即 on_commit 回调，事务回滚时随回调一并丢弃。"""
+
+    def __init__(self) -> None:
+        self.entries: dict[tuple[Callable[..., None], tuple[Hashable, ...]], None] = {}
+        self.requested = 0
+
+    def add(self, action: Callable[..., None], args: tuple[Hashable, ...]) -> None:
+        self.entries[(action, args)] = None
+        self.requested += 1
+
+    def merge(self, other: "_PendingInvalidations") -> None:
+        self.entries.update(other.entries)
+        self.requested += other.requested
+
+    def __call__(self) -> None:
+        batch, requested = list(self.entries), self.requested
+        self.entries.clear()
+        self.requested = 0
+        for action, args in batch:
+            try:
+                action(*args)
+            except Exception as e:
+                logger.error(f"[invalidate] {action.__qualname__}{args} 执行失败: {e}")
+        if not batch:
+            return
+        Cache.incr_field(_INVALIDATION_STATS_KEY, "executed", len(batch))
+        if (coalesced := requested - len(batch)) > 0:
+            Cache.incr_field(_INVALIDATION_STATS_KEY, "coalesced", coalesced)
+            logger.info(f"[invalidate] 合并 {requested} 次失效为 {len(batch)} 次")
+
+
+class InvalidationBatcher:
+    """失效合并：同一事务（或 batch 块）内按 (函数, 参数) 去重，提交后统一执行一次。
+
+    事务内登记并入该事务唯一的 on_commit 回调，回滚则随回调丢弃、不会混入之后其他事务的提交；
+    不在事务内且不在 batch 块内时立即执行。待执行集合按线程隔离，与 Django 数据库连接一致。
+    """
+
+    _state = threading.local()
+
+    @classmethod
+    def defer(cls, action: Callable[..., None], *args: Hashable) -> None:
+        state = cls._local()
+        if state.depth:
+            state.block.add(action, args)
+        elif transaction.get_connection().in_atomic_block:
+            cls._transaction_pending().add(action, args)
+        else:
+            pending = _PendingInvalidations()
+            pending.add(action, args)
+            pending()
+
+    @classmethod
+    @contextmanager
+    def batch(cls) -> Iterator[None]:
+        """块内登记的失效推迟到块结束（若仍在事务内则到提交后）合并执行，用于非事务的批量写。"""
+        state = cls._local()
+        state.depth += 1
+        try:
+            yield
+        finally:
+            state.depth -= 1
+            if not state.depth and state.block.entries:
+                block, state.block = state.block, _PendingInvalidations()
+                if transaction.get_connection().in_atomic_block:
+                    cls._transaction_pending().merge(block)
+                else:
+                    block()
+
+    @classmethod
+    def stats(cls) -> dict[str, int]:
+        return Cache.get_counters(_INVALIDATION_STATS_KEY)
+
+    @classmethod
+    def _local(cls) -> Any:
+        state = cls._state
+        if not hasattr(state, "block"):
+            state.block = _PendingInvalidations()
+            state.depth = 0
+            state.transaction = None
+        return state
+
+    @classmethod
+    def _transaction_pending(cls) -> _PendingInvalidations:
+        """当前事务的待执行集合：其回调已不在连接的 on_commit 队列（已提交或已回滚）则新建并登记。"""
+        state = cls._local()
+        pending: _PendingInvalidations | None = state.transaction
+        if pending is None or not any(func is pending for _, func, _ in transaction.get_connection().run_on_commit):
+            pending = state.transaction = _PendingInvalidations()
+            transaction.on_commit(pending)
+        return pending
@@ -9,6 +9,7 @@ from backend.common.domain.market import (
     split_codes_by_market,
     to_baidu_params,
 )
+from backend.common.domain.operation_record import OperationRecord
 from backend.common.domain.operations import (
     apply_net_invested,
     apply_operation_to_hold,
@@ -18,6 +19,7 @@ from backend.common.domain.operations import (
 
 __all__ = [
     'Market',
+    'OperationRecord',
     'TradingCalendar',
     'TZ_SHANGHAI',
     'apply_net_invested',
@@ -6,17 +6,32 @@
 - 交易所公布的其他休市日
 
 A 股调休上班日（补班）仍不开盘，亦不在 sessions 内。
+
+交易日优先读随仓库分发的快照 calendar_snapshot.json（manage.py snapshot_calendars 生成），
+快照缺失、时段配置不符或覆盖不足时才导入 pandas / exchange_calendars 现算。
 """
-from typing import ClassVar, cast
-from datetime import date, datetime, timedelta
+import json
 import math
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime
+from functools import cache
+from itertools import accumulate
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, ClassVar
+from zoneinfo import ZoneInfo
+
 import pytz
-from exchange_calendars import get_calendar, ExchangeCalendar
-import pandas as pd
 
+from backend.common import logger
 from backend.common.domain.market import Market
 
+if TYPE_CHECKING:
+    from exchange_calendars import ExchangeCalendar
+
 TZ_SHANGHAI = pytz.timezone('Asia/Shanghai')
+# 仅用于批量构建时段索引：zoneinfo 按日换算 epoch 比 pytz.localize 快一个数量级
+_ZONE_SHANGHAI = ZoneInfo('Asia/Shanghai')
 
 # 同日交易时段（上海时区；仅在 is_trading_day 为 True 的日期内生效）
 _MARKET_SESSION_MINUTES: dict[Market, tuple[tuple[int, int], tuple[int, int]]] = {
@@ -36,29 +51,120 @@ def _to_shanghai(dt: datetime) -> datetime:
     return dt.astimezone(TZ_SHANGHAI)
 
 
-def _session_ts(day: date) -> pd.Timestamp:
-    """date → Timestamp；由 date 构造不会产生 NaT，供 pyright 收窄。"""
-    return cast(pd.Timestamp, pd.Timestamp(day))
+_SNAPSHOT_PATH = Path(__file__).with_name("calendar_snapshot.json")
+# 快照最后一个交易日距今不足该天数即视为过期，回退 exchange_calendars
+_SNAPSHOT_MIN_AHEAD_DAYS = 30
+
+
+def _epoch(dt: datetime) -> float:
+    return _to_shanghai(dt).timestamp()
+
+
+@dataclass(frozen=True)
+class _SessionIndex:
+    """单市场交易日与开收盘时段的有序索引（epoch 秒），热路径查询均为二分。"""
+    days: list[int]  # 交易日 date.toordinal()
+    day_closes: list[float]  # 各交易日收盘时刻（最后一个时段 end）
+    opens: list[float]  # 全部时段开盘时刻，按时间升序
+    closes: list[float]  # 与 opens 一一对应的收盘时刻
+
+
+def _build_session_index(days: list[int], market: Market) -> _SessionIndex:
+    opens: list[float] = []
+    closes: list[float] = []
+    day_closes: list[float] = []
+    for ordinal in days:
+        day = date.fromordinal(ordinal)
+        midnight = datetime(day.year, day.month, day.day, tzinfo=_ZONE_SHANGHAI).timestamp()
+        for start_min, end_min in _MARKET_SESSION_MINUTES[market]:
+            opens.append(midnight + start_min * 60)
+            closes.append(midnight + end_min * 60)
+        day_closes.append(closes[-1])
+    return _SessionIndex(days=days, day_closes=day_closes, opens=opens, closes=closes)
+
+
+@cache
+def _read_snapshot() -> dict[str, Any]:
+    try:
+        return json.loads(_SNAPSHOT_PATH.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _snapshot_days(market: Market) -> list[int] | None:
+    """快照中该市场的交易日 ordinal；缺失、时段配置不符或覆盖不足时返回 None。"""
+    entry = _read_snapshot().get("markets", {}).get(market.value)
+    if not entry or [tuple(p) for p in entry["sessionMinutes"]] != list(_MARKET_SESSION_MINUTES[market]):
+        return None
+    # days 为差分编码：首项为 ordinal，其后为与前一交易日的间隔天数
+    days = list(accumulate(entry["days"]))
+    if days[-1] - datetime.now(TZ_SHANGHAI).date().toordinal() < _SNAPSHOT_MIN_AHEAD_DAYS:
+        return None
+    return days
+
+
+def _exchange_days(market: Market) -> list[int]:
+    return [ts.date().toordinal() for ts in TradingCalendar.get_calendar(market).sessions]
+
+
+def write_snapshot(path: Path = _SNAPSHOT_PATH) -> dict[Market, tuple[date, date]]:
+    """由 exchange_calendars 重新生成交易日快照，返回各市场覆盖的首末交易日。"""
+    markets: dict[str, dict] = {}
+    coverage: dict[Market, tuple[date, date]] = {}
+    for market in Market:
+        days = _exchange_days(market)
+        markets[market.value] = {
+            "exchange": _EXCHANGE_CODE[market],
+            "sessionMinutes": [list(p) for p in _MARKET_SESSION_MINUTES[market]],
+            "days": [days[0]] + [b - a for a, b in zip(days, days[1:])],
+        }
+        coverage[market] = (date.fromordinal(days[0]), date.fromordinal(days[-1]))
+    payload = {"generatedAt": datetime.now(TZ_SHANGHAI).isoformat(timespec="seconds"), "markets": markets}
+    path.write_text(json.dumps(payload, separators=(",", ":")) + "\n")
+    _read_snapshot.cache_clear()
+    TradingCalendar._indexes.clear()
+    return coverage
 
 
 class TradingCalendar:
     """交易日历工具类"""
-    _calendars: ClassVar[dict[Market, ExchangeCalendar]] = {}
+    _calendars: ClassVar[dict[Market, "ExchangeCalendar"]] = {}
+    _indexes: ClassVar[dict[Market, _SessionIndex]] = {}
 
     @classmethod
-    def get_calendar(cls, market: Market = Market.CN) -> ExchangeCalendar:
-        """获取指定市场的交易日历对象（带缓存）"""
+    def get_calendar(cls, market: Market = Market.CN) -> "ExchangeCalendar":
+        """获取指定市场的交易日历对象（带缓存；首次调用才导入 exchange_calendars）"""
         if market not in cls._calendars:
+            from exchange_calendars import get_calendar
+
             cls._calendars[market] = get_calendar(_EXCHANGE_CODE[market])
         return cls._calendars[market]
 
+    @classmethod
+    def _index(cls, market: Market) -> _SessionIndex:
+        """交易日 / 时段索引，每市场首次使用时构建一次：优先快照，否则 exchange_calendars 全量 sessions。"""
+        if market not in cls._indexes:
+            if (days := _snapshot_days(market)) is None:
+                logger.warning(f"[calendar] {market.value} 快照缺失或过期，回退 exchange_calendars（可执行 manage.py snapshot_calendars）")
+                days = _exchange_days(market)
+            cls._indexes[market] = _build_session_index(days, market)
+        return cls._indexes[market]
+
     @classmethod
     def is_trading_day(cls, day, market: Market = Market.CN) -> bool:
         """是否为该市场的交易日（非法定假日、非周末、非交易所休市日）。"""
-        ts = pd.Timestamp(day)
-        if pd.isna(ts):
-            return False
-        return bool(cls.get_calendar(market).is_session(cast(pd.Timestamp, ts)))
+        if not isinstance(day, date):
+            import pandas as pd
+
+            if not isinstance(ts := pd.Timestamp(day), pd.Timestamp):  # NaT
+                return False
+            day = ts.date()
+        elif isinstance(day, datetime):
+            day = day.date()
+        days = cls._index(market).days
+        ordinal = day.toordinal()
+        i = bisect_left(days, ordinal)
+        return i < len(days) and days[i] == ordinal
 
     @classmethod
     def is_trading_time_passed(
@@ -68,60 +174,31 @@ class TradingCalendar:
         market: Market = Market.CN,
     ) -> bool:
         """判断 [last_time, current_time] 是否与任意交易日的开收盘时段有交集。"""
-        last_time_tz = _to_shanghai(last_time)
-        current_time_tz = _to_shanghai(current_time)
-
-        if last_time_tz >= current_time_tz:
+        last_ts = _epoch(last_time)
+        current_ts = _epoch(current_time)
+        if last_ts >= current_ts:
             return False
-
-        check_date = last_time_tz.date()
-        end_date = current_time_tz.date()
-        while check_date <= end_date:
-            if cls.is_trading_day(check_date, market):
-                for start_min, end_min in _MARKET_SESSION_MINUTES[market]:
-                    session_start = TZ_SHANGHAI.localize(
-                        datetime(check_date.year, check_date.month, check_date.day, start_min // 60, start_min % 60)
-                    )
-                    session_end = TZ_SHANGHAI.localize(
-                        datetime(check_date.year, check_date.month, check_date.day, end_min // 60, end_min % 60)
-                    )
-                    if last_time_tz <= session_end and session_start <= current_time_tz:
-                        return True
-            check_date += timedelta(days=1)
-
-        return False
+        # 首个收盘不早于 last 的时段；其开盘不晚于 current 即有交集
+        index = cls._index(market)
+        i = bisect_left(index.closes, last_ts)
+        return i < len(index.opens) and index.opens[i] <= current_ts
 
     @classmethod
     def is_in_trading_hours_at(cls, dt: datetime, market: Market = Market.CN) -> bool:
-        """判断给定时间是否在指定市场的交易时段内（交易日 + 固定开收盘时段）。"""
-        dt_tz = _to_shanghai(dt)
-        if not cls.is_trading_day(dt_tz.date(), market):
-            return False
-        current_minutes = dt_tz.hour * 60 + dt_tz.minute
-        return any(
-            start_min <= current_minutes < end_min
-            for start_min, end_min in _MARKET_SESSION_MINUTES[market]
-        )
+        """判断给定时间是否在指定市场的交易时段内（交易日 + 固定开收盘时段，[start, end)）。"""
+        ts = _epoch(dt)
+        index = cls._index(market)
+        i = bisect_right(index.opens, ts) - 1
+        return i >= 0 and ts < index.closes[i]
 
     @classmethod
     def next_open_at(cls, after: datetime, market: Market = Market.CN) -> datetime:
         """返回严格晚于 after 的最早一个交易时段开盘时刻（上海时区）。覆盖盘前、午休、盘后与非交易日情形，统一指向下一交易时段 start。"""
-        tz_now = _to_shanghai(after)
-        check_date = tz_now.date()
-        # 防御性上限：连续非交易日（含长假）必然在 100 天内命中
-        for _ in range(100):
-            if cls.is_trading_day(check_date, market):
-                for start_min, _end_min in _MARKET_SESSION_MINUTES[market]:
-                    session_start = TZ_SHANGHAI.localize(
-                        datetime(
-                            check_date.year, check_date.month, check_date.day,
-                            start_min // 60, start_min % 60,
-                        )
-                    )
-                    if session_start > tz_now:
-                        return session_start
-            check_date += timedelta(days=1)
-        raise RuntimeError(f"未找到 {market} 在 100 天内的开盘时段")
+        index = cls._index(market)
+        i = bisect_right(index.opens, _epoch(after))
+        if i >= len(index.opens):
+            raise RuntimeError(f"未找到 {market} 在 {after} 之后的开盘时段")
+        return datetime.fromtimestamp(index.opens[i], TZ_SHANGHAI)
 
     @classmethod
     def sessions_between(
@@ -133,12 +210,23 @@ class TradingCalendar:
         """返回闭区间 [start, end] 内的全部交易日。"""
         if start > end:
             return []
-        cal = cls.get_calendar(market)
-        sessions = cal.sessions_in_range(
-            _session_ts(start),
-            _session_ts(end),
-        )
-        return [ts.date() for ts in sessions]
+        days = cls._index(market).days
+        lo = bisect_left(days, start.toordinal())
+        hi = bisect_right(days, end.toordinal())
+        return [date.fromordinal(ordinal) for ordinal in days[lo:hi]]
+
+    @classmethod
+    def session_bounds(
+        cls,
+        start: date,
+        end: date,
+        market: Market = Market.CN,
+    ) -> tuple[date, date] | None:
+        """返回闭区间 [start, end] 内首个与最后一个交易日；区间内无交易日则 None。"""
+        days = cls._index(market).days
+        lo = bisect_left(days, start.toordinal())
+        hi = bisect_right(days, end.toordinal())
+        return (date.fromordinal(days[lo]), date.fromordinal(days[hi - 1])) if lo < hi else None
 
     @classmethod
     def latest_closed_session(
@@ -153,19 +241,11 @@ class TradingCalendar:
 
         A 股按 15:00、港股按 16:00（上海时区）判定收盘。
         """
-        now = _to_shanghai(as_of or datetime.now(TZ_SHANGHAI))
-        today = now.date()
-        cal = cls.get_calendar(market)
-        close_minute = _MARKET_SESSION_MINUTES[market][-1][1]
-        minutes_now = now.hour * 60 + now.minute
-        if cal.is_session(_session_ts(today)) and minutes_now >= close_minute:
-            return today
-
-        end = today - timedelta(days=1)
-        start = end - timedelta(days=18)
-        if len(sessions := cal.sessions_in_range(_session_ts(start), _session_ts(end))) == 0:
-            raise RuntimeError(f"未找到 {market} 在 {today} 之前的交易日")
-        return cast(pd.Timestamp, sessions[-1]).date()
+        now = as_of or datetime.now(TZ_SHANGHAI)
+        index = cls._index(market)
+        if (i := bisect_right(index.day_closes, _epoch(now)) - 1) < 0:
+            raise RuntimeError(f"未找到 {market} 在 {now.date()} 之前的交易日")
+        return date.fromordinal(index.days[i])
 
     @classmethod
     def next_session(
@@ -173,13 +253,10 @@ class TradingCalendar:
         after: date,
         market: Market = Market.CN,
     ) -> date | None:
-        """返回严格晚于 after 的下一交易日；无则 None。"""
-        cal = cls.get_calendar(market)
-        start = after + timedelta(days=1)
-        end = start + timedelta(days=18)
-        if len(sessions := cal.sessions_in_range(_session_ts(start), _session_ts(end))) == 0:
-            return None
-        return cast(pd.Timestamp, sessions[0]).date()
+        """返回严格晚于 after 的下一交易日；超出日历范围则 None。"""
+        days = cls._index(market).days
+        i = bisect_right(days, after.toordinal())
+        return date.fromordinal(days[i]) if i < len(days) else None
 
 
 # ==================== 交易状态 Tag 生成（供 /api/tradingStatus 使用） ====================
@@ -243,6 +320,3 @@ def get_trading_time_statuses(now: datetime | None = None) -> list[dict]:
             'message': message,
         })
     return results
-
-
-TradingCalendar.get_calendar(Market.CN)
@@ -0,0 +1,63 @@
+"""只读操作记录：计算热路径替代 Operation 模型实例，写库仍用 Operation"""
+from dataclasses import dataclass
+from datetime import date
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from backend.models import Operation
+
+
+@dataclass(frozen=True, slots=True)
+class OperationRecord:
+    """字段与 Operation 同名，供结算 / 持仓辅助函数按属性读取；顺序即缓存行布局（去掉首列 code）。"""
+
+    code: str
+    id: int
+    date: date
+    sortOrder: int
+    operationType: str
+    price: float
+    count: int
+    fee: float
+    amount: float | None
+    comment: str
+    cash: float
+    stock: float
+    reserve: float
+
+    @property
+    def pk(self) -> int:
+        return self.id
+
+    @classmethod
+    def from_model(cls, op: "Operation") -> "OperationRecord":
+        return cls(
+            op.code,
+            op.pk,
+            op.date,
+            op.sortOrder,
+            op.operationType,
+            op.price,
+            op.count,
+            op.fee,
+            op.amount,
+            op.comment,
+            op.cash,
+            op.stock,
+            op.reserve,
+        )
+
+    def to_dict(self) -> dict[str, object]:
+        """与 Operation.to_dict 相同的 API 原始字段。"""
+        return {
+            "date": str(self.date),
+            "type": self.operationType,
+            "price": self.price,
+            "count": self.count,
+            "fee": self.fee,
+            "amount": self.amount,
+            "comment": self.comment,
+            "cash": self.cash,
+            "stock": self.stock,
+            "reserve": self.reserve,
+        }
@@ -1,5 +1,5 @@
 """Operation 类型相关的共享计算逻辑"""
-from backend.models import Operation
+from backend.common.domain.operation_record import OperationRecord
 from backend.common.constants import OperationType
 from backend.common.domain.settlement import (
     buy_outflow_cny,
@@ -8,12 +8,12 @@ from backend.common.domain.settlement import (
 )
 
 
-def dividend_multiplier(operation: Operation) -> float:
+def dividend_multiplier(operation: OperationRecord) -> float:
     """除权除息送股/转增合计乘数（reserve + stock）"""
     return operation.reserve + operation.stock
 
 
-def apply_operation_to_hold(hold: float, operation: Operation) -> float:
+def apply_operation_to_hold(hold: float, operation: OperationRecord) -> float:
     """按操作类型更新持股数"""
     match operation.operationType:
         case OperationType.BUY:
@@ -26,7 +26,7 @@ def apply_operation_to_hold(hold: float, operation: Operation) -> float:
             return hold
 
 
-def operation_cash_delta_cny(operation: Operation, current_hold: float) -> float:
+def operation_cash_delta_cny(operation: OperationRecord, current_hold: float) -> float:
     """人民币现金变动：买入流出为负，卖出/分红流入为正。"""
     match operation.operationType:
         case OperationType.BUY:
@@ -42,7 +42,7 @@ def operation_cash_delta_cny(operation: Operation, current_hold: float) -> float
 def apply_net_invested(
     net_invested: float,
     current_hold: float,
-    operation: Operation,
+    operation: OperationRecord,
 ) -> tuple[float, float]:
     """按人民币资金账本更新净占用资金与持股数（供资金加权 / XIRR 口径）。"""
     # 现金流入减少净投入，流出增加净投入
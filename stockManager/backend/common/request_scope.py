@@ -0,0 +1,65 @@
+"""请求级记忆化：同一请求内同参调用只执行一次；不在请求作用域内（管理命令、线程池）时直通"""
+import functools
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, TypeVar
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+class RequestScope:
+    """单个请求内的记忆值与命中计数。"""
+
+    def __init__(self) -> None:
+        self._values: dict[tuple, Any] = {}
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+        self.redis_saved = 0
+
+    def forget(self, namespace: str) -> None:
+        for key in [k for k in self._values if k[0] == namespace]:
+            del self._values[key]
+
+
+_current: ContextVar[RequestScope | None] = ContextVar("request_scope", default=None)
+
+
+@contextmanager
+def request_scope() -> Iterator[RequestScope]:
+    scope = RequestScope()
+    token = _current.set(scope)
+    try:
+        yield scope
+    finally:
+        _current.reset(token)
+
+
+def request_memoized(namespace: str, *, redis_calls: int = 0) -> Callable[[_F], _F]:
+    """装饰器：请求作用域内按 (namespace, 位置参数) 记忆返回值。
+
+    redis_calls 为每次命中省下的 Redis 往返数，累计到 RequestScope.redis_saved。
+    """
+    def decorator(func: _F) -> _F:
+        @functools.wraps(func)
+        def wrapper(*args):
+            if (scope := _current.get()) is None:
+                return func(*args)
+            key = (namespace, args)
+            if key in scope._values:
+                scope.hits[namespace] += 1
+                scope.redis_saved += redis_calls
+                return scope._values[key]
+            scope.misses[namespace] += 1
+            value = scope._values[key] = func(*args)
+            return value
+        return wrapper  # type: ignore[return-value]
+    return decorator
+
+
+def forget(*namespaces: str) -> None:
+    """写入后丢弃相应命名空间的记忆值（如价格时间戳推进后）。"""
+    if (scope := _current.get()) is not None:
+        for namespace in namespaces:
+            scope.forget(namespace)
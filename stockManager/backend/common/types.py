@@ -1,8 +1,8 @@
 """类型定义模块"""
 from datetime import date
-from typing import TypedDict
+from typing import NotRequired, TypedDict
 
-from backend.models import Operation
+from backend.common.domain.operation_record import OperationRecord
 
 
 class RealtimePriceData(TypedDict):
@@ -12,6 +12,8 @@ class RealtimePriceData(TypedDict):
     priceOffset: float
     offsetRatio: float  # 原始比率，如 0.0123 表示 1.23%
     yesterdayClose: float
+    fetchedAt: NotRequired[str]  # 回源时刻（上海时区 ISO），逐代码判定新鲜度
+    stale: NotRequired[bool]  # 等待刷新锁超时或回源失败，返回的是上次缓存价
 
 
 class CashFlowData(TypedDict):
@@ -64,7 +66,8 @@ class StockData(TypedDict):
 class MarketStatusData(TypedDict):
     """单市场状态元数据"""
     inTradingHours: bool
-    priceUpdatedAt: str | None
+    priceUpdatedAt: str | None  # 本次行情该市场各代码 fetchedAt 最早值
+    priceUpdatedAtLatest: str | None  # 最晚值
 
 
 class MarketsData(TypedDict, total=False):
@@ -87,6 +90,13 @@ class OverallData(TypedDict):
     xirrAnnualized: float  # 原始比率
     cashFlowList: list[CashFlowData]
     hkdCnyRate: float
+    hkdCnyRateFetchedAt: str | None  # 汇率回源时间，旧缓存为 None
+
+
+class FxRateData(TypedDict):
+    """HKD/CNY 汇率缓存条目（1 HKD = rate CNY）"""
+    rate: float
+    fetchedAt: str | None
 
 
 class CalculatedResult(TypedDict):
@@ -185,7 +195,7 @@ class NavAnalysisResult(TypedDict):
     updatedAt: str | None
 
 
-OperationDict = dict[str, list[Operation]]
+OperationDict = dict[str, list[OperationRecord]]
 CashFlowList = list[CashFlowData]
 OperationDataDict = dict[str, list[OperationData]]
 RealtimePriceDict = dict[str, RealtimePriceData]
@@ -2,9 +2,9 @@
 from collections import defaultdict
 from collections.abc import Iterable
 
+from backend.common.domain.operation_record import OperationRecord
 from backend.common.thresholds import MIN_QTY
 from backend.common.types import CashFlowList, RealtimePriceData
-from backend.models import Operation
 
 
 def extract_offset_today(
@@ -34,14 +34,14 @@ def sum_origin_cash(cash_flow_list: CashFlowList) -> float:
     return sum(float(flow.get("amount") or 0) for flow in cash_flow_list)
 
 
-def operation_sort_key(op: Operation) -> tuple:
-    """Operation 统一排序键：(date, sortOrder, id)"""
+def operation_sort_key(op: OperationRecord) -> tuple:
+    """操作统一排序键：(date, sortOrder, id)"""
     return (op.date, op.sortOrder, op.pk)
 
 
-def format_operations(operation_list: Iterable[Operation]) -> dict[str, list[Operation]]:
+def format_operations(operation_list: Iterable[OperationRecord]) -> dict[str, list[OperationRecord]]:
     """按股票代码分组操作记录"""
-    grouped: defaultdict[str, list[Operation]] = defaultdict(list)
+    grouped: defaultdict[str, list[OperationRecord]] = defaultdict(list)
     for operation in operation_list:
         grouped[operation.code].append(operation)
     return dict(grouped)
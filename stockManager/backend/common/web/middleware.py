@@ -0,0 +1,21 @@
+"""请求级中间件"""
+import logging
+
+from backend.common.request_scope import request_scope
+
+logger = logging.getLogger(__name__)
+
+
+class RequestScopeMiddleware:
+    """为每个请求安装 request_scope；有命中时经 X-Request-Memo 响应头回报省下的 Redis 往返。"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with request_scope() as scope:
+            response = self.get_response(request)
+        if hits := sum(scope.hits.values()):
+            response["X-Request-Memo"] = f"hits={hits}; misses={sum(scope.misses.values())}; redisSaved={scope.redis_saved}"
+            logger.debug(f"[memo] {request.path} 命中 {dict(scope.hits)}，省 Redis {scope.redis_saved} 次")
+        return response
@@ -1,17 +1,26 @@
 """底层外部数据源适配（仅拉取与标准化，不含缓存编排）"""
 from backend.datasource.baostock_source import baostock_session, fetch_dividends
-from backend.datasource.baiduValuation import fetch_pe_pb
-from backend.datasource.exchangeRate import fetch_hkd_cny_rate
-from backend.datasource.historicalDaily import fetch_daily_closes
-from backend.datasource.historicalHigh import fetch_hist_high
+from backend.datasource.baiduValuation import fetch_many_pe_pb, fetch_pe_pb
+from backend.datasource.exchangeRate import fetch_hkd_cny_daily, fetch_hkd_cny_rate
+from backend.datasource.historicalDaily import fetch_daily_closes, fetch_many_daily_closes
+from backend.datasource.historicalHigh import fetch_hist_high, fetch_many_hist_highs
+from backend.datasource.http_client import UpstreamUnavailable, get_upstream_stats
+from backend.datasource.kline_cache import get_kline_cache_stats
 from backend.datasource.realtimePrice import fetch_prices
 
 __all__ = [
+    "UpstreamUnavailable",
     "baostock_session",
     "fetch_daily_closes",
     "fetch_dividends",
     "fetch_hist_high",
+    "fetch_hkd_cny_daily",
     "fetch_hkd_cny_rate",
+    "fetch_many_daily_closes",
+    "fetch_many_hist_highs",
+    "fetch_many_pe_pb",
     "fetch_pe_pb",
     "fetch_prices",
+    "get_kline_cache_stats",
+    "get_upstream_stats",
 ]
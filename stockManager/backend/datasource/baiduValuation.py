@@ -1,8 +1,13 @@
 """百度股市通估值数据（港股 TTM PE、PB）"""
 from backend.common import logger
-from backend.datasource.http_client import get_json
+from backend.datasource.http_client import (
+    UpstreamUnavailable,
+    fetch_many_available,
+    get_json,
+)
 
 _BAIDU_URL = "https://gushitong.baidu.com/opendata"
+_INDICATORS = ("市盈率(TTM)", "市净率")
 
 
 def _baidu_indicator(
@@ -12,7 +17,7 @@ def _baidu_indicator(
     *,
     timeout: int = 10,
 ) -> float | None:
-    """返回该指标最新一日的值；失败返回 None。"""
+    """返回该指标最新一日的值；失败返回 None，熔断拒绝抛 UpstreamUnavailable。"""
     params = {
         "openapi": "1",
         "dspName": "iphone",
@@ -36,6 +41,8 @@ def _baidu_indicator(
             ]["tplData"]["result"]["chartInfo"][0]["body"]
         )
         return float(body[-1][1]) if body else None
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         logger.error(f"百度估值获取失败 {market}:{code} {indicator}: {e}")
         return None
@@ -43,7 +50,29 @@ def _baidu_indicator(
 
 def fetch_pe_pb(code: str, market: str, *, timeout: int = 10) -> tuple[float | None, float | None]:
     """market: 'hk'(港股); code 已去前缀。返回 (peTtm, pb)。"""
-    return (
-        _baidu_indicator(code, market, "市盈率(TTM)", timeout=timeout),
-        _baidu_indicator(code, market, "市净率", timeout=timeout),
+    return fetch_many_pe_pb({code: (code, market)}, timeout=timeout).get(code, (None, None))
+
+
+def fetch_many_pe_pb(
+    targets: dict[str, tuple[str, str]],
+    *,
+    timeout: int = 10,
+) -> dict[str, tuple[float | None, float | None]]:
+    """targets 为 {key: (code, market)}；各代码的 PE、PB 请求一并并发，返回 {key: (peTtm, pb)}。
+
+    上游熔断拒绝的 key 不出现在结果中（区别于查无数据的 None），调用方不应缓存。
+    """
+    def indicator(job: tuple[str, str, str]) -> float | None:
+        return _baidu_indicator(*job, timeout=timeout)
+
+    values = fetch_many_available(
+        indicator, [(code, market, name) for code, market in targets.values() for name in _INDICATORS]
     )
+    result: dict[str, tuple[float | None, float | None]] = {}
+    for key, (code, market) in targets.items():
+        pe_job, pb_job = ((code, market, name) for name in _INDICATORS)
+        if pe_job in values and pb_job in values:
+            result[key] = (values[pe_job], values[pb_job])
+    if skipped := len(targets) - len(result):
+        logger.warning(f"百度估值上游不可用，跳过 {skipped} 只")
+    return result
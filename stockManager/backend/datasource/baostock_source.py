@@ -2,8 +2,6 @@
 from contextlib import contextmanager
 from typing import TypedDict
 
-import baostock as bs
-
 from backend.common import logger
 from backend.common.utils import safe_float
 
@@ -21,6 +19,9 @@ def _to_bs_code(code: str) -> str:
 
 @contextmanager
 def baostock_session():
+    # baostock 导入即拉起 pandas，延迟到首次分红查询
+    import baostock as bs
+
     bs.login()
     try:
         yield
@@ -30,6 +31,8 @@ def baostock_session():
 
 def fetch_dividends(code: str, first_year: int, year_now: int) -> list[DividendRow]:
     """按年拉取除权除息原始行；需在 baostock_session 内调用。"""
+    import baostock as bs
+
     formatted = _to_bs_code(code)
     rows: list[DividendRow] = []
     for year in range(first_year, year_now + 1):
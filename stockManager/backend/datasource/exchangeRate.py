@@ -1,5 +1,6 @@
 """HKD/CNY 即期汇率外部数据源（新浪外汇）"""
 import re
+from datetime import date, datetime
 
 from backend.datasource.http_client import get_text
 
@@ -22,3 +23,35 @@ def fetch_hkd_cny_rate() -> float:
     if rate <= 0:
         raise ValueError(f"无效汇率: {rate}")
     return rate
+
+
+_SINA_FX_DAILY_URL = (
+    "https://vip.stock.finance.sina.com.cn/forex/api/jsonp.php/"
+    "var%20_fx_shkdcny=/NewForexService.getDayKLine"
+)
+# 日 K 行格式：日期,开,低,高,收
+_DAILY_CLOSE_INDEX = 4
+
+
+def fetch_hkd_cny_daily() -> dict[date, float]:
+    """从新浪外汇日 K 获取 HKD/CNY 全部历史收盘汇率（date -> rate）"""
+    text = get_text(
+        _SINA_FX_DAILY_URL,
+        params={"symbol": "fx_shkdcny"},
+        headers={"Referer": _SINA_REFERER},
+    )
+    if not (match := re.search(r'\("([^"]*)"\)', text)):
+        raise ValueError("sina 外汇日 K 响应格式异常")
+    result: dict[date, float] = {}
+    for row in match.group(1).split("|"):
+        parts = row.split(",")
+        if len(parts) <= _DAILY_CLOSE_INDEX:
+            continue
+        try:
+            d = datetime.strptime(parts[0], "%Y-%m-%d").date()
+            rate = float(parts[_DAILY_CLOSE_INDEX])
+        except ValueError:
+            continue
+        if rate > 0:
+            result[d] = rate
+    return result
@@ -1,6 +1,11 @@
 """腾讯 gtimg K 线公共请求与节点解析"""
-from backend.common.domain.market import is_hk_code
-from backend.datasource.http_client import get_json
+from collections import Counter
+from datetime import date
+
+from backend.common.domain.calendar import TradingCalendar
+from backend.common.domain.market import code_to_market, is_hk_code
+from backend.datasource import kline_cache
+from backend.datasource.http_client import UpstreamUnavailable, get_json
 
 CN_KLINE_URL = "https://proxy.finance.qq.com/ifzqgtimg/appstock/app/newfqkline/get"
 HK_KLINE_URL = "https://proxy.finance.qq.com/ifzqgtimg/appstock/app/hkfqkline/get"
@@ -21,6 +26,11 @@ def extract_kline_rows(node: dict, preferred_keys: tuple[str, ...]) -> list[list
     return []
 
 
+def is_closed_range(code: str, end: date) -> bool:
+    """区间终点早于该市场最近已收盘交易日：其中 K 线已定型，可落盘缓存。"""
+    return end < TradingCalendar.latest_closed_session(market=code_to_market(code))
+
+
 def fetch_kline_node(
     code: str,
     *,
@@ -31,17 +41,38 @@ def fetch_kline_node(
     adjust: str,
     timeout: int,
     url: str | None = None,
+    cache_closed: bool = False,
+    counter: Counter[str] | None = None,
 ) -> dict | None:
     """拉取 gtimg K 线并返回单票 data 节点。
 
     网络/API 错误抛异常（供调用方重试）；空 payload 返回 None。
+    cache_closed=True 且区间已收盘时先读 kline_cache，命中节点仅含不复权 period 一组行（调用方只能解析该组）。
+    传入 counter 时累加 cacheHits（落盘命中）/ requests（实际发出的 HTTP 请求，熔断拒绝不计）。
     """
+    counter = counter if counter is not None else Counter()
+    cache_closed = cache_closed and is_closed_range(code, date.fromisoformat(end))
+    if cache_closed and (cached := kline_cache.get(code, period, start, end, adjust)) is not None:
+        counter["cacheHits"] += 1
+        return cached
     endpoint = url or kline_url_for_code(code)
     param = f"{code},{period},{start},{end},{count},{adjust}"
-    data = get_json(endpoint, params={"param": param}, timeout=timeout)
+    try:
+        data = get_json(endpoint, params={"param": param}, timeout=timeout)
+    except UpstreamUnavailable:
+        raise
+    except Exception:
+        counter["requests"] += 1
+        raise
+    counter["requests"] += 1
     api_code = data.get("code")
     if api_code not in (0, "0", None) and not data.get("data"):
         raise RuntimeError(f"gtimg code={api_code} msg={data.get('msg')}")
     if not (payload := data.get("data") or {}):
         return None
-    return node if isinstance(node := next(iter(payload.values())), dict) else None
+    if not isinstance(node := next(iter(payload.values())), dict):
+        return None
+    # 行数触及 count 上限说明被截断，不落盘
+    if cache_closed and isinstance(rows := node.get(period), list) and 0 < len(rows) < count:
+        kline_cache.put(code, period, start, end, adjust, {period: rows})
+    return node
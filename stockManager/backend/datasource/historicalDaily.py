@@ -7,22 +7,35 @@ K 线行格式：[日期, 开, 收, 高, 低, 量]，收盘价位于索引 2。
 
 - A 股：newfqkline，取 day
 - 港股：hkfqkline，取 day（不用 qfq）
+
+单代码的缺口先规划成最少请求：整块已收盘的 _CHUNK_DAYS 日历网格块按整块拉取（键稳定，经 gtimg_kline
+落盘缓存后不再回源），未收盘部分按代价模型合并，单次不超过 _MAX_BARS 个交易日。
 """
+from bisect import bisect_left, bisect_right
+from collections import Counter
 from datetime import date, datetime, timedelta
 from time import sleep
 
 from backend.common import logger
-from backend.common.domain.market import is_hk_code
+from backend.common.domain.calendar import TradingCalendar
+from backend.common.domain.market import Market, code_to_market, is_hk_code
+from backend.common.types import DailyCloseSeries
 from backend.datasource.gtimg_kline import (
     extract_kline_rows,
     fetch_kline_node,
+    is_closed_range,
     kline_url_for_code,
 )
+from backend.datasource.http_client import UpstreamUnavailable, fetch_many_available
 
 _CLOSE_INDEX = 2
 _PERIOD = "day"
 _CHUNK_DAYS = 300
 _COUNT = 320
+# 单次请求交易日上限（低于 _COUNT，留出日历与数据源差异余量）
+_MAX_BARS = 300
+# 一次请求的固定开销折合的 K 线根数：相邻缺口间已有交易日不超过该值即合并拉取
+_REQUEST_COST_BARS = 60
 _MAX_RETRIES = 2
 _RETRY_SLEEP_SEC = 0.4
 _PREFERRED_KEYS = ("day", "qfqday")
@@ -45,19 +58,26 @@ def _parse_closes_from_node(node: dict) -> dict[date, float]:
     return result
 
 
+def _adjust(code: str) -> str:
+    # A 股：末段空 = 不复权；港股 hkfqkline 空参会 bad params，用 qfq 但优先解析 day
+    return "qfq" if is_hk_code(code) else ""
+
+
 def _fetch_chunk(
     code: str,
     start: date,
     end: date,
     *,
     timeout: int,
-) -> dict[date, float]:
-    # A 股：末段空 = 不复权；港股 hkfqkline 空参会 bad params，用 qfq 但优先解析 day
-    adjust = "qfq" if is_hk_code(code) else ""
+    counter: Counter[str],
+) -> DailyCloseSeries | None:
+    """单次请求；上游正常应答但无有效收盘价（停牌、退市后的区间）返回 {}，请求出错重试仍失败返回 None。
+    counter 累加落盘命中与实际 HTTP 请求数（含重试）。"""
+    adjust = _adjust(code)
     last_error: Exception | None = None
     for attempt in range(1, _MAX_RETRIES + 1):
         try:
-            if (node := fetch_kline_node(
+            node = fetch_kline_node(
                 code,
                 period=_PERIOD,
                 start=start.isoformat(),
@@ -66,9 +86,12 @@ def _fetch_chunk(
                 adjust=adjust,
                 timeout=timeout,
                 url=kline_url_for_code(code),
-            )) is None:
-                return {}
-            return _parse_closes_from_node(node)
+                cache_closed=True,
+                counter=counter,
+            )
+            return _parse_closes_from_node(node) if node is not None else {}
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
             last_error = e
             logger.warning(
@@ -77,7 +100,72 @@ def _fetch_chunk(
             if attempt < _MAX_RETRIES:
                 sleep(_RETRY_SLEEP_SEC * attempt)
     logger.error(f"[historicalDaily] 获取 {code} {start}~{end} 最终失败: {last_error}")
-    return {}
+    return None
+
+
+def _block_bounds(block: int) -> tuple[date, date]:
+    return date.fromordinal(max(block * _CHUNK_DAYS, 1)), date.fromordinal((block + 1) * _CHUNK_DAYS - 1)
+
+
+def _sessions(start: date, end: date, market: Market) -> list[date]:
+    return TradingCalendar.sessions_between(start, end, market)
+
+
+def _split_by_bars(start: date, end: date, market: Market) -> list[tuple[date, date]]:
+    """单段超过 _MAX_BARS 个交易日时按交易日切开，保证每次请求不被 _COUNT 截断。"""
+    if len(sessions := _sessions(start, end, market)) <= _MAX_BARS:
+        return [(start, end)]
+    heads = sessions[::_MAX_BARS]
+    return [
+        (start if i == 0 else head, end if i == len(heads) - 1 else sessions[(i + 1) * _MAX_BARS - 1])
+        for i, head in enumerate(heads)
+    ]
+
+
+def _merge_open_parts(parts: list[tuple[date, date]], market: Market) -> list[tuple[date, date]]:
+    """按代价模型贪心合并：一次请求的固定开销折合 _REQUEST_COST_BARS 根 K 线，
+    相邻两段之间多拉的已有交易日不超过该值、且合并后不超过 _MAX_BARS 个交易日即并为一次请求。"""
+    planned: list[tuple[date, date]] = []
+    for start, end in sorted(parts):
+        if planned:
+            cur_start, cur_end = planned[-1]
+            if start <= cur_end + timedelta(days=1) or (
+                len(_sessions(cur_end + timedelta(days=1), start - timedelta(days=1), market)) <= _REQUEST_COST_BARS
+                and len(_sessions(cur_start, max(end, cur_end), market)) <= _MAX_BARS
+            ):
+                planned[-1] = (cur_start, max(end, cur_end))
+                continue
+        planned.append((start, end))
+    return [piece for start, end in planned for piece in _split_by_bars(start, end, market)]
+
+
+def _plan_requests(code: str, ranges: list[tuple[date, date]]) -> list[tuple[date, date]]:
+    """单代码全部缺口 → 请求区间。
+
+    整块已收盘的网格块各拉一次整块（键稳定，可命中落盘缓存，块内多个缺口共用）；
+    含未收盘日的部分按 _merge_open_parts 合并，每次回源。
+    """
+    market = code_to_market(code)
+    closed_blocks: dict[int, None] = {}
+    open_parts: list[tuple[date, date]] = []
+    for start, end in ranges:
+        for block in range(start.toordinal() // _CHUNK_DAYS, end.toordinal() // _CHUNK_DAYS + 1):
+            block_start, block_end = _block_bounds(block)
+            if is_closed_range(code, block_end):
+                closed_blocks[block] = None
+            else:
+                open_parts.append((max(start, block_start), min(end, block_end)))
+    return [_block_bounds(block) for block in sorted(closed_blocks)] + _merge_open_parts(open_parts, market)
+
+
+def _clip_with_neighbors(closes: DailyCloseSeries, ranges: list[tuple[date, date]]) -> DailyCloseSeries:
+    """保留请求区间内的收盘价，另各保留区间前后紧邻的一根返回行（供调用方判断缺口是否被返回数据夹住）。"""
+    dates = sorted(closes)
+    keep: set[date] = set()
+    for start, end in ranges:
+        lo, hi = bisect_left(dates, start), bisect_right(dates, end)
+        keep.update(dates[max(lo - 1, 0):hi + 1])
+    return {d: closes[d] for d in sorted(keep)}
 
 
 def fetch_daily_closes(
@@ -87,14 +175,64 @@ def fetch_daily_closes(
     *,
     timeout: int = 15,
 ) -> dict[date, float]:
-    """拉取 [start, end] 日频不复权收盘价；失败或缺数据返回已拉到的子集。"""
-    if start > end:
-        return {}
-    merged: dict[date, float] = {}
-    cursor = start
-    while cursor <= end:
-        chunk_end = min(cursor + timedelta(days=_CHUNK_DAYS - 1), end)
-        chunk = _fetch_chunk(code, cursor, chunk_end, timeout=timeout)
-        merged.update(chunk)
-        cursor = chunk_end + timedelta(days=1)
-    return {d: px for d, px in merged.items() if start <= d <= end}
+    """拉取 [start, end] 日频不复权收盘价；任一请求失败返回空 dict。"""
+    closes = fetch_many_daily_closes([(code, start, end)], timeout=timeout).get(code, {})
+    return {d: px for d, px in closes.items() if start <= d <= end}
+
+
+def fetch_many_daily_closes(
+    ranges: list[tuple[str, date, date]],
+    *,
+    timeout: int = 15,
+) -> dict[str, DailyCloseSeries]:
+    """多代码、多区间按 _plan_requests 规划后一并并发拉取，按代码合并；保留各代码请求区间内的收盘价
+    及区间两侧紧邻的各一根返回行（区间外的行只作边界，不代表已拉齐）。
+
+    拉取结束后每代码记录缺口数、计划请求数、实际 HTTP 请求数（含重试）与落盘命中数。
+    任一请求出错或遇上游熔断拒绝的代码整体不出现在结果中，调用方下次再补；上游应答为空的区间照常计入
+    （该代码可能无任何返回行）。出现在结果中的代码，请求区间内夹在首末返回行之间的缺失交易日即上游无数据，
+    首末返回行之外的缺失（停牌至今、退市）由调用方按已知缺失处理。
+    """
+    def chunk(job: tuple[str, date, date]) -> DailyCloseSeries | None:
+        return _fetch_chunk(*job, timeout=timeout, counter=counters[job])
+
+    ranges_by_code: dict[str, list[tuple[date, date]]] = {}
+    for code, start, end in ranges:
+        code_ranges = ranges_by_code.setdefault(code, [])
+        if start <= end:
+            code_ranges.append((start, end))
+    jobs: list[tuple[str, date, date]] = []
+    for code, code_ranges in ranges_by_code.items():
+        if not code_ranges:
+            continue
+        jobs.extend((code, start, end) for start, end in _plan_requests(code, code_ranges))
+    # 每个请求独占一个计数器，仅由执行它的线程写入
+    counters: dict[tuple[str, date, date], Counter[str]] = {job: Counter() for job in jobs}
+
+    merged: dict[str, DailyCloseSeries] = {code: {} for code in ranges_by_code}
+    unavailable: set[str] = set()
+    failed: set[str] = set()
+    totals: dict[str, Counter[str]] = {}
+    fetched = fetch_many_available(chunk, jobs)
+    for job in jobs:
+        code = job[0]
+        totals.setdefault(code, Counter()).update(counters[job], planned=1)
+        if job not in fetched:
+            unavailable.add(code)
+            continue
+        if (closes := fetched[job]) is None:
+            failed.add(code)
+            continue
+        merged[code].update(closes)
+    for code, total in totals.items():
+        logger.info(
+            f"[historicalDaily] {code} {len(ranges_by_code[code])} 个缺口 → 计划 {total['planned']} 次请求，"
+            f"实际回源 {total['requests']} 次（含重试，落盘命中 {total['cacheHits']}）"
+        )
+    if unavailable:
+        logger.warning(f"[historicalDaily] gtimg 上游不可用，跳过 {len(unavailable)} 只: {sorted(unavailable)[:8]}")
+    return {
+        code: _clip_with_neighbors(closes, ranges_by_code[code])
+        for code, closes in merged.items()
+        if code not in unavailable and code not in failed
+    }
@@ -12,6 +12,7 @@ from backend.datasource.gtimg_kline import (
     fetch_kline_node,
     kline_url_for_code,
 )
+from backend.datasource.http_client import UpstreamUnavailable, fetch_many_available
 
 _MONTHS = 72  # 6 年
 _HIGH_INDEX = 3
@@ -27,7 +28,7 @@ def _date_range() -> tuple[str, str]:
 
 
 def fetch_hist_high(code: str, *, timeout: int = 10) -> float | None:
-    """近 6 年周线最高价（前复权）；港股为港币。失败返回 None。"""
+    """近 6 年周线最高价（前复权）；港股为港币。失败返回 None，熔断拒绝抛 UpstreamUnavailable。"""
     start_str, end_str = _date_range()
     try:
         if (node := fetch_kline_node(
@@ -45,6 +46,19 @@ def fetch_hist_high(code: str, *, timeout: int = 10) -> float | None:
         if not (highs := [float(row[_HIGH_INDEX]) for row in rows if len(row) > _HIGH_INDEX]):
             return None
         return max(highs)
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         logger.error(f"[historicalHigh] 获取 {code} 6年高失败: {e}")
         return None
+
+
+def fetch_many_hist_highs(codes: list[str], *, timeout: int = 10) -> dict[str, float | None]:
+    """并发拉取多只股票近 6 年高（受 gtimg host 并发上限约束）；上游不可用的代码不出现在结果中。"""
+    def hist_high(code: str) -> float | None:
+        return fetch_hist_high(code, timeout=timeout)
+
+    result = fetch_many_available(hist_high, dict.fromkeys(codes))
+    if skipped := len(codes) - len(result):
+        logger.warning(f"[historicalHigh] gtimg 上游不可用，跳过 {skipped} 只")
+    return result
@@ -1,7 +1,21 @@
-"""共享 HTTP 客户端（百度 opendata、腾讯 gtimg、sina 外汇等）"""
+"""共享 HTTP 客户端（百度 opendata、腾讯 gtimg、sina 外汇等）
+
+各线程 Session 挂同一个 HTTPAdapter，按 host 复用 keep-alive 连接池；
+每个上游 host 有并发上限、令牌桶限速与熔断，批量拉取经 fetch_many 在共享线程池执行。
+"""
 import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar
+from urllib.parse import urlsplit
 
 import requests
+from requests.adapters import HTTPAdapter
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
 
 _DEFAULT_TIMEOUT = 10
 _DEFAULT_UA = (
@@ -9,32 +23,183 @@ _DEFAULT_UA = (
     "AppleWebKit/605.1.15"
 )
 
+# 每个上游 host 同时在途请求上限（含所有线程）；未列出的 host 用默认值
+_HOST_LIMITS = {
+    "proxy.finance.qq.com": 6,
+    "qt.gtimg.cn": 8,
+    "sqt.gtimg.cn": 8,
+    "gushitong.baidu.com": 4,
+    "hq.sinajs.cn": 2,
+    "vip.stock.finance.sina.com.cn": 2,
+}
+_DEFAULT_HOST_LIMIT = 4
+# 每个 host 令牌桶 (每秒补充数, 桶容量)；取不到令牌时预占并等到补充时刻再发，批量拉取因此被匀速放行；
+# 等待超过请求超时 / 调用方截止时刻时退还令牌并拒绝，预占量因此以 速率 × 超时 为上限
+_HOST_RATES = {
+    "proxy.finance.qq.com": (10.0, 20),
+    "qt.gtimg.cn": (10.0, 20),
+    "sqt.gtimg.cn": (10.0, 20),
+    "gushitong.baidu.com": (5.0, 10),
+    "hq.sinajs.cn": (2.0, 4),
+    "vip.stock.finance.sina.com.cn": (2.0, 4),
+}
+_DEFAULT_HOST_RATE = (5.0, 10)
+# 连续失败（连接错误、超时、5xx / 429）达到阈值即熔断，冷却后放行单个探测请求
+_BREAKER_FAILURES = 5
+_BREAKER_COOLDOWN = 30.0
+# 批量拉取共享线程数；实际上游并发仍受 _HOST_LIMITS 约束
+_FANOUT_WORKERS = 16
+
+_ADAPTER = HTTPAdapter(pool_connections=len(_HOST_LIMITS) + 4, pool_maxsize=max(_HOST_LIMITS.values()))
+_FANOUT_POOL = ThreadPoolExecutor(max_workers=_FANOUT_WORKERS, thread_name_prefix="http-fanout")
+
 _thread_local = threading.local()
 
 
+class UpstreamUnavailable(requests.RequestException):
+    """上游熔断或限速排队超时拒绝：未发出请求，调用方应直接用缓存 / 兜底值，不写入失败结果。"""
+
+
+class _HostGuard:
+    """单个上游 host 的并发名额、令牌桶与熔断状态（进程内）。"""
+
+    def __init__(self, host: str) -> None:
+        self.host = host
+        self.slots = threading.BoundedSemaphore(_HOST_LIMITS.get(host, _DEFAULT_HOST_LIMIT))
+        self.rate, self.capacity = _HOST_RATES.get(host, _DEFAULT_HOST_RATE)
+        self.tokens = float(self.capacity)
+        self.refilled_at = time.monotonic()
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.probing = False
+        self.counters: Counter[str] = Counter()
+        self.lock = threading.Lock()
+
+    def state(self, now: float) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "open" if now - self.opened_at < _BREAKER_COOLDOWN else "half_open"
+
+    def admit(self, deadline: float) -> None:
+        """熔断检查 + 取令牌；令牌不足则阻塞到补充时刻。
+
+        熔断中、或补充时刻晚于 deadline（time.monotonic 时刻）时抛 UpstreamUnavailable，不占令牌。
+        """
+        with self.lock:
+            now = time.monotonic()
+            state = self.state(now)
+            if state == "open" or (state == "half_open" and self.probing):
+                self.counters["rejected_open"] += 1
+                raise UpstreamUnavailable(f"{self.host} 熔断中")
+            self.tokens = min(self.capacity, self.tokens + (now - self.refilled_at) * self.rate)
+            self.refilled_at = now
+            wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+            if now + wait > deadline:
+                self.counters["rejected_rate"] += 1
+                raise UpstreamUnavailable(f"{self.host} 限速排队需 {wait:.1f}s，超过截止时刻")
+            self.tokens -= 1
+            if state == "half_open":
+                self.probing = True
+            if wait:
+                self.counters["throttled"] += 1
+        if wait:
+            time.sleep(wait)
+
+    def record(self, ok: bool) -> None:
+        with self.lock:
+            self.counters["ok" if ok else "failed"] += 1
+            self.probing = False
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= _BREAKER_FAILURES:
+                if self.opened_at is None:
+                    self.counters["opened"] += 1
+                self.opened_at = time.monotonic()
+
+    def stats(self) -> dict[str, object]:
+        with self.lock:
+            return {
+                "state": self.state(time.monotonic()),
+                "consecutiveFailures": self.failures,
+                **self.counters,
+            }
+
+
+_guards: dict[str, _HostGuard] = {}
+_guards_lock = threading.Lock()
+
+
 def _get_session() -> requests.Session:
     session = getattr(_thread_local, "session", None)
     if session is None:
         session = requests.Session()
         session.headers.setdefault("User-Agent", _DEFAULT_UA)
+        session.mount("http://", _ADAPTER)
+        session.mount("https://", _ADAPTER)
         _thread_local.session = session
     return session
 
 
+def _guard(host: str) -> _HostGuard:
+    if (guard := _guards.get(host)) is None:
+        with _guards_lock:
+            guard = _guards.setdefault(host, _HostGuard(host))
+    return guard
+
+
+def get_upstream_stats() -> dict[str, dict[str, object]]:
+    """本进程各上游 host 熔断状态与计数（ok / failed / opened / rejected_open / rejected_rate / throttled）"""
+    return {host: guard.stats() for host, guard in list(_guards.items())}
+
+
+def _remaining(timeout: float, deadline: float | None) -> float:
+    if deadline is None:
+        return timeout
+    return max(0.1, min(timeout, deadline - time.monotonic()))
+
+
+def _get(
+    url: str,
+    params: dict | None,
+    headers: dict | None,
+    timeout: float,
+    deadline: float | None,
+) -> requests.Response:
+    session = _get_session()
+    merged = dict(session.headers)
+    if headers:
+        merged.update(headers)
+    guard = _guard(urlsplit(url).hostname or "")
+    # 限速排队与等待并发名额各自计入超时，避免上游变慢时请求线程无限堆积；
+    # deadline 为调用方整批等待的 time.monotonic() 截止时刻，排队与请求本身都不越过它（调用方放弃后线程随之退出）
+    guard.admit(min(time.monotonic() + timeout, deadline if deadline is not None else float("inf")))
+    if not guard.slots.acquire(timeout=_remaining(timeout, deadline)):
+        guard.record(False)
+        raise requests.Timeout(f"{guard.host} 并发已满，{timeout}s 内未获得名额")
+    try:
+        resp = session.get(url, params=params, headers=merged, timeout=_remaining(timeout, deadline))
+    except Exception:
+        guard.record(False)
+        raise
+    finally:
+        guard.slots.release()
+    guard.record(resp.status_code < 500 and resp.status_code != 429)
+    resp.raise_for_status()
+    return resp
+
+
 def get_json(
     url: str,
     *,
     params: dict | None = None,
     headers: dict | None = None,
     timeout: int = _DEFAULT_TIMEOUT,
+    deadline: float | None = None,
 ) -> dict:
-    session = _get_session()
-    merged = dict(session.headers)
-    if headers:
-        merged.update(headers)
-    resp = session.get(url, params=params, headers=merged, timeout=timeout)
-    resp.raise_for_status()
-    return resp.json()
+    return _get(url, params, headers, timeout, deadline).json()
 
 
 def get_text(
@@ -43,11 +208,41 @@ def get_text(
     params: dict | None = None,
     headers: dict | None = None,
     timeout: int = _DEFAULT_TIMEOUT,
+    deadline: float | None = None,
 ) -> str:
-    session = _get_session()
-    merged = dict(session.headers)
-    if headers:
-        merged.update(headers)
-    resp = session.get(url, params=params, headers=merged, timeout=timeout)
-    resp.raise_for_status()
-    return resp.text
+    return _get(url, params, headers, timeout, deadline).text
+
+
+def _run_in_fanout(fn: Callable[[_T], _R], item: _T) -> _R:
+    _thread_local.in_fanout = True
+    return fn(item)
+
+
+def fetch_many(fn: Callable[[_T], _R], items: Iterable[_T]) -> list[_R]:
+    """在共享线程池并发执行 fn，按输入顺序返回；fn 自行处理异常（抛出会向调用方传播）。
+
+    已在共享池线程内调用时串行执行，避免嵌套提交占满线程池自锁。
+    """
+    items = list(items)
+    if len(items) <= 1 or getattr(_thread_local, "in_fanout", False):
+        return [fn(item) for item in items]
+    return list(_FANOUT_POOL.map(_run_in_fanout, [fn] * len(items), items))
+
+
+def fetch_many_available(fn: Callable[[_T], _R], items: Iterable[_T]) -> dict[_T, _R]:
+    """fetch_many 的熔断容错版：返回 {item: 结果}（按输入顺序），fn 抛 UpstreamUnavailable 的 item 不出现在结果中。
+
+    items 须可哈希且不重复；其他异常照常向调用方传播。
+    """
+    def call(item: _T) -> _R | UpstreamUnavailable:
+        try:
+            return fn(item)
+        except UpstreamUnavailable as e:
+            return e
+
+    items = list(items)
+    return {
+        item: value
+        for item, value in zip(items, fetch_many(call, items), strict=True)
+        if not isinstance(value, UpstreamUnavailable)
+    }
@@ -0,0 +1,125 @@
+"""gtimg K 线响应本地持久缓存（SQLite 文件，按 code / period / start / end / adjust 内容寻址）
+
+只存已收盘区间的不复权行：区间终点早于该市场 latest_closed_session 的不复权 K 线不会再变；
+复权行随除权变化、未收盘尾段随行情变化，均不落盘。多进程共用同一文件（WAL），读写失败按未命中处理。
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+
+import orjson
+from django.conf import settings
+
+from backend.common import logger
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kline (
+    key TEXT PRIMARY KEY,
+    param TEXT NOT NULL,
+    body BLOB NOT NULL,
+    created_at REAL NOT NULL
+)
+"""
+_BUSY_TIMEOUT = 5
+
+_thread_local = threading.local()
+_counters: Counter[str] = Counter()
+_counters_lock = threading.Lock()
+
+
+def _path() -> Path:
+    return Path(settings.KLINE_CACHE_PATH)
+
+
+def _connection() -> sqlite3.Connection:
+    if (conn := getattr(_thread_local, "conn", None)) is None:
+        _path().parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(_path(), timeout=_BUSY_TIMEOUT, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(_SCHEMA)
+        _thread_local.conn = conn
+    return conn
+
+
+def _count(**deltas: int) -> None:
+    with _counters_lock:
+        _counters.update(deltas)
+
+
+def _param(code: str, period: str, start: str, end: str, adjust: str) -> str:
+    return f"{code},{period},{start},{end},{adjust}"
+
+
+def _key(param: str) -> str:
+    return hashlib.sha1(param.encode()).hexdigest()
+
+
+def get(code: str, period: str, start: str, end: str, adjust: str) -> dict | None:
+    """命中返回 K 线节点（仅含 period 一组行），未命中或读失败返回 None；无法解码的条目删除后按未命中处理。"""
+    try:
+        row = _connection().execute(
+            "SELECT body FROM kline WHERE key = ?",
+            (_key(_param(code, period, start, end, adjust)),),
+        ).fetchone()
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"[kline_cache] 读取失败: {e}")
+        _count(errors=1, misses=1)
+        return None
+    if row is None:
+        _count(misses=1)
+        return None
+    try:
+        node = orjson.loads(zlib.decompress(row[0]))
+    except (zlib.error, orjson.JSONDecodeError) as e:
+        logger.warning(f"[kline_cache] 条目损坏，已删除 {_param(code, period, start, end, adjust)}: {e}")
+        _count(errors=1, misses=1)
+        _delete(code, period, start, end, adjust)
+        return None
+    _count(hits=1, bytesRead=len(row[0]))
+    return node
+
+
+def _delete(code: str, period: str, start: str, end: str, adjust: str) -> None:
+    try:
+        _connection().execute(
+            "DELETE FROM kline WHERE key = ?",
+            (_key(_param(code, period, start, end, adjust)),),
+        )
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"[kline_cache] 删除失败: {e}")
+
+
+def put(code: str, period: str, start: str, end: str, adjust: str, node: dict) -> None:
+    param = _param(code, period, start, end, adjust)
+    body = zlib.compress(orjson.dumps(node))
+    try:
+        _connection().execute(
+            "INSERT OR REPLACE INTO kline (key, param, body, created_at) VALUES (?, ?, ?, ?)",
+            (_key(param), param, body, time.time()),
+        )
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"[kline_cache] 写入失败 {param}: {e}")
+        _count(errors=1)
+        return
+    _count(writes=1, bytesWritten=len(body))
+
+
+def get_kline_cache_stats() -> dict[str, object]:
+    """命中率与字节计数（本进程）及缓存文件条目数 / 大小（全部进程共享）"""
+    with _counters_lock:
+        counters = dict(_counters)
+    lookups = counters.get("hits", 0) + counters.get("misses", 0)
+    try:
+        entries = _connection().execute("SELECT COUNT(*) FROM kline").fetchone()[0]
+    except (sqlite3.Error, OSError):
+        entries = None
+    return {
+        **counters,
+        "hitRate": round(counters.get("hits", 0) / lookups, 4) if lookups else None,
+        "entries": entries,
+        "fileBytes": sum(p.stat().st_size for p in (_path(), _path().with_name(_path().name + "-wal")) if p.exists()),
+    }
@@ -1,4 +1,6 @@
-"""股票实时价格外部数据源（easyquotation tencent / hkquote）"""
+"""股票实时价格外部数据源（easyquotation tencent / hkquote 拼接口与解析，HTTP 经 http_client）"""
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from typing import Protocol, cast
 
 from easyquotation import use as eq_use
@@ -6,10 +8,25 @@ from easyquotation import use as eq_use
 from backend.common import logger
 from backend.common.domain.market import hk_api_code, split_codes_by_market
 from backend.common.types import RealtimePriceData, RealtimePriceDict
+from backend.datasource import http_client
+from backend.datasource.http_client import UpstreamUnavailable
+
+# 单次请求代码数（腾讯接口上限 60）；A 股 / 港股各分片在专用线程池并发拉取，合并部分结果
+_CHUNK_SIZE = 60
+# 单分片 HTTP 超时；整批等待上限须小于 keys.TTL_PRICE_REFRESH_LOCK，超时分片本轮视为缺失，
+# 其线程的限速排队与请求也以整批截止时刻为限，不在放弃后继续占用上游名额
+_CHUNK_TIMEOUT = 4
+_FETCH_DEADLINE = 8
+_FETCH_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="quote-fetch")
 
 
 class _EasyQuotation(Protocol):
-    def real(self, code_list: list[str], prefix: bool = False) -> dict[str, dict]: ...
+    @property
+    def stock_api(self) -> str: ...
+
+    def gen_stock_list(self, stock_codes: list[str]) -> list[str]: ...
+
+    def format_response_data(self, rep_data: list[str], prefix: bool = False) -> dict[str, dict]: ...
 
 
 _quotations: dict[str, _EasyQuotation] = {}
@@ -21,6 +38,18 @@ def _quotation(name: str) -> _EasyQuotation:
     return _quotations[name]
 
 
+def _real(name: str, code_list: list[str], deadline: float, prefix: bool = False) -> dict[str, dict]:
+    """等价 easyquotation real()，但请求带超时（库内 session 无超时，慢请求会挂住整批）。"""
+    quotation = _quotation(name)
+    return quotation.format_response_data(
+        [
+            http_client.get_text(quotation.stock_api + query, timeout=_CHUNK_TIMEOUT, deadline=deadline)
+            for query in quotation.gen_stock_list(code_list)
+        ],
+        prefix=prefix,
+    )
+
+
 def _build_price(stock_data: dict, price_key: str, close_key: str) -> RealtimePriceData:
     current = float(stock_data.get(price_key, 0.0) or 0.0)
     close = float(stock_data.get(close_key, 0.0) or 0.0)
@@ -34,37 +63,57 @@ def _build_price(stock_data: dict, price_key: str, close_key: str) -> RealtimePr
     })
 
 
+def _chunks(code_list: list[str]) -> list[list[str]]:
+    return [code_list[i:i + _CHUNK_SIZE] for i in range(0, len(code_list), _CHUNK_SIZE)]
+
+
 def fetch_prices(code_list: list[str]) -> RealtimePriceDict:
+    """A 股、港股分片并发拉取；失败或超时的分片不出现在结果中，调用方据此判断市场是否完整回源。"""
     if not code_list:
         return {}
     cn_codes, hk_codes = split_codes_by_market(code_list)
+    deadline = time.monotonic() + _FETCH_DEADLINE
+    jobs: list[tuple[str, list[str], Future[RealtimePriceDict]]] = [
+        *(("A 股", chunk, _FETCH_POOL.submit(_fetch_cn, chunk, deadline)) for chunk in _chunks(cn_codes)),
+        *(("港股", chunk, _FETCH_POOL.submit(_fetch_hk, chunk, deadline)) for chunk in _chunks(hk_codes)),
+    ]
+    done, _ = wait([future for _, _, future in jobs], timeout=_FETCH_DEADLINE)
+
     result: RealtimePriceDict = {}
-    if cn_codes:
-        result.update(_fetch_cn(cn_codes))
-    if hk_codes:
-        result.update(_fetch_hk(hk_codes))
+    for label, chunk, future in jobs:
+        if future in done:
+            result.update(future.result())
+        else:
+            future.cancel()
+            logger.warning(f"[price] {label}分片 {len(chunk)} 只 {_FETCH_DEADLINE}s 内未返回，本轮跳过")
     return result
 
 
-def _fetch_cn(code_list: list[str]) -> RealtimePriceDict:
+def _fetch_cn(code_list: list[str], deadline: float) -> RealtimePriceDict:
     try:
         return {
             code: _build_price(data, "now", "close")
-            for code, data in _quotation("tencent").real(code_list, prefix=True).items()
+            for code, data in _real("tencent", code_list, deadline, prefix=True).items()
         }
+    except UpstreamUnavailable as e:
+        logger.warning(f"[price] A 股分片 {len(code_list)} 只跳过: {e}")
+        return {}
     except Exception as e:
-        logger.error(f"获取 A 股价格失败: {e}")
+        logger.error(f"获取 A 股价格失败（{len(code_list)} 只）: {e}")
         return {}
 
 
-def _fetch_hk(code_list: list[str]) -> RealtimePriceDict:
+def _fetch_hk(code_list: list[str], deadline: float) -> RealtimePriceDict:
     try:
-        raw = _quotation("hkquote").real([hk_api_code(code) for code in code_list])
+        raw = _real("hkquote", [hk_api_code(code) for code in code_list], deadline)
         return {
             code: _build_price(raw[hk_api_code(code)], "price", "lastPrice")
             for code in code_list
             if raw.get(hk_api_code(code))
         }
+    except UpstreamUnavailable as e:
+        logger.warning(f"[price] 港股分片 {len(code_list)} 只跳过: {e}")
+        return {}
     except Exception as e:
-        logger.error(f"获取港股价格失败: {e}")
+        logger.error(f"获取港股价格失败（{len(code_list)} 只）: {e}")
         return {}
@@ -0,0 +1,39 @@
+"""交易时段后台采集实时行情：python manage.py collect_quotes [--interval 10] [--once]"""
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.common import logger
+from backend.common.domain.calendar import TZ_SHANGHAI
+from backend.services.app import QuoteCollector
+
+
+class Command(BaseCommand):
+    help = "交易时段按固定节奏采集持仓与关注代码的实时行情；午休、收盘与节假日休眠至下一开盘"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=int, default=10, help="采集间隔秒数（默认 10）")
+        parser.add_argument("--once", action="store_true", help="仅采集一轮后退出（休市时直接退出）")
+
+    def handle(self, *args, **options):
+        interval: int = options["interval"]
+        if interval <= 0:
+            raise CommandError("interval 须为正整数")
+
+        logger.info(f"[collector] 启动，间隔 {interval}s")
+        while True:
+            started = time.monotonic()
+            now = datetime.now(TZ_SHANGHAI)
+            markets = QuoteCollector.open_markets(now)
+            if markets:
+                collected = QuoteCollector.collect(markets, interval)
+                logger.debug(f"[collector] {({m.value: n for m, n in collected.items()})}")
+            if options["once"]:
+                return
+            if not markets:
+                wake_at = QuoteCollector.next_wake_at(now)
+                logger.info(f"[collector] 休市，休眠至 {wake_at:%Y-%m-%d %H:%M}")
+                time.sleep(max((wake_at - datetime.now(TZ_SHANGHAI)).total_seconds(), 0))
+                continue
+            time.sleep(max(interval - (time.monotonic() - started), 0))
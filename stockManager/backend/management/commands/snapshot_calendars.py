@@ -0,0 +1,12 @@
+"""由 exchange_calendars 重新生成交易日快照：python manage.py snapshot_calendars"""
+from django.core.management.base import BaseCommand
+
+from backend.common.domain.calendar import write_snapshot
+
+
+class Command(BaseCommand):
+    help = "重新生成 common/domain/calendar_snapshot.json（升级 exchange_calendars 或快照临近过期时执行）"
+
+    def handle(self, *args, **options):
+        for market, (first, last) in write_snapshot().items():
+            self.stdout.write(f"{market.value}: {first} ~ {last}")
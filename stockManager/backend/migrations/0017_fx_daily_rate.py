@@ -0,0 +1,28 @@
+# Generated by Django 6.0.3 on 2026-10-18 04:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0016_portfolio_nav_and_daily_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FxDailyRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pair', models.CharField(choices=[('HKDCNY', '港币/人民币')], max_length=16, verbose_name='货币对')),
+                ('date', models.DateField(verbose_name='日期')),
+                ('rate', models.FloatField(verbose_name='汇率')),
+            ],
+            options={
+                'verbose_name': '日频汇率',
+                'verbose_name_plural': '日频汇率',
+                'ordering': ['pair', 'date'],
+                'constraints': [models.UniqueConstraint(fields=('pair', 'date'), name='uniq_fx_daily_rate_pair_date')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.3 on 2026-10-18 04:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0017_fx_daily_rate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockPriceCoverage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=200, verbose_name='股票代码')),
+                ('start', models.DateField(verbose_name='起始日期')),
+                ('end', models.DateField(verbose_name='结束日期')),
+            ],
+            options={
+                'verbose_name': '日频收盘价覆盖区间',
+                'verbose_name_plural': '日频收盘价覆盖区间',
+                'ordering': ['code', 'start'],
+                'indexes': [models.Index(fields=['code', 'start'], name='backend_sto_code_9a75d0_idx')],
+            },
+        ),
+    ]
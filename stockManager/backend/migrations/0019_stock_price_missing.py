@@ -0,0 +1,30 @@
+# Generated by Django 6.0.3 on 2026-10-18 04:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0018_stock_price_coverage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockPriceMissing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=200, verbose_name='股票代码')),
+                ('start', models.DateField(verbose_name='起始日期')),
+                ('end', models.DateField(verbose_name='结束日期')),
+                ('expires_at', models.DateTimeField(verbose_name='到期时间')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='记录时间')),
+            ],
+            options={
+                'verbose_name': '日频收盘价已知缺失',
+                'verbose_name_plural': '日频收盘价已知缺失',
+                'ordering': ['code', 'start'],
+                'indexes': [models.Index(fields=['code', 'expires_at'], name='backend_sto_code_2bfc51_idx')],
+            },
+        ),
+    ]
@@ -223,6 +223,68 @@ class StockDailyPrice(models.Model):
         return f"{self.code} {self.date} {self.close}"
 
 
+class StockPriceCoverage(models.Model):
+    """日频收盘价已核验区间：区间内每个交易日要么已有收盘价，要么确认上游无数据（如停牌）"""
+
+    code = models.CharField(max_length=200, verbose_name="股票代码")
+    start = models.DateField(verbose_name="起始日期")
+    end = models.DateField(verbose_name="结束日期")
+
+    class Meta:
+        verbose_name = "日频收盘价覆盖区间"
+        verbose_name_plural = "日频收盘价覆盖区间"
+        indexes = [
+            models.Index(fields=['code', 'start']),
+        ]
+        ordering = ['code', 'start']
+
+    def __str__(self) -> str:
+        return f"{self.code} {self.start}~{self.end}"
+
+
+class StockPriceMissing(models.Model):
+    """日频收盘价已知缺失区间（多轮补拉仍无数据，如退市、未发布），到期前净值刷新跳过、不再回源"""
+
+    code = models.CharField(max_length=200, verbose_name="股票代码")
+    start = models.DateField(verbose_name="起始日期")
+    end = models.DateField(verbose_name="结束日期")
+    expires_at = models.DateTimeField(verbose_name="到期时间")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="记录时间")
+
+    class Meta:
+        verbose_name = "日频收盘价已知缺失"
+        verbose_name_plural = "日频收盘价已知缺失"
+        indexes = [
+            models.Index(fields=['code', 'expires_at']),
+        ]
+        ordering = ['code', 'start']
+
+    def __str__(self) -> str:
+        return f"{self.code} {self.start}~{self.end}"
+
+
+class FxDailyRate(models.Model):
+    """日频汇率收盘价（全局共享，供净值回放逐日折算）"""
+
+    class Pair(models.TextChoices):
+        HKD_CNY = 'HKDCNY', '港币/人民币'
+
+    pair = models.CharField(max_length=16, choices=Pair.choices, verbose_name="货币对")
+    date = models.DateField(verbose_name="日期")
+    rate = models.FloatField(verbose_name="汇率")
+
+    class Meta:
+        verbose_name = "日频汇率"
+        verbose_name_plural = "日频汇率"
+        constraints = [
+            models.UniqueConstraint(fields=['pair', 'date'], name='uniq_fx_daily_rate_pair_date'),
+        ]
+        ordering = ['pair', 'date']
+
+    def __str__(self) -> str:
+        return f"{self.pair} {self.date} {self.rate}"
+
+
 class PortfolioNavDaily(models.Model):
     """用户组合日净值（库内不含 incomeCash）"""
 
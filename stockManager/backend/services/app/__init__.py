@@ -2,6 +2,7 @@
 from backend.services.app.dividend import Dividend
 from backend.services.app.integrate import Integrate
 from backend.services.app.nav import NavAnalysis
+from backend.services.app.quote_collector import QuoteCollector
 from backend.services.app.watchlist import Watchlist
 
-__all__ = ['Dividend', 'Integrate', 'NavAnalysis', 'Watchlist']
+__all__ = ['Dividend', 'Integrate', 'NavAnalysis', 'QuoteCollector', 'Watchlist']
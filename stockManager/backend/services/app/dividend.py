@@ -7,7 +7,8 @@ from django.contrib.auth.models import User
 
 from backend.common import logger
 from backend.common.constants import OperationType
-from backend.common.types import OperationDict, DividendUpdateData
+from backend.common.domain.operation_record import OperationRecord
+from backend.common.types import DividendUpdateData, OperationDict
 from backend.common.utils import operation_sort_key
 from backend.datasource import baostock_session, fetch_dividends
 from backend.models import Operation, StockMeta
@@ -32,7 +33,8 @@ class Dividend:
         updated_codes: list[DividendUpdateData] = []
         stock_meta_dict = CacheRepository.get_stock_meta_dict()
 
-        with baostock_session():
+        # 逐条创建 DV 触发的用户缓存失效合并为一次
+        with baostock_session(), CacheRepository.batch_invalidation():
             for code in cn_holding:
                 operations = operation_list[code]
                 if updated_code := cls._generate_dividend_single(user, code, operations):
@@ -47,8 +49,8 @@ class Dividend:
     @classmethod
     def _first_query_year(
         cls,
-        operations: list[Operation],
-        exist_dv_operations: list[Operation],
+        operations: list[OperationRecord],
+        exist_dv_operations: list[OperationRecord],
     ) -> int:
         first_year = min(op.date.year for op in operations)
         if exist_dv_operations:
@@ -57,7 +59,7 @@ class Dividend:
         return first_year
 
     @classmethod
-    def _generate_dividend_single(cls, user: User, code: str, operations: list[Operation]) -> str:
+    def _generate_dividend_single(cls, user: User, code: str, operations: list[OperationRecord]) -> str:
         """生成个股除权除息信息"""
         if not operations:
             return ""
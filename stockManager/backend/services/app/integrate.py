@@ -10,6 +10,7 @@ from backend.common.types import (
     NavAnalysisResult,
     OperationData,
     OperationDataDict,
+    OperationDict,
     WatchResultItem,
 )
 from backend.models import Info
@@ -17,7 +18,7 @@ from backend.services.app.dividend import Dividend
 from backend.services.app.nav import NavAnalysis
 from backend.services.app.watchlist import Watchlist
 from backend.services.cache import CacheRepository
-from backend.services.calculation import Calculator
+from backend.services.calculation import Calculator, StockLedger
 
 
 class Integrate:
@@ -29,9 +30,35 @@ class Integrate:
             for code, ops in operation_list.items()
         }
 
+    @classmethod
+    def _stock_ledgers(
+        cls,
+        user: User,
+        operation_list: OperationDict,
+        operations_version: str,
+        hkd_cny_rate: float,
+    ) -> dict[str, StockLedger]:
+        """复用缓存的单股账本，仅对缺失股票回放操作并回写。"""
+        ledgers = {
+            code: StockLedger.from_dict(data)
+            for code, data in CacheRepository.get_stock_ledgers(
+                user.pk, operations_version, hkd_cny_rate
+            ).items()
+            if code in operation_list
+        }
+        if missing := {code: ops for code, ops in operation_list.items() if code not in ledgers}:
+            ledgers.update(Calculator.calculate_ledgers(missing, hkd_cny_rate))
+            CacheRepository.set_stock_ledgers(
+                user.pk,
+                operations_version,
+                {code: ledger.to_dict() for code, ledger in ledgers.items()},
+                hkd_cny_rate,
+            )
+        return ledgers
+
     @classmethod
     def get_calculated_result(cls, user: User) -> CalculatedResult:
-        operation_list = CacheRepository.get_user_operations(user)
+        operation_list, operations_version = CacheRepository.get_versioned_user_operations(user)
         user_codes = list(operation_list.keys())
 
         if (cached := CacheRepository.get_calculated_target(user, user_codes)) is not None:
@@ -43,12 +70,14 @@ class Integrate:
             inputs.prices,
             inputs.stock_meta,
             inputs.hkd_cny_rate,
+            cls._stock_ledgers(user, operation_list, operations_version, inputs.hkd_cny_rate),
         )
         overall = Calculator.calculate_overall(
             stock_list,
             inputs.income_cash,
             inputs.cash_flow_list,
             inputs.hkd_cny_rate,
+            inputs.hkd_cny_rate_fetched_at,
         )
 
         result: CalculatedResult = {
@@ -1,11 +1,12 @@
 """组合净值用例：刷新回放写库与展示指标组装"""
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 
 from django.contrib.auth.models import User
 from django.db import transaction
 
 from backend.common import logger
 from backend.common.domain.calendar import TradingCalendar
+from backend.common.domain.market import is_hk_code
 from backend.common.types import NavAnalysisResult
 from backend.common.utils import sum_origin_cash
 from backend.models import PortfolioNavDaily
@@ -20,10 +21,26 @@ from backend.services.calculation.nav import (
     resolve_start_date,
 )
 
+# 全量回放交易日 × 持仓股票较多，默认走向量化引擎
+_NAV_ENGINE = 'numpy'
+
+# 无港股时汇率不参与折算，仅占位
+_DEFAULT_HKD_CNY_RATE = 0.86
+
 
 class NavAnalysis:
     """净值分析：日净值刷新 + 展示序列/区间指标。"""
 
+    @classmethod
+    def _hkd_cny_rates(cls, codes: list[str], sessions: list[date]) -> list[float]:
+        """逐交易日历史汇率；库内与新浪日 K 均无数据时回退即期汇率。"""
+        if not any(is_hk_code(code) for code in codes):
+            return [_DEFAULT_HKD_CNY_RATE] * len(sessions)
+        if rates := CacheRepository.get_hkd_cny_rates_for_sessions(sessions):
+            return rates
+        logger.warning("[nav] 无日频汇率，按即期汇率折算全部交易日")
+        return [CacheRepository.get_hkd_cny_rate(codes)] * len(sessions)
+
     @classmethod
     def build(cls, user: User) -> NavAnalysisResult:
         """从库内日净值 + 现金信息组装 API / 缓存 payload。"""
@@ -99,24 +116,34 @@ class NavAnalysis:
             end,
             seed_date=event_cutoff,
         )
-        prices = (
+        prices, unresolved = (
             CacheRepository.ensure_daily_prices_for_windows(price_windows)
             if price_windows
-            else {}
+            else ({}, {})
         )
-        hkd_cny_rate = CacheRepository.get_hkd_cny_rate(codes) if codes else 0.86
-
+        if unresolved:
+            # 未决缺口只来自请求出错 / 熔断跳过（停牌、退市等上游空应答记为已知缺失，照常按前值沿用）：
+            # 这些股票会被按 0 估值，只落库首个未决缺口之前的交易日，下次增量刷新从断点续算
+            first_gap = min(start for gaps in unresolved.values() for start, _ in gaps)
+            sessions = [d for d in sessions if d < first_gap]
+            logger.warning(
+                f"[nav] 用户 {user.pk} 日 K 未补齐 {sorted(unresolved)}，"
+                f"净值截至 {sessions[-1] if sessions else '无'}（首个未决缺口 {first_gap}）"
+            )
+            if not sessions:
+                return 0
         rows = compute_nav_rows(
             operation_list=operation_list,
             cash_flow_list=cash_flow_list,
             sessions=sessions,
             prices=prices,
-            hkd_cny_rate=hkd_cny_rate,
+            hkd_cny_rates=cls._hkd_cny_rates(codes, sessions),
             event_cutoff=event_cutoff,
             start_nav=start_nav,
             start_units=start_units,
             start_cash=start_cash,
             start_holdings=start_holdings,
+            engine=_NAV_ENGINE,
         )
 
         objs = [
@@ -0,0 +1,52 @@
+"""行情后台采集：交易时段按固定节奏为全部持仓/关注代码回源写价"""
+from datetime import datetime
+
+from django.db.models import Q
+
+from backend.common import logger
+from backend.common.domain.calendar import TradingCalendar
+from backend.common.domain.market import Market, split_codes_by_market
+from backend.models import StockMeta
+from backend.services.cache import CacheRepository
+
+# 心跳寿命 = 采集间隔 × 倍数；采集进程退出或卡住后请求路径自动恢复按需回源
+_HEARTBEAT_INTERVALS = 3
+
+
+class QuoteCollector:
+    """采集调度：判定开市市场、汇总代码、逐市场回源。"""
+
+    @classmethod
+    def referenced_codes(cls) -> list[str]:
+        """任一用户操作记录或关注列表引用过的代码。"""
+        return list(
+            StockMeta.objects
+            .filter(Q(operations__isnull=False) | Q(watch_items__isnull=False))
+            .values_list("code", flat=True)
+            .distinct()
+        )
+
+    @classmethod
+    def open_markets(cls, now: datetime) -> list[Market]:
+        return [m for m in Market if TradingCalendar.is_in_trading_hours_at(now, m)]
+
+    @classmethod
+    def next_wake_at(cls, now: datetime) -> datetime:
+        """全部市场休市时，最早一个市场的下一开盘时刻（覆盖午休、收盘与节假日）。"""
+        return min(TradingCalendar.next_open_at(now, m) for m in Market)
+
+    @classmethod
+    def collect(cls, markets: list[Market], interval: int) -> dict[Market, int]:
+        """采集一轮，返回各市场拿到新价的代码数。"""
+        cn_codes, hk_codes = split_codes_by_market(cls.referenced_codes())
+        codes_by_market = {Market.CN: cn_codes, Market.HK: hk_codes}
+        collected: dict[Market, int] = {}
+        for market in markets:
+            if not (codes := codes_by_market[market]):
+                continue
+            collected[market] = CacheRepository.collect_market_prices(
+                market, codes, heartbeat_ttl=interval * _HEARTBEAT_INTERVALS,
+            )
+            if collected[market] < len(codes):
+                logger.warning(f"[collector] {market.value} 仅取到 {collected[market]}/{len(codes)} 只")
+        return collected
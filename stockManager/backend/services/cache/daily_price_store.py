@@ -1,23 +1,31 @@
-"""日频收盘价持久化与缺口补拉（按持仓窗口 + 交易日差集 + 并发）"""
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from datetime import date
+"""日频收盘价持久化与缺口补拉（按持仓窗口 + 已核验覆盖区间差集，缺口经 datasource 批量并发拉取）
 
-from django.db import close_old_connections, transaction
+StockPriceCoverage 记录每代码已核验区间（有价，或确认上游无数据如停牌），缺口 = 窗口 − 覆盖区间，
+只做区间运算；尚无覆盖记录的代码首次按已有收盘价逐交易日扫描一次登记。
+上游已应答（含空应答）仍缺的区间记入 StockPriceMissing（负缓存），到期前的刷新同样跳过。
+"""
+from datetime import date, datetime, timedelta
+
+from django.db import transaction
+from django.utils import timezone
 
 from backend.common import logger
+from backend.common.domain.calendar import TZ_SHANGHAI, TradingCalendar
 from backend.common.domain.market import Market, code_to_market
-from backend.common.domain.calendar import TradingCalendar
 from backend.common.types import (
     DailyCloseByCode,
     DailyCloseSeries,
     DateRangeList,
     HoldingWindows,
 )
-from backend.models import StockDailyPrice
-from backend.datasource.historicalDaily import fetch_daily_closes
+from backend.datasource import fetch_many_daily_closes
+from backend.models import StockDailyPrice, StockPriceCoverage, StockPriceMissing
 
-_MAX_WORKERS = 6
 _GAP_FILL_ROUNDS = 2
+# 已知缺失到期时间：近 _MISSING_RECENT_DAYS 天内的缺口可能只是尚未发布，短期后重试；更早的（退市、长期停牌）隔数日再试
+_MISSING_RECENT_DAYS = 7
+_MISSING_RECENT_TTL = timedelta(hours=1)
+_MISSING_TTL = timedelta(days=7)
 
 
 def load_closes(
@@ -82,19 +90,6 @@ def _missing_session_gaps(
     return gaps
 
 
-def _fetch_and_upsert_gaps(code: str, gaps: DateRangeList) -> DailyCloseSeries:
-    fetched_all: DailyCloseSeries = {}
-    for gap_start, gap_end in gaps:
-        if not (fetched := fetch_daily_closes(code, gap_start, gap_end)):
-            logger.warning(f"[daily_price] {code} 缺口 {gap_start}~{gap_end} 为空")
-            continue
-        fetched_all.update(fetched)
-    if fetched_all:
-        close_old_connections()
-        _upsert_prices(code, fetched_all)
-    return fetched_all
-
-
 def _gaps_in_windows(
     existing: DailyCloseSeries,
     windows: DateRangeList,
@@ -106,85 +101,230 @@ def _gaps_in_windows(
     return _merge_windows(gaps)
 
 
-def _ensure_one_code_windows(
-    code: str,
-    windows: DateRangeList,
-) -> DailyCloseSeries:
-    close_old_connections()
-    market = code_to_market(code)
-    if not (merged := _merge_windows([(s, e) for s, e in windows if s <= e])):
-        return {}
-    overall_start = merged[0][0]
-    overall_end = max(e for _, e in merged)
-    existing = load_closes([code], overall_start, overall_end).get(code) or {}
+def _load_coverage(codes: list[str]) -> dict[str, DateRangeList]:
+    coverage: dict[str, DateRangeList] = {code: [] for code in codes}
+    for code, start, end in StockPriceCoverage.objects.filter(code__in=codes).values_list('code', 'start', 'end'):
+        coverage[code].append((start, end))
+    return coverage
 
-    for round_idx in range(_GAP_FILL_ROUNDS):
-        if not (gaps := _gaps_in_windows(existing, merged, market)):
-            break
-        logger.info(
-            f"[daily_price] {code} 第 {round_idx + 1} 轮补拉 {len(gaps)} 个缺口: "
-            + ", ".join(f"{a}~{b}" for a, b in gaps[:8])
-            + (" ..." if len(gaps) > 8 else "")
-        )
-        existing.update(_fetch_and_upsert_gaps(code, gaps))
-    else:
-        remain = _gaps_in_windows(existing, merged, market)
-        if remain:
-            miss_days = sum(
-                len(TradingCalendar.sessions_between(a, b, market))
-                for a, b in remain
-            )
-            logger.warning(
-                f"[daily_price] {code} 仍缺约 {miss_days} 个交易日 "
-                f"({remain[0][0]}~{remain[-1][1]})"
-            )
 
-    return existing
+def _load_missing(codes: list[str]) -> dict[str, DateRangeList]:
+    """未到期的已知缺失区间（已排序合并）。"""
+    missing: dict[str, DateRangeList] = {code: [] for code in codes}
+    for code, start, end in StockPriceMissing.objects.filter(
+        code__in=codes,
+        expires_at__gt=timezone.now(),
+    ).values_list('code', 'start', 'end'):
+        missing[code].append((start, end))
+    return {code: _merge_windows(ranges) for code, ranges in missing.items()}
 
 
-def ensure_daily_prices_for_windows(windows: HoldingWindows) -> DailyCloseByCode:
-    """按持仓窗口确保日 K：只补交易日缺口，多股票并发拉取。"""
-    if not (
-        cleaned := {
-            code: filtered
-            for code, wins in windows.items()
-            if wins and (filtered := [(s, e) for s, e in wins if s <= e])
-        }
-    ):
-        return {}
-
-    result: DailyCloseByCode = {}
-    codes = list(cleaned.keys())
-    workers = min(_MAX_WORKERS, len(codes))
-
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        futures = {
-            executor.submit(_ensure_one_code_windows, code, wins): code
-            for code, wins in cleaned.items()
-        }
-        for future in as_completed(futures):
-            code = futures[future]
-            try:
-                result[code] = future.result()
-            except Exception as e:
-                logger.error(f"[daily_price] {code} 补拉失败: {e}", exc_info=True)
-                result[code] = {}
-
-    close_old_connections()
+def _mark_missing(code: str, gaps: DateRangeList) -> None:
+    """上游已应答仍缺的区间记为已知缺失（跨近期边界的缺口拆成两段分别定到期），顺带清理该代码已过期记录。"""
+    now = timezone.now()
+    recent_from = datetime.now(TZ_SHANGHAI).date() - timedelta(days=_MISSING_RECENT_DAYS)
+    pieces: list[tuple[date, date, datetime]] = []
+    for start, end in gaps:
+        if start < recent_from:
+            pieces.append((start, min(end, recent_from - timedelta(days=1)), now + _MISSING_TTL))
+        if end >= recent_from:
+            pieces.append((max(start, recent_from), end, now + _MISSING_RECENT_TTL))
+    with transaction.atomic():
+        StockPriceMissing.objects.filter(code=code, expires_at__lte=now).delete()
+        StockPriceMissing.objects.bulk_create([
+            StockPriceMissing(code=code, start=start, end=end, expires_at=expires_at)
+            for start, end, expires_at in pieces
+        ])
+    logger.info(f"[daily_price] {code} {len(pieces)} 段缺口记为已知缺失，到期前跳过")
+
+
+def _merge_covered(ranges: DateRangeList, market: Market) -> DateRangeList:
+    """合并覆盖区间：重叠或之间没有交易日（周末、假期）的相邻两段并为一段。"""
+    merged: DateRangeList = []
+    for start, end in sorted(ranges):
+        if merged and (
+            start <= merged[-1][1]
+            or TradingCalendar.session_bounds(merged[-1][1] + timedelta(days=1), start - timedelta(days=1), market)
+            is None
+        ):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _subtract_ranges(windows: DateRangeList, covered: DateRangeList) -> DateRangeList:
+    """区间差集 windows − covered（两者均已排序且互不重叠）。"""
+    result: DateRangeList = []
+    i = 0
+    for start, end in windows:
+        while i < len(covered) and covered[i][1] < start:
+            i += 1
+        cursor = start
+        j = i
+        while j < len(covered) and covered[j][0] <= end:
+            covered_start, covered_end = covered[j]
+            if covered_start > cursor:
+                result.append((cursor, covered_start - timedelta(days=1)))
+            cursor = max(cursor, covered_end + timedelta(days=1))
+            j += 1
+        if cursor <= end:
+            result.append((cursor, end))
     return result
 
 
-def _upsert_prices(code: str, closes: DailyCloseSeries) -> None:
+def _uncovered_gaps(covered: DateRangeList, windows: DateRangeList, market: Market) -> DateRangeList:
+    """窗口减去已核验区间，再收缩到首末交易日（不含交易日的段丢弃）。"""
+    return [
+        bounds
+        for start, end in _subtract_ranges(windows, covered)
+        if (bounds := TradingCalendar.session_bounds(start, end, market))
+    ]
+
+
+def _bootstrap_coverage(
+    code: str,
+    existing: DailyCloseSeries,
+    windows: DateRangeList,
+    market: Market,
+) -> DateRangeList:
+    """尚无覆盖记录时按已有收盘价逐交易日扫描一次，把窗口内有价部分登记为已核验。"""
+    if not (covered := [
+        (start, end)
+        for start, end in _subtract_ranges(windows, _gaps_in_windows(existing, windows, market))
+        if TradingCalendar.session_bounds(start, end, market)
+    ]):
+        return []
+    return _upsert_prices(code, {}, covered)
+
+
+def _verified_ranges(gaps: DateRangeList, closes: DailyCloseSeries) -> DateRangeList:
+    """缺口中被本次返回数据夹住的部分：前后均有返回的收盘价，其间缺价交易日即确认上游无数据（停牌）。
+
+    只看本次响应、不看库内已有价；首根返回行之前（未上市）与末根之后（未发布、退市）的部分不登记，留待后续刷新重试。
+    """
     if not closes:
-        return
+        return []
+    first, last = min(closes), max(closes)
+    return [(max(start, first), min(end, last)) for start, end in gaps if start <= last and end >= first]
+
+
+def _fetch_and_upsert_gaps(
+    gaps_by_code: dict[str, DateRangeList],
+    coverage: dict[str, DateRangeList],
+) -> DailyCloseByCode:
+    """全部代码的缺口一并交给 datasource 批量并发拉取，再逐代码写库并扩展覆盖区间（DB 读写留在调用线程）。
+
+    请求失败或上游熔断跳过的代码不在 fetched 中，本轮不写库也不登记覆盖；
+    fetched 另含缺口两侧紧邻的返回行，只用来判定缺口是否被返回数据夹住。
+    """
+    fetched = fetch_many_daily_closes(
+        [(code, gap_start, gap_end) for code, gaps in gaps_by_code.items() for gap_start, gap_end in gaps]
+    )
+    for code, gaps in gaps_by_code.items():
+        if (closes := fetched.get(code)) is None:
+            continue
+        for gap_start, gap_end in gaps:
+            if not any(gap_start <= d <= gap_end for d in closes):
+                logger.warning(f"[daily_price] {code} 缺口 {gap_start}~{gap_end} 为空")
+        try:
+            coverage[code] = _upsert_prices(code, closes, _verified_ranges(gaps, closes))
+        except Exception as e:
+            logger.error(f"[daily_price] {code} 写库失败: {e}", exc_info=True)
+            del fetched[code]
+    return fetched
+
+
+def _log_gaps(code: str, gaps: DateRangeList, round_idx: int) -> None:
+    logger.info(
+        f"[daily_price] {code} 第 {round_idx + 1} 轮补拉 {len(gaps)} 个缺口: "
+        + ", ".join(f"{a}~{b}" for a, b in gaps[:8])
+        + (" ..." if len(gaps) > 8 else "")
+    )
+
+
+def _log_remaining_gaps(code: str, remain: DateRangeList, market: Market) -> None:
+    miss_days = sum(
+        len(TradingCalendar.sessions_between(a, b, market))
+        for a, b in remain
+    )
+    logger.warning(
+        f"[daily_price] {code} 仍缺约 {miss_days} 个交易日 "
+        f"({remain[0][0]}~{remain[-1][1]})"
+    )
+
+
+def ensure_daily_prices_for_windows(
+    windows: HoldingWindows,
+) -> tuple[DailyCloseByCode, dict[str, DateRangeList]]:
+    """按持仓窗口确保日 K：只补未核验且非已知缺失的交易日缺口，每轮全部代码的缺口一次批量并发拉取。
+
+    上游已应答（含空应答：停牌至今、退市）但仍缺的区间当轮即记为已知缺失，不再重拉；
+    只有请求出错 / 熔断跳过的代码进入下一轮，末轮仍失败的区间作为未决缺口随收盘价一并返回，
+    调用方不应把这些交易日当作已知价格落库。
+    """
+    merged_by_code: dict[str, DateRangeList] = {
+        code: merged
+        for code, wins in windows.items()
+        if wins and (merged := _merge_windows([(s, e) for s, e in wins if s <= e]))
+    }
+    if not merged_by_code:
+        return {}, {}
+
+    markets = {code: code_to_market(code) for code in merged_by_code}
+    result: DailyCloseByCode = {
+        code: load_closes([code], merged[0][0], max(e for _, e in merged)).get(code) or {}
+        for code, merged in merged_by_code.items()
+    }
+    coverage = _load_coverage(list(merged_by_code))
+    missing = _load_missing(list(merged_by_code))
+    for code, merged in merged_by_code.items():
+        if not coverage[code]:
+            coverage[code] = _bootstrap_coverage(code, result[code], merged, markets[code])
+
+    def pending_gaps(code: str) -> DateRangeList:
+        return _uncovered_gaps(_merge_windows(coverage[code] + missing[code]), merged_by_code[code], markets[code])
+
+    pending_codes = list(merged_by_code)
+    for round_idx in range(_GAP_FILL_ROUNDS):
+        if not (gaps_by_code := {code: gaps for code in pending_codes if (gaps := pending_gaps(code))}):
+            break
+        for code, gaps in gaps_by_code.items():
+            _log_gaps(code, gaps, round_idx)
+        fetched = _fetch_and_upsert_gaps(gaps_by_code, coverage)
+        for code, closes in fetched.items():
+            result[code].update(closes)
+            if remain := pending_gaps(code):
+                _log_remaining_gaps(code, remain, markets[code])
+                _mark_missing(code, remain)
+                missing[code] = _merge_windows(missing[code] + remain)
+        pending_codes = [code for code in gaps_by_code if code not in fetched]
+
+    unresolved = {code: remain for code in pending_codes if (remain := pending_gaps(code))}
+    for code, remain in unresolved.items():
+        _log_remaining_gaps(code, remain, markets[code])
+    return result, unresolved
+
+
+def _upsert_prices(code: str, closes: DailyCloseSeries, verified: DateRangeList) -> DateRangeList:
+    """写入收盘价并把 verified 并入该代码覆盖区间（同一事务），返回合并后的覆盖区间。"""
     objs = [
         StockDailyPrice(code=code, date=d, close=px)
         for d, px in closes.items()
     ]
     with transaction.atomic():
-        StockDailyPrice.objects.bulk_create(
-            objs,
-            update_conflicts=True,
-            unique_fields=['code', 'date'],
-            update_fields=['close'],
+        if objs:
+            StockDailyPrice.objects.bulk_create(
+                objs,
+                update_conflicts=True,
+                unique_fields=['code', 'date'],
+                update_fields=['close'],
+            )
+        existing = list(StockPriceCoverage.objects.filter(code=code).values_list('start', 'end'))
+        if not verified or (merged := _merge_covered(existing + verified, code_to_market(code))) == existing:
+            return existing
+        StockPriceCoverage.objects.filter(code=code).delete()
+        StockPriceCoverage.objects.bulk_create(
+            [StockPriceCoverage(code=code, start=start, end=end) for start, end in merged]
         )
+    return merged
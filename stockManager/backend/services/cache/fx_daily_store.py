@@ -0,0 +1,101 @@
+"""HKD/CNY 日频汇率持久化、缺口补拉与进程内序列（净值回放逐交易日折算）"""
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date
+
+from django.core.cache import cache
+from django.db import transaction
+
+from backend.common import logger
+from backend.datasource.exchangeRate import fetch_hkd_cny_daily
+from backend.models import FxDailyRate
+from backend.services.cache import keys
+
+
+@dataclass(frozen=True)
+class _RateSeries:
+    """按日期升序的汇率序列：days 为 date.toordinal()，rates 与之对齐。"""
+
+    days: list[int]
+    rates: list[float]
+    known: frozenset[int]
+
+
+_series: _RateSeries | None = None
+# 补拉后仍无报价的交易日（ordinal → 到期 monotonic 时刻）：与回源节流同周期，到期前不重读库、不回源
+_known_missing: dict[int, float] = {}
+_series_lock = threading.Lock()
+
+
+def _load_series() -> _RateSeries:
+    rows = (
+        FxDailyRate.objects.filter(pair=FxDailyRate.Pair.HKD_CNY)
+        .order_by('date')
+        .values_list('date', 'rate')
+    )
+    days = [d.toordinal() for d, _ in rows]
+    return _RateSeries(days=days, rates=[float(rate) for _, rate in rows], known=frozenset(days))
+
+
+def _missing(series: _RateSeries, sessions: list[date]) -> list[date]:
+    return [d for d in sessions if d.toordinal() not in series.known]
+
+
+def _upsert_rates(rates: dict[date, float]) -> None:
+    objs = [FxDailyRate(pair=FxDailyRate.Pair.HKD_CNY, date=d, rate=rate) for d, rate in rates.items()]
+    with transaction.atomic():
+        FxDailyRate.objects.bulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=['pair', 'date'],
+            update_fields=['rate'],
+        )
+
+
+def _fill_gaps(missing: list[date]) -> bool:
+    """新浪日 K 一次返回全部历史，整段 upsert；跨进程节流，当日未出数时不会每次刷新都回源。
+
+    返回库内是否可能已有新数据：本进程补拉成功，或节流期内其他进程刚补拉过。
+    """
+    if not cache.add(keys.KEY_FX_DAILY_FETCH_MARK, True, keys.TTL_FX_DAILY_FETCH):
+        return True
+    try:
+        fetched = fetch_hkd_cny_daily()
+    except Exception as e:
+        logger.warning(f"[fx_daily] 日 K 拉取失败，缺 {len(missing)} 日按前值沿用: {e}")
+        return False
+    _upsert_rates(fetched)
+    logger.info(f"[fx_daily] 补拉 {len(fetched)} 日（缺口 {missing[0]}~{missing[-1]}）")
+    return True
+
+
+def _series_covering(sessions: list[date]) -> _RateSeries:
+    """只在出现未登记缺失的交易日时回源，且仅在补拉（本进程或其他进程）后重读整表。"""
+    global _series
+    with _series_lock:
+        if _series is None:
+            _series = _load_series()
+        now = time.monotonic()
+        if missing := [d for d in _missing(_series, sessions) if _known_missing.get(d.toordinal(), 0.0) <= now]:
+            if _fill_gaps(missing):
+                _series = _load_series()
+            expires_at = now + keys.TTL_FX_DAILY_FETCH
+            _known_missing.update((d.toordinal(), expires_at) for d in _missing(_series, missing))
+        return _series
+
+
+def hkd_cny_rates_for_sessions(sessions: list[date]) -> list[float]:
+    """逐交易日 HKD/CNY 汇率：当日无报价沿用此前最近一日，早于首个报价沿用首个报价；库内无数据返回空列表。"""
+    if not sessions:
+        return []
+    if not (series := _series_covering(sessions)).days:
+        return []
+    result: list[float] = []
+    for d in sessions:
+        i = bisect_right(series.days, d.toordinal()) - 1
+        result.append(series.rates[max(i, 0)])
+    if missing := _missing(series, sessions):
+        logger.info(f"[fx_daily] {len(missing)} 个交易日无汇率报价，按前值沿用（首个 {missing[0]}）")
+    return result
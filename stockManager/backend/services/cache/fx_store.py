@@ -1,19 +1,87 @@
-"""港币汇率缓存与刷新策略"""
+"""港币汇率缓存与刷新策略（盘中短新鲜期 + 过期后台刷新 + 上次成功值兜底）"""
+import math
 from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
 from django.core.cache import cache
 
+from backend.common import logger
+from backend.common.domain.calendar import TZ_SHANGHAI
 from backend.common.domain.market import markets_in_codes
+from backend.common.types import FxRateData
 from backend.datasource.exchangeRate import fetch_hkd_cny_rate
 from backend.services.cache import keys
 from backend.services.cache import refresh_policy
 
+# 后台刷新由 fx 刷新锁保证全局至多一个在途，本进程单线程足够
+_REFRESH_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fx-refresh")
 
-def get_hkd_cny_rate(user_codes: Iterable[str]) -> float:
-    if not refresh_policy.any_market_in_trading_hours(markets_in_codes(user_codes)):
-        if (cached := cache.get(keys.KEY_FX_HKD_CNY)) is not None:
-            return float(cached)
 
-    rate = fetch_hkd_cny_rate()
-    cache.set(keys.KEY_FX_HKD_CNY, rate, keys.TTL_FX)
-    return rate
+def _read_cached() -> FxRateData | None:
+    """缓存值可能是 FxRateData、旧格式裸 float 或无法识别的值，逐一收窄；无法识别按未命中处理。"""
+    cached: object = cache.get(keys.KEY_FX_HKD_CNY)
+    if isinstance(cached, dict) and isinstance(rate := cached.get("rate"), (int, float)):
+        fetched_at = cached.get("fetchedAt")
+        return {"rate": float(rate), "fetchedAt": fetched_at if isinstance(fetched_at, str) else None}
+    # 旧缓存仅存 float，无 fetchedAt，视为已过期
+    if isinstance(cached, (int, float)):
+        return {"rate": float(cached), "fetchedAt": None}
+    return None
+
+
+def _age_seconds(data: FxRateData) -> float:
+    if not (ts := data["fetchedAt"]):
+        return math.inf
+    return (datetime.now(TZ_SHANGHAI) - datetime.fromisoformat(ts)).total_seconds()
+
+
+def _fetch_and_store() -> FxRateData:
+    data: FxRateData = {"rate": fetch_hkd_cny_rate(), "fetchedAt": datetime.now(TZ_SHANGHAI).isoformat()}
+    # 条目保留 TTL_FX_LAST_GOOD，新浪故障时作为上次成功值兜底；新鲜度只看 fetchedAt
+    cache.set(keys.KEY_FX_HKD_CNY, data, keys.TTL_FX_LAST_GOOD)
+    return data
+
+
+def _background_refresh() -> None:
+    try:
+        data = _fetch_and_store()
+    except Exception as e:
+        # 失败不释放锁：锁过期前不再重试，避免新浪故障时每个请求都触发回源
+        logger.warning(f"[fx] 后台刷新失败，继续使用缓存汇率: {e}")
+        return
+    cache.delete(keys.KEY_FX_REFRESH_LOCK)
+    logger.info(f"[fx] 后台刷新 HKD/CNY={data['rate']}")
+
+
+def _schedule_refresh() -> None:
+    if cache.add(keys.KEY_FX_REFRESH_LOCK, True, keys.TTL_FX_REFRESH_LOCK):
+        _REFRESH_EXECUTOR.submit(_background_refresh)
+
+
+def get_hkd_cny_quote(user_codes: Iterable[str]) -> FxRateData:
+    """新鲜期内直接返回缓存；过期但未超 TTL_FX 时返回缓存并后台刷新；否则同步回源，失败沿用上次成功值。
+
+    新鲜期：持仓涉及任市场当前在交易时段为 TTL_FX_INTRADAY，否则 TTL_FX。
+    """
+    cached = _read_cached()
+    if cached is not None:
+        intraday = refresh_policy.any_market_in_trading_hours(markets_in_codes(user_codes))
+        age = _age_seconds(cached)
+        if age < (keys.TTL_FX_INTRADAY if intraday else keys.TTL_FX):
+            return cached
+        if age < keys.TTL_FX:
+            _schedule_refresh()
+            return cached
+
+    try:
+        return _fetch_and_store()
+    except Exception as e:
+        if cached is None:
+            raise
+        logger.warning(f"[fx] 汇率获取失败，沿用 {cached['fetchedAt']} 的汇率 {cached['rate']}: {e}")
+        return cached
+
+
+def get_hkd_cny_rate(user_codes: Iterable[str]) -> float:
+    return get_hkd_cny_quote(user_codes)["rate"]
@@ -1,16 +1,13 @@
 """近 6 年历史最高价缓存（全部走腾讯 gtimg 周线：A 股 qfq / 港股 qfq）"""
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
 from django.core.cache import cache
 
 from backend.common.cache import Cache
 from backend.common import logger
-from backend.datasource import fetch_hist_high
+from backend.datasource import fetch_many_hist_highs
 from backend.services.cache import keys
 
 _SENTINEL_NONE = "__none__"
 _HIST_HIGH_TIMEOUT = 5
-_MAX_WORKERS = 8
 
 
 def _cache_hist_high(code: str, value: float | None) -> None:
@@ -38,25 +35,19 @@ def get_cached_hist_highs(codes: list[str]) -> tuple[dict[str, float | None], li
     return result, missing
 
 
-def _fetch_single_hist_high(code: str) -> tuple[str, float | None]:
-    try:
-        value = fetch_hist_high(code, timeout=_HIST_HIGH_TIMEOUT)
-    except Exception as e:
-        logger.warning(f"历史高拉取失败 {code}: {e}")
-        value = None
-    _cache_hist_high(code, value)
-    return code, value
-
-
 def fetch_and_cache_hist_highs(codes: list[str]) -> dict[str, float | None]:
-    """有界并发拉取历史高并写缓存（A 股与港股统一走 gtimg）。"""
+    """批量拉取历史高并写缓存（A 股与港股统一走 gtimg，并发受 http_client host 上限约束）。
+
+    上游熔断跳过的代码返回 None 但不写 _SENTINEL_NONE，下次再拉。
+    """
     if not codes:
         return {}
 
-    result: dict[str, float | None] = {}
-    with ThreadPoolExecutor(max_workers=_MAX_WORKERS) as executor:
-        futures = [executor.submit(_fetch_single_hist_high, code) for code in codes]
-        for future in as_completed(futures):
-            code, value = future.result()
-            result[code] = value
-    return result
+    try:
+        result = fetch_many_hist_highs(codes, timeout=_HIST_HIGH_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"历史高批量拉取失败 {len(codes)} 只: {e}")
+        return dict.fromkeys(codes)
+    for code, value in result.items():
+        _cache_hist_high(code, value)
+    return {code: result.get(code) for code in codes}
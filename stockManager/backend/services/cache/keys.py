@@ -1,27 +1,65 @@
 """缓存逻辑 key 与 TTL 常量"""
 
-KEY_USER_OPERATIONS = "user:{user_id}:operations"
-KEY_USER_CASH_INFO = "user:{user_id}:cash_info"
-KEY_CALCULATED_TARGET = "user:{user_id}:calculated_target"
-KEY_NAV_ANALYSIS = "user:{user_id}:nav_analysis"
+# 用户级 key 嵌入数据版本（user_store.user_key 填充），用户数据变更 INCR 版本即整体失效，旧版本条目靠 TTL 过期
+KEY_USER_OPERATIONS = "user:{user_id}:v{version}:operations"
+KEY_USER_CASH_INFO = "user:{user_id}:v{version}:cash_info"
+KEY_CALCULATED_TARGET = "user:{user_id}:v{version}:calculated_target"
+KEY_NAV_ANALYSIS = "user:{user_id}:v{version}:nav_analysis"
+KEY_USER_WATCHLIST = "user:{user_id}:v{version}:watchlist"
+# 账本按操作内容摘要自校验，不随数据版本换键
+KEY_USER_STOCK_LEDGER = "user:{user_id}:stock_ledger"
+KEY_USER_DATA_VERSION = "user:{user_id}:data_version"
 KEY_STOCK_META_ALL = "stock:meta:all"
 KEY_STOCK_PRICE = "stock:price:{code}"
+KEY_QUOTE_BOARD = "quotes:{market}"
 KEY_STOCK_PRICE_TIMESTAMP = "stock:price:timestamp:{market}"
+KEY_PRICE_REFRESH_LOCK = "lock:price_refresh:{market}"
+KEY_PRICE_REFRESH_PENDING = "stock:price:pending:{market}"
+KEY_PRICE_REFRESH_STATS = "stock:price:refresh_stats:{market}"
+KEY_QUOTE_COLLECTOR_HEARTBEAT = "stock:price:collector:{market}"
 KEY_STOCK_NAME_SYNC_MARK = "stock:name:sync:mark"
 KEY_FX_HKD_CNY = "fx:hkd_cny"
-KEY_USER_WATCHLIST = "user:{user_id}:watchlist"
+KEY_FX_REFRESH_LOCK = "lock:fx_refresh"
+KEY_FX_DAILY_FETCH_MARK = "fx:hkd_cny:daily_fetch"
 KEY_VALUATION = "stock:valuation:{code}"
 KEY_HIST_HIGH = "stock:hist_high:{code}"
 
+# 进程内 L1 namespace（LocalCache），值为解码后的对象
+L1_STOCK_META = "stock_meta"
+L1_USER_CASH_INFO = "cash_info"
+L1_USER_OPERATIONS = "operations"
+L1_USER_WATCHLIST = "watchlist"
+
+# 失效 tag（Cache.set/set_many 写入时登记，Cache.invalidate_tag 精确删除）
+TAG_CALCULATED_TARGET = "calculated_target"
+
 TTL_DAY = 86400
 TTL_USER_DATA = 36000
 TTL_CALCULATED_TARGET = TTL_DAY
+# 账本含 today 口径（持仓天数、当日投入），跨日即按 date 失效
+TTL_STOCK_LEDGER = TTL_DAY
 TTL_NAV_ANALYSIS = TTL_DAY
 TTL_STOCK_META = TTL_DAY
 TTL_STOCK_PRICE = TTL_DAY
+# 刷新锁持有上限，须覆盖一次 fetch_prices；待刷新代码集合同寿命
+TTL_PRICE_REFRESH_LOCK = 15
 TTL_STOCK_NAME_SYNC = TTL_DAY
+# 汇率非交易时段新鲜期，亦为过期后台刷新（stale-while-revalidate）窗口上限
 TTL_FX = TTL_DAY
+# 持仓涉及市场在交易时段时的汇率新鲜期
+TTL_FX_INTRADAY = 300
+# 汇率条目保留期，回源失败时沿用上次成功值
+TTL_FX_LAST_GOOD = 30 * TTL_DAY
+# 后台刷新锁；失败时不主动释放，兼作重试退避
+TTL_FX_REFRESH_LOCK = 60
+# 日频汇率缺口回源节流（全历史一次拉取，缺口多为当日尚未出数）
+TTL_FX_DAILY_FETCH = 3600
 # 基本面慢变；watchlist PE/PB 展示仍用 realtime 现价 / epsTtm(bvps) 现算
 TTL_VALUATION = 7 * TTL_DAY
 # 6 年周线最高；仅创新高或除权时变化
 TTL_HIST_HIGH = 30 * TTL_DAY
+# L1 TTL：失效靠 pub/sub 广播，TTL 只兜底漏收消息或广播失败
+TTL_L1_STOCK_META = 300
+TTL_L1_USER_DATA = 60
+# 解码后的操作按 (用户, 数据版本) 取键，旧版本不可达，TTL 只限制驻留内存时长
+TTL_L1_USER_OPERATIONS = 600
@@ -4,16 +4,25 @@ from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from backend.common import logger
+from backend.common.cache import InvalidationBatcher, LocalCache
 from backend.common.types import RealtimePriceDict
 from backend.models import StockMeta as StockMetaModel
 from backend.services.cache import keys
 
+LocalCache.register(keys.L1_STOCK_META, keys.TTL_L1_STOCK_META)
+
 
 def clear_stock_meta_all() -> None:
     cache.delete(keys.KEY_STOCK_META_ALL)
+    LocalCache.evict(keys.L1_STOCK_META, keys.KEY_STOCK_META_ALL)
 
 
 def get_stock_meta_dict() -> dict[str, StockMetaModel]:
+    """全部元数据（进程内 L1 共享实例，只读）"""
+    return LocalCache.get_or_load(keys.L1_STOCK_META, keys.KEY_STOCK_META_ALL, _load_stock_meta_dict)
+
+
+def _load_stock_meta_dict() -> dict[str, StockMetaModel]:
     if cached := cache.get(keys.KEY_STOCK_META_ALL):
         return {
             code: StockMetaModel(
@@ -82,5 +91,9 @@ def sync_names_from_realtime(prices: RealtimePriceDict) -> int:
 
 @receiver([post_save, post_delete], sender=StockMetaModel)
 def clear_stock_meta_on_model_change(sender, instance, **kwargs) -> None:
+    InvalidationBatcher.defer(_clear_stock_meta_on_change)
+
+
+def _clear_stock_meta_on_change() -> None:
     clear_stock_meta_all()
     logger.info("清除股票元数据 Redis 缓存")
@@ -1,63 +1,50 @@
-"""Operation 缓存序列化/反序列化"""
-import json
-from datetime import datetime
+"""操作记录缓存编码/解码（单层结构，由 cache 序列化器一次编码）"""
+import hashlib
+from dataclasses import fields
+from datetime import date
+from operator import attrgetter
 
-from django.contrib.auth.models import User
-from django.db.models.base import ModelState
+import orjson
 
-from backend.models import Operation
+from backend.common.domain.operation_record import OperationRecord
 from backend.common.types import OperationDict
 
-_OPERATION_FIELDS = (
-    "id",
-    "sortOrder",
-    "operationType",
-    "price",
-    "count",
-    "fee",
-    "comment",
-    "cash",
-    "stock",
-    "reserve",
-)
-
-
-def _serialize_operation(op: Operation) -> dict:
-    data = {field: getattr(op, field) for field in _OPERATION_FIELDS}
-    data["date"] = str(op.date)
-    return data
-
-
-def serialize_operations(operations: OperationDict) -> str:
-    return json.dumps({
-        code: [_serialize_operation(op) for op in op_list]
-        for code, op_list in operations.items()
-    })
-
-
-def operation_from_cache(code: str, op_data: dict, user_id: int) -> Operation:
-    op = Operation.__new__(Operation)
-
-    state = ModelState()
-    state.adding = False
-    state.db = "default"
-
-    op._state = state
-    setattr(op, "user_id", user_id)
-    op.code = code
-    op.date = datetime.strptime(op_data["date"], "%Y-%m-%d").date()
-    for field in _OPERATION_FIELDS:
-        if field == "sortOrder":
-            setattr(op, field, op_data.get(field, 0))
-        else:
-            setattr(op, field, op_data[field])
-    return op
-
-
-def deserialize_operations(data: str, user: User) -> OperationDict:
-    operations_dict = json.loads(data)
-    user_id = int(user.pk)
+# 每笔操作存为 OperationRecord 去掉首列 code 的定长行，省去逐条重复的字段名；字段或顺序变更须递增 _FORMAT
+_FORMAT = 2
+_ROW_FIELDS = tuple(f.name for f in fields(OperationRecord))[1:]
+_DATE_INDEX = _ROW_FIELDS.index("date")
+_row_values = attrgetter(*_ROW_FIELDS)
+
+
+def _operation_row(op: OperationRecord) -> list:
+    row = list(_row_values(op))
+    row[_DATE_INDEX] = op.date.isoformat()
+    return row
+
+
+def encode_operations(operations: OperationDict) -> dict:
+    """返回缓存值；version 为内容摘要：内容不变则版本不变，与写入时机无关。"""
+    rows = {code: [_operation_row(op) for op in op_list] for code, op_list in operations.items()}
     return {
-        code: [operation_from_cache(code, op_data, user_id) for op_data in op_list]
-        for code, op_list in operations_dict.items()
+        "format": _FORMAT,
+        "version": hashlib.blake2b(orjson.dumps(rows), digest_size=8).hexdigest(),
+        "operations": rows,
     }
+
+
+def operation_from_cache(code: str, row: list) -> OperationRecord:
+    row[_DATE_INDEX] = date.fromisoformat(row[_DATE_INDEX])
+    return OperationRecord(code, *row)
+
+
+def decode_operations(data: object) -> tuple[OperationDict, str] | None:
+    """返回 (操作, 版本)；旧格式（JSON 字符串套 JSON、缺 amount）返回 None，由调用方回源重建。"""
+    if not isinstance(data, dict) or data.get("format") != _FORMAT:
+        return None
+    return (
+        {
+            code: [operation_from_cache(code, row) for row in rows]
+            for code, rows in data["operations"].items()
+        },
+        data["version"],
+    )
@@ -1,16 +1,20 @@
-"""股价缓存与刷新策略（分市场 CN / HK）"""
+"""股价缓存与刷新策略（分市场 CN / HK，逐代码判定新鲜度）"""
 from datetime import datetime
+from typing import Any, cast
 
 from django.core.cache import cache
+from redis.exceptions import LockError
 
 from backend.common.cache import Cache
 from backend.common import logger
-from backend.common.domain.market import Market, split_codes_by_market
-from backend.common.domain.calendar import TZ_SHANGHAI
-from backend.common.types import MarketsData, RealtimePriceDict
+from backend.common.domain.market import Market, code_to_market, split_codes_by_market
+from backend.common.domain.calendar import TradingCalendar, TZ_SHANGHAI
+from backend.common.request_scope import request_memoized
+from backend.common.types import MarketStatusData, MarketsData, RealtimePriceData, RealtimePriceDict
 from backend.datasource.realtimePrice import fetch_prices
 from backend.services.cache import keys
 from backend.services.cache import meta_store
+from backend.services.cache import quote_codec
 from backend.services.cache import refresh_policy
 from backend.services.cache import user_store
 
@@ -22,33 +26,36 @@ _PRICE_FIELDS = frozenset({
     "yesterdayClose",
 })
 
-_MARKET_PRICE_PATTERNS: dict[Market, tuple[str, ...]] = {
-    Market.CN: ("stock:price:sh*", "stock:price:sz*", "stock:price:bj*"),
-    Market.HK: ("stock:price:hk*",),
-}
+# 行情缓存布局：keys 为每代码一个 stock:price:{code}（JSON）；
+# board 为每市场一个 quotes:{market} 哈希（quote_codec 紧凑编码，读一次 HMGET、写一次 HSET）
+_PRICE_LAYOUT = 'board'
 
+# 未抢到刷新锁的请求最多等待秒数，超时返回上次缓存价（标记 stale）
+_REFRESH_WAIT_TIMEOUT = 3
 
-def get_markets_metadata() -> MarketsData:
+
+def _market_status(market: Market, fetched_at: list[datetime]) -> MarketStatusData:
     return {
-        "cn": {
-            "inTradingHours": refresh_policy.is_in_trading_hours(Market.CN),
-            "priceUpdatedAt": refresh_policy.get_price_timestamp(Market.CN),
-        },
-        "hk": {
-            "inTradingHours": refresh_policy.is_in_trading_hours(Market.HK),
-            "priceUpdatedAt": refresh_policy.get_price_timestamp(Market.HK),
-        },
+        "inTradingHours": refresh_policy.is_in_trading_hours(market),
+        "priceUpdatedAt": min(fetched_at).isoformat() if fetched_at else None,
+        "priceUpdatedAtLatest": max(fetched_at).isoformat() if fetched_at else None,
     }
 
 
-def _price_key(code: str) -> str:
-    return keys.KEY_STOCK_PRICE.format(code=code)
+def get_markets_metadata(prices: RealtimePriceDict) -> MarketsData:
+    """priceUpdatedAt / priceUpdatedAtLatest 为本次行情中该市场各代码 fetchedAt 的最早 / 最晚值。"""
+    fetched_at: dict[Market, list[datetime]] = {Market.CN: [], Market.HK: []}
+    for code, data in prices.items():
+        if ts := data.get("fetchedAt"):
+            fetched_at[code_to_market(code)].append(datetime.fromisoformat(ts))
+    return {
+        "cn": _market_status(Market.CN, fetched_at[Market.CN]),
+        "hk": _market_status(Market.HK, fetched_at[Market.HK]),
+    }
 
 
-def _evict_market_prices(market: Market) -> None:
-    """市场需刷新时清掉该市场全部单票价格，避免部分代码回源后推进时间戳、其余旧价永久命中。"""
-    for pattern in _MARKET_PRICE_PATTERNS[market]:
-        Cache.delete_pattern(pattern)
+def _price_key(code: str) -> str:
+    return keys.KEY_STOCK_PRICE.format(code=code)
 
 
 def _set_prices_timestamp_and_invalidate(markets: set[Market], timestamp: str) -> None:
@@ -58,7 +65,7 @@ def _set_prices_timestamp_and_invalidate(markets: set[Market], timestamp: str) -
 
 
 def _markets_fully_fetched(missing: list[str], api_result: RealtimePriceDict) -> set[Market]:
-    """仅当某市场本次 missing 全部回源成功时，才允许推进该市场价格时间戳。"""
+    """仅当某市场本次 missing 全部回源成功时（任一分片失败或超时即缺失），才允许推进该市场价格时间戳。"""
     complete: set[Market] = set()
     for market, codes in zip((Market.CN, Market.HK), split_codes_by_market(missing), strict=False):
         if codes and all(code in api_result for code in codes):
@@ -66,6 +73,149 @@ def _markets_fully_fetched(missing: list[str], api_result: RealtimePriceDict) ->
     return complete
 
 
+def _decode_key_value(value: Any) -> RealtimePriceData | None:
+    """stock:price:{code} 的 JSON 值；字段不全（旧格式、损坏）按未命中处理。"""
+    if isinstance(value, dict) and _PRICE_FIELDS.issubset(value):
+        return cast(RealtimePriceData, value)
+    return None
+
+
+def _read_keys(codes: list[str]) -> dict[str, RealtimePriceData | None]:
+    cache_keys = [_price_key(code) for code in codes]
+    try:
+        batch = Cache.get_many(cache_keys)
+    except Exception as e:
+        logger.error(f"批量获取股价缓存失败: {e}")
+        batch = {key: cache.get(key) for key in cache_keys}
+    return {code: _decode_key_value(batch.get(cache_key)) for code, cache_key in zip(codes, cache_keys, strict=False)}
+
+
+def _read_board(market: Market, codes: list[str]) -> dict[str, RealtimePriceData | None]:
+    raw = Cache.get_fields(keys.KEY_QUOTE_BOARD.format(market=market.value), codes)
+    return {code: quote_codec.decode_quote(value) if value else None for code, value in raw.items()}
+
+
+def _read_cached(market: Market, codes: list[str]) -> tuple[RealtimePriceDict, list[str]]:
+    batch = _read_board(market, codes) if _PRICE_LAYOUT == 'board' else _read_keys(codes)
+    cached: RealtimePriceDict = {}
+    missing: list[str] = []
+    for code in codes:
+        if (data := batch.get(code)) is not None:
+            cached[code] = data
+        else:
+            missing.append(code)
+    return cached, missing
+
+
+def _write_prices(prices: RealtimePriceDict) -> None:
+    if _PRICE_LAYOUT != 'board':
+        Cache.set_many({_price_key(code): data for code, data in prices.items()}, keys.TTL_STOCK_PRICE)
+        return
+    # 整个市场哈希共用 TTL，每次写入续期；单代码新鲜度仍看 fetchedAt
+    cn_codes, hk_codes = split_codes_by_market(prices)
+    for market, codes in ((Market.CN, cn_codes), (Market.HK, hk_codes)):
+        Cache.set_fields(
+            keys.KEY_QUOTE_BOARD.format(market=market.value),
+            {code: quote_codec.encode_quote(prices[code]) for code in codes},
+            keys.TTL_STOCK_PRICE,
+        )
+
+
+def _split_fresh(market: Market, cached: RealtimePriceDict) -> tuple[RealtimePriceDict, RealtimePriceDict]:
+    """按代码拆分 (新鲜, 过期)：fetchedAt 至今经过该市场任意交易时段即过期，与 should_refresh_market 同口径。"""
+    now = datetime.now(TZ_SHANGHAI)
+    # 同批写入的代码共享 fetchedAt，按时间戳只判一次
+    passed: dict[str, bool] = {}
+    fresh: RealtimePriceDict = {}
+    stale: RealtimePriceDict = {}
+    for code, data in cached.items():
+        if not (ts := data.get("fetchedAt")):
+            stale[code] = data
+            continue
+        if ts not in passed:
+            passed[ts] = TradingCalendar.is_trading_time_passed(datetime.fromisoformat(ts), now, market)
+        (stale if passed[ts] else fresh)[code] = data
+    return fresh, stale
+
+
+def _mark_stale(prices: RealtimePriceDict) -> RealtimePriceDict:
+    return {code: {**data, "stale": True} for code, data in prices.items()}
+
+
+def _record_refresh(market: Market, outcome: str) -> None:
+    Cache.incr_field(keys.KEY_PRICE_REFRESH_STATS.format(market=market.value), outcome)
+
+
+def get_refresh_stats() -> dict[str, dict[str, int]]:
+    """刷新锁计数：leader 回源次数、waiter_fresh 等到新价、waiter_stale 超时返回旧价"""
+    return {
+        market.value: Cache.get_counters(keys.KEY_PRICE_REFRESH_STATS.format(market=market.value))
+        for market in Market
+    }
+
+
+def _refresh_codes(
+    market: Market,
+    codes: list[str],
+    stale: RealtimePriceDict,
+) -> tuple[RealtimePriceDict, list[str]]:
+    """single-flight 回源：持锁 worker 合并各请求的待刷新代码一次拉取，其余等锁后读新价。
+
+    等锁期间被他人写入（fetchedAt 晚于开始等待）的代码直接读缓存；交易时段内 fetchedAt 恒视为过期，不能用 _split_fresh 复查。
+    返回 (行情, 仍需直接回源的代码)；stale 为调用方已读到的过期价，回源失败或等锁超时时兜底（标记 stale）。
+    """
+    pending_key = keys.KEY_PRICE_REFRESH_PENDING.format(market=market.value)
+    Cache.add_members(pending_key, codes, keys.TTL_PRICE_REFRESH_LOCK)
+    wait_started = datetime.now(TZ_SHANGHAI)
+
+    lock = cache.lock(  # type: ignore[attr-defined]
+        keys.KEY_PRICE_REFRESH_LOCK.format(market=market.value),
+        timeout=keys.TTL_PRICE_REFRESH_LOCK,
+    )
+    if not lock.acquire(blocking=True, blocking_timeout=_REFRESH_WAIT_TIMEOUT):
+        _record_refresh(market, "waiter_stale")
+        return _mark_stale(stale), [code for code in codes if code not in stale]
+
+    try:
+        cached, _ = _read_cached(market, codes)
+        result: RealtimePriceDict = {
+            code: data for code, data in cached.items()
+            if (ts := data.get("fetchedAt")) and datetime.fromisoformat(ts) >= wait_started
+        }
+        if not (remaining := [code for code in codes if code not in result]):
+            _record_refresh(market, "waiter_fresh")
+            return result, []
+
+        _record_refresh(market, "leader")
+        batch_codes = sorted(Cache.pop_members(pending_key) | set(remaining))
+        api_result = fetch_prices(batch_codes)
+        written = _set_prices_batch(api_result, _markets_fully_fetched(batch_codes, api_result))
+        result.update({code: written[code] for code in remaining if code in written})
+        result.update(_mark_stale({code: stale[code] for code in remaining if code not in written and code in stale}))
+        logger.info(f"[price] {market.value} 刷新 {len(written)}/{len(batch_codes)} 只（本请求 {len(codes)} 只）")
+        return result, []
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            logger.warning(f"[price] {market.value} 刷新锁已超时释放")
+
+
+@request_memoized("collector_alive", redis_calls=1)
+def _collector_alive(market: Market) -> bool:
+    """后台采集心跳存活时该市场价格由采集进程负责刷新，请求路径只读缓存。"""
+    return cache.get(keys.KEY_QUOTE_COLLECTOR_HEARTBEAT.format(market=market.value)) is not None
+
+
+def collect_market_prices(market: Market, codes: list[str], heartbeat_ttl: int) -> int:
+    """后台采集一轮：经 single-flight 回源写价并续期心跳，返回本轮拿到新价的代码数。"""
+    prices, _ = _refresh_codes(market, codes, {})
+    fresh_count = sum(1 for data in prices.values() if not data.get("stale"))
+    if fresh_count:
+        cache.set(keys.KEY_QUOTE_COLLECTOR_HEARTBEAT.format(market=market.value), True, heartbeat_ttl)
+    return fresh_count
+
+
 def _get_cached_prices(code_list: list[str]) -> tuple[RealtimePriceDict, list[str]]:
     if not code_list:
         return {}, []
@@ -75,45 +225,36 @@ def _get_cached_prices(code_list: list[str]) -> tuple[RealtimePriceDict, list[st
     for market, codes in zip((Market.CN, Market.HK), split_codes_by_market(code_list), strict=False):
         if not codes:
             continue
-        if refresh_policy.should_refresh_market(market):
-            _evict_market_prices(market)
-            missing.extend(codes)
-            continue
-        cache_keys = [_price_key(code) for code in codes]
-        try:
-            batch = Cache.get_many(cache_keys)
-        except Exception as e:
-            logger.error(f"批量获取股价缓存失败: {e}")
-            batch = {key: cache.get(key) for key in cache_keys}
-        for code, cache_key in zip(codes, cache_keys, strict=False):
-            data = batch.get(cache_key)
-            if data and _PRICE_FIELDS.issubset(data):
-                cached[code] = data
-            else:
-                missing.append(code)
+        market_cached, _ = _read_cached(market, codes)
+        if _collector_alive(market):
+            fresh, stale = market_cached, {}
+        else:
+            fresh, stale = _split_fresh(market, market_cached)
+        cached.update(fresh)
+        if to_refresh := [code for code in codes if code not in fresh]:
+            refreshed, unresolved = _refresh_codes(market, to_refresh, stale)
+            cached.update(refreshed)
+            missing.extend(unresolved)
     return cached, missing
 
 
-def _set_prices_batch(prices: RealtimePriceDict, markets_to_timestamp: set[Market]) -> None:
+def _set_prices_batch(prices: RealtimePriceDict, markets_to_timestamp: set[Market]) -> RealtimePriceDict:
+    """写入并返回带 fetchedAt 的行情；markets_to_timestamp 内的市场同步推进价格时间戳。"""
     if not prices:
-        return
-    Cache.set_many(
-        {_price_key(code): data for code, data in prices.items()},
-        keys.TTL_STOCK_PRICE,
-    )
-    if not markets_to_timestamp:
-        return
+        return {}
     ts = datetime.now(TZ_SHANGHAI).isoformat()
-    _set_prices_timestamp_and_invalidate(markets_to_timestamp, ts)
+    stamped: RealtimePriceDict = {code: {**data, "fetchedAt": ts} for code, data in prices.items()}
+    _write_prices(stamped)
+    if markets_to_timestamp:
+        _set_prices_timestamp_and_invalidate(markets_to_timestamp, ts)
+    return stamped
 
 
 def query_prices(code_list: list[str]) -> RealtimePriceDict:
     cached, missing = _get_cached_prices(code_list)
     if missing:
         api_result = fetch_prices(missing)
-        if api_result:
-            _set_prices_batch(api_result, _markets_fully_fetched(missing, api_result))
-        result = {**cached, **api_result}
+        result = {**cached, **_set_prices_batch(api_result, _markets_fully_fetched(missing, api_result))}
     else:
         result = cached
 
@@ -0,0 +1,41 @@
+"""行情看板（quotes:{market} 哈希）字段编解码：定长数值 + UTF-8 名称，替代逐条 dict JSON"""
+import struct
+from datetime import datetime
+from functools import lru_cache
+
+from backend.common.domain.calendar import TZ_SHANGHAI
+from backend.common.types import RealtimePriceData
+
+# currentPrice / priceOffset / offsetRatio / yesterdayClose / fetchedAt（epoch 秒，0 表示缺失）
+_NUMERIC = struct.Struct("<5d")
+
+
+@lru_cache(maxsize=64)
+def _iso(epoch: float) -> str:
+    # 同批写入共享 fetchedAt，按时间戳缓存格式化结果
+    return datetime.fromtimestamp(epoch, TZ_SHANGHAI).isoformat()
+
+
+def encode_quote(data: RealtimePriceData) -> bytes:
+    fetched_at = datetime.fromisoformat(ts).timestamp() if (ts := data.get("fetchedAt")) else 0.0
+    return _NUMERIC.pack(
+        data["currentPrice"],
+        data["priceOffset"],
+        data["offsetRatio"],
+        data["yesterdayClose"],
+        fetched_at,
+    ) + data["name"].encode()
+
+
+def decode_quote(raw: bytes) -> RealtimePriceData:
+    current, offset, ratio, close, fetched_at = _NUMERIC.unpack_from(raw)
+    data = RealtimePriceData(
+        name=raw[_NUMERIC.size:].decode(),
+        currentPrice=current,
+        priceOffset=offset,
+        offsetRatio=ratio,
+        yesterdayClose=close,
+    )
+    if fetched_at:
+        data["fetchedAt"] = _iso(fetched_at)
+    return data
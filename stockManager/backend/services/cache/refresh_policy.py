@@ -6,9 +6,11 @@ from django.core.cache import cache
 
 from backend.common.domain.market import Market
 from backend.common.domain.calendar import TradingCalendar, TZ_SHANGHAI
+from backend.common.request_scope import forget, request_memoized
 from backend.services.cache import keys
 
 
+@request_memoized("is_in_trading_hours")
 def is_in_trading_hours(market: Market) -> bool:
     return TradingCalendar.is_in_trading_hours_at(datetime.now(TZ_SHANGHAI), market)
 
@@ -17,6 +19,7 @@ def any_market_in_trading_hours(markets: Iterable[Market]) -> bool:
     return any(is_in_trading_hours(m) for m in markets)
 
 
+@request_memoized("price_timestamp", redis_calls=1)
 def get_price_timestamp(market: Market) -> str | None:
     return cache.get(keys.KEY_STOCK_PRICE_TIMESTAMP.format(market=market.value))
 
@@ -27,8 +30,10 @@ def set_price_timestamp(market: Market, timestamp: str) -> None:
         timestamp,
         keys.TTL_STOCK_PRICE,
     )
+    forget("price_timestamp", "should_refresh_market")
 
 
+@request_memoized("should_refresh_market", redis_calls=1)
 def should_refresh_market(market: Market) -> bool:
     """上次拉价至今是否经过该市场任意交易时段（含跨日、法定假日跳过）。"""
     if not (ts := get_price_timestamp(market)):
@@ -1,16 +1,22 @@
 """缓存仓库门面：对外统一入口，聚合多 store 的编排调用"""
+import os
 from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import AbstractContextManager
 from dataclasses import dataclass
+from datetime import date
 from typing import Iterable
 
 from django.contrib.auth.models import User
 
-from backend.common.cache import Cache
+from backend.common.cache import Cache, InvalidationBatcher, LocalCache
 from backend.common import logger
+from backend.common.domain.market import Market
 from backend.common.types import (
     CalculatedResult,
     CashFlowList,
     DailyCloseByCode,
+    DateRangeList,
+    FxRateData,
     HoldingWindows,
     MarketsData,
     NavAnalysisResult,
@@ -19,8 +25,10 @@ from backend.common.types import (
     ValuationData,
     WatchItemDict,
 )
+from backend.datasource import get_kline_cache_stats, get_upstream_stats
 from backend.models import StockMeta as StockMetaModel
 from backend.services.cache import daily_price_store
+from backend.services.cache import fx_daily_store
 from backend.services.cache import fx_store
 from backend.services.cache import hist_high_store
 from backend.services.cache import meta_store
@@ -35,6 +43,7 @@ class CalculationInputs:
     income_cash: float
     cash_flow_list: CashFlowList
     hkd_cny_rate: float
+    hkd_cny_rate_fetched_at: str | None
     prices: RealtimePriceDict
     stock_meta: dict[str, StockMetaModel]
     markets: MarketsData
@@ -52,6 +61,10 @@ class CacheRepository:
     def get_user_operations(cls, user: User) -> OperationDict:
         return user_store.get_user_operations(user)
 
+    @classmethod
+    def get_versioned_user_operations(cls, user: User) -> tuple[OperationDict, str]:
+        return user_store.get_versioned_user_operations(user)
+
     @classmethod
     def get_user_cash_info(cls, user: User) -> tuple[float, CashFlowList]:
         return user_store.get_user_cash_info(user)
@@ -73,6 +86,25 @@ class CacheRepository:
     ) -> None:
         user_store.set_calculated_target(user_id, result, user_codes)
 
+    @classmethod
+    def get_stock_ledgers(
+        cls,
+        user_id: int,
+        operations_version: str,
+        hkd_cny_rate: float,
+    ) -> dict[str, dict]:
+        return user_store.get_stock_ledgers(user_id, operations_version, hkd_cny_rate)
+
+    @classmethod
+    def set_stock_ledgers(
+        cls,
+        user_id: int,
+        operations_version: str,
+        ledgers: dict[str, dict],
+        hkd_cny_rate: float,
+    ) -> None:
+        user_store.set_stock_ledgers(user_id, operations_version, ledgers, hkd_cny_rate)
+
     @classmethod
     def get_nav_analysis(cls, user_id: int) -> NavAnalysisResult | None:
         return user_store.get_nav_analysis(user_id)
@@ -90,9 +122,20 @@ class CacheRepository:
         return fx_store.get_hkd_cny_rate(user_codes)
 
     @classmethod
-    def ensure_daily_prices_for_windows(cls, windows: HoldingWindows) -> DailyCloseByCode:
+    def get_hkd_cny_quote(cls, user_codes: Iterable[str]) -> FxRateData:
+        return fx_store.get_hkd_cny_quote(user_codes)
+
+    @classmethod
+    def ensure_daily_prices_for_windows(
+        cls,
+        windows: HoldingWindows,
+    ) -> tuple[DailyCloseByCode, dict[str, DateRangeList]]:
         return daily_price_store.ensure_daily_prices_for_windows(windows)
 
+    @classmethod
+    def get_hkd_cny_rates_for_sessions(cls, sessions: list[date]) -> list[float]:
+        return fx_daily_store.hkd_cny_rates_for_sessions(sessions)
+
     @classmethod
     def get_stock_meta_dict(cls) -> dict[str, StockMetaModel]:
         return meta_store.get_stock_meta_dict()
@@ -106,13 +149,16 @@ class CacheRepository:
         """聚合持仓计算所需的现金流、汇率、行情与元数据。"""
         user_codes = list(operation_list.keys())
         income_cash, cash_flow_list = cls.get_user_cash_info(user)
+        prices = price_store.query_prices(user_codes)
+        fx = cls.get_hkd_cny_quote(user_codes)
         return CalculationInputs(
             income_cash=income_cash,
             cash_flow_list=cash_flow_list,
-            hkd_cny_rate=cls.get_hkd_cny_rate(user_codes),
-            prices=price_store.query_prices(user_codes),
+            hkd_cny_rate=fx["rate"],
+            hkd_cny_rate_fetched_at=fx["fetchedAt"],
+            prices=prices,
             stock_meta=meta_store.get_stock_meta_dict(),
-            markets=price_store.get_markets_metadata(),
+            markets=price_store.get_markets_metadata(prices),
         )
 
     @classmethod
@@ -152,7 +198,53 @@ class CacheRepository:
         )
 
     @classmethod
-    def clear_all(cls) -> int:
-        deleted_count = Cache.delete_pattern("*")
-        logger.info(f"[Redis] 管理员清理全部缓存，删除 {deleted_count} 个 key")
-        return deleted_count
+    def collect_market_prices(cls, market: Market, codes: list[str], heartbeat_ttl: int) -> int:
+        return price_store.collect_market_prices(market, codes, heartbeat_ttl)
+
+    @classmethod
+    def get_price_refresh_stats(cls) -> dict[str, dict[str, int]]:
+        return price_store.get_refresh_stats()
+
+    @classmethod
+    def get_local_cache_stats(cls) -> dict[str, dict[str, int]]:
+        """本 worker 进程内 L1 各 namespace 命中 / 未命中 / 条目数"""
+        return LocalCache.stats()
+
+    @classmethod
+    def get_upstream_stats(cls) -> dict[str, dict[str, object]]:
+        """本 worker 进程内各上游 host 熔断状态与请求 / 拒绝计数"""
+        return get_upstream_stats()
+
+    @classmethod
+    def get_kline_cache_stats(cls) -> dict[str, object]:
+        """已收盘 K 线落盘缓存命中率、读写字节（本进程）与文件条目数 / 大小"""
+        return get_kline_cache_stats()
+
+    @classmethod
+    def batch_invalidation(cls) -> AbstractContextManager[None]:
+        """块内模型信号触发的缓存失效去重后于块结束时执行一次（批量写库用）"""
+        return InvalidationBatcher.batch()
+
+    @classmethod
+    def get_invalidation_stats(cls) -> dict[str, int]:
+        """失效合并计数：executed 实际执行、coalesced 合并省去"""
+        return InvalidationBatcher.stats()
+
+    @classmethod
+    def get_runtime_stats(cls) -> dict[str, object]:
+        """本 worker 进程内各项计数汇总（各 worker 独立，pid 标明来源）"""
+        return {
+            "pid": os.getpid(),
+            "upstream": cls.get_upstream_stats(),
+            "klineCache": cls.get_kline_cache_stats(),
+            "localCache": cls.get_local_cache_stats(),
+            "invalidation": cls.get_invalidation_stats(),
+            "priceRefresh": cls.get_price_refresh_stats(),
+        }
+
+    @classmethod
+    def clear_all(cls) -> tuple[int, dict[str, int]]:
+        """返回 (删除 key 数, 清理前各 tag 登记数)"""
+        deleted_count, tag_counts = Cache.clear_all()
+        logger.info(f"[Redis] 管理员清理全部缓存，删除 {deleted_count} 个 key，tag 登记 {tag_counts}")
+        return deleted_count, tag_counts
@@ -1,4 +1,6 @@
 """用户数据与计算结果缓存"""
+import datetime
+import time
 from typing import Iterable, cast
 
 from django.contrib.auth.models import User
@@ -6,9 +8,11 @@ from django.core.cache import cache
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from backend.common.cache import Cache
+from backend.common.cache import Cache, InvalidationBatcher, LocalCache
 from backend.common import logger
-from backend.common.domain.market import markets_in_codes
+from backend.common.domain.market import is_hk_code, markets_in_codes
+from backend.common.domain.operation_record import OperationRecord
+from backend.common.request_scope import forget, request_memoized
 from backend.common.utils import format_operations
 from backend.common.types import CalculatedResult, CashFlowData, CashFlowList, NavAnalysisResult, OperationDict
 from backend.models import Operation, Info, CashFlow
@@ -17,40 +21,59 @@ from backend.services.cache import operation_codec
 from backend.services.cache import refresh_policy
 
 
-def get_user_operations_cache(user: User) -> OperationDict | None:
-    key = keys.KEY_USER_OPERATIONS.format(user_id=user.pk)
-    data = cache.get(key)
-    return operation_codec.deserialize_operations(data, user) if data else None
+LocalCache.register(keys.L1_USER_CASH_INFO, keys.TTL_L1_USER_DATA)
+LocalCache.register(keys.L1_USER_OPERATIONS, keys.TTL_L1_USER_OPERATIONS)
 
 
-def set_user_operations_cache(user: User, operations: OperationDict) -> None:
-    key = keys.KEY_USER_OPERATIONS.format(user_id=user.pk)
-    data = operation_codec.serialize_operations(operations)
-    cache.set(key, data, keys.TTL_USER_DATA)
+@request_memoized("user_data_version", redis_calls=1)
+def get_user_data_version(user_id: int) -> int:
+    """用户数据版本：操作 / 现金流 / 收入 / 关注列表变化时自增，用户级 key 与进程内解码结果按版本取键。"""
+    key = keys.KEY_USER_DATA_VERSION.format(user_id=user_id)
+    if (version := cache.get(key)) is None:
+        # 以纳秒时间戳起始：版本键丢失（淘汰、清库）后重建不会回到用过的小值，避免命中旧的 L1 条目
+        initial = time.time_ns()
+        cache.add(key, initial, timeout=None)
+        version = cache.get(key, initial)
+    return int(version)
 
 
-def clear_user_operations(user_id: int) -> None:
-    cache.delete(keys.KEY_USER_OPERATIONS.format(user_id=user_id))
+def bump_user_data_version(user_id: int) -> int:
+    """一次原子 INCR 使该用户全部版本化 key 失效；L1 旧版本条目不可达，靠 TTL / LRU 回收。"""
+    key = keys.KEY_USER_DATA_VERSION.format(user_id=user_id)
+    try:
+        version = int(cache.incr(key))
+    except ValueError:
+        version = time.time_ns()
+        cache.add(key, version, timeout=None)
+    forget("user_data_version")
+    return version
+
+
+def user_key(template: str, user_id: int) -> str:
+    """填充用户级 key 的 user_id 与当前数据版本；请求内版本记忆化，读写同一代 key。"""
+    return template.format(user_id=user_id, version=get_user_data_version(user_id))
+
+
+def set_user_operations_cache(user: User, operations: OperationDict) -> str:
+    """写入操作缓存，返回序列化内容对应的操作版本。"""
+    data = operation_codec.encode_operations(operations)
+    cache.set(user_key(keys.KEY_USER_OPERATIONS, user.pk), data, keys.TTL_USER_DATA)
+    return data["version"]
 
 
 def get_user_cash_info_cache(user: User) -> tuple | None:
-    key = keys.KEY_USER_CASH_INFO.format(user_id=user.pk)
-    data = cache.get(key)
+    data = cache.get(user_key(keys.KEY_USER_CASH_INFO, user.pk))
     return (data['income_cash'], data['cash_flow_list']) if data else None
 
 
 def set_user_cash_info_cache(user: User, income_cash: float, cash_flow_list: CashFlowList) -> None:
     cache.set(
-        keys.KEY_USER_CASH_INFO.format(user_id=user.pk),
+        user_key(keys.KEY_USER_CASH_INFO, user.pk),
         {'income_cash': income_cash, 'cash_flow_list': cash_flow_list},
         keys.TTL_USER_DATA,
     )
 
 
-def clear_user_cash_info(user_id: int) -> None:
-    cache.delete(keys.KEY_USER_CASH_INFO.format(user_id=user_id))
-
-
 def should_invalidate_calculated_cache(user_codes: Iterable[str]) -> bool:
     return any(
         refresh_policy.should_refresh_market(market)
@@ -64,7 +87,7 @@ def get_calculated_target(
 ) -> CalculatedResult | None:
     codes = list(user_codes) if user_codes is not None else list(get_user_operations(user).keys())
     if (
-        not (cached := cache.get(keys.KEY_CALCULATED_TARGET.format(user_id=user.pk)))
+        not (cached := cache.get(user_key(keys.KEY_CALCULATED_TARGET, user.pk)))
         or should_invalidate_calculated_cache(codes)
     ):
         return None
@@ -79,46 +102,117 @@ def set_calculated_target(
     markets = markets_in_codes(user_codes)
     if refresh_policy.any_market_in_trading_hours(markets):
         return
-    cache.set(keys.KEY_CALCULATED_TARGET.format(user_id=user_id), result, keys.TTL_CALCULATED_TARGET)
+    Cache.set(
+        user_key(keys.KEY_CALCULATED_TARGET, user_id),
+        result,
+        keys.TTL_CALCULATED_TARGET,
+        tags=(keys.TAG_CALCULATED_TARGET,),
+    )
 
 
-def clear_calculated_target(user_id: int) -> None:
-    cache.delete(keys.KEY_CALCULATED_TARGET.format(user_id=user_id))
+def get_stock_ledgers(
+    user_id: int,
+    operations_version: str,
+    hkd_cny_rate: float,
+) -> dict[str, dict]:
+    """单股价格无关账本；操作版本或日期不符整体作废，港股（分红原币折算）另需汇率一致。"""
+    if (
+        not (cached := cache.get(keys.KEY_USER_STOCK_LEDGER.format(user_id=user_id)))
+        or cached.get("version") != operations_version
+        or cached.get("date") != datetime.date.today().isoformat()
+    ):
+        return {}
+    return {
+        code: entry["ledger"]
+        for code, entry in cached["stocks"].items()
+        if not is_hk_code(code) or entry.get("hkdCnyRate") == hkd_cny_rate
+    }
+
+
+def set_stock_ledgers(
+    user_id: int,
+    operations_version: str,
+    ledgers: dict[str, dict],
+    hkd_cny_rate: float,
+) -> None:
+    """账本与价格无关，交易时段内同样写入（盘中只按新价重拼）。"""
+    cache.set(
+        keys.KEY_USER_STOCK_LEDGER.format(user_id=user_id),
+        {
+            "version": operations_version,
+            "date": datetime.date.today().isoformat(),
+            "stocks": {
+                code: {"ledger": ledger, "hkdCnyRate": hkd_cny_rate if is_hk_code(code) else None}
+                for code, ledger in ledgers.items()
+            },
+        },
+        keys.TTL_STOCK_LEDGER,
+    )
 
 
 def clear_all_calculated_targets() -> None:
-    deleted_count = Cache.delete_pattern("user:*:calculated_target")
+    deleted_count = Cache.invalidate_tag(
+        keys.TAG_CALCULATED_TARGET,
+        legacy_patterns=(keys.KEY_CALCULATED_TARGET.format(user_id="*", version="*"),),
+    )
     if deleted_count > 0:
         logger.info(f"[Redis] 价格更新，清除 {deleted_count} 个用户的计算结果缓存")
 
 
 def get_nav_analysis(user_id: int) -> NavAnalysisResult | None:
-    return cache.get(keys.KEY_NAV_ANALYSIS.format(user_id=user_id))
+    return cache.get(user_key(keys.KEY_NAV_ANALYSIS, user_id))
 
 
 def set_nav_analysis(user_id: int, result: NavAnalysisResult) -> None:
     cache.set(
-        keys.KEY_NAV_ANALYSIS.format(user_id=user_id),
+        user_key(keys.KEY_NAV_ANALYSIS, user_id),
         result,
         keys.TTL_NAV_ANALYSIS,
     )
 
 
 def clear_nav_analysis(user_id: int) -> None:
-    cache.delete(keys.KEY_NAV_ANALYSIS.format(user_id=user_id))
+    cache.delete(user_key(keys.KEY_NAV_ANALYSIS, user_id))
 
 
-def get_user_operations(user: User) -> OperationDict:
-    if (cached := get_user_operations_cache(user)) is not None:
-        return cached
+def get_versioned_user_operations(user: User) -> tuple[OperationDict, str]:
+    """返回 (操作, 操作版本)；版本为缓存内容摘要，供派生缓存（如单股账本）校验。
+
+    进程内按 (用户, 数据版本) 复用解码结果，命中时每请求只读一次版本键；结果在请求间共享，调用方只读不改。
+    """
+    return LocalCache.get_or_load(
+        keys.L1_USER_OPERATIONS,
+        f"{user.pk}:{get_user_data_version(user.pk)}",
+        lambda: _load_versioned_user_operations(user),
+    )
+
+
+def _load_versioned_user_operations(user: User) -> tuple[OperationDict, str]:
+    if (
+        (data := cache.get(user_key(keys.KEY_USER_OPERATIONS, user.pk)))
+        and (decoded := operation_codec.decode_operations(data)) is not None
+    ):
+        return decoded
     operations = format_operations(
-        Operation.objects.filter(user=user).select_related('stock_meta').order_by('date', 'sortOrder', 'id')
+        OperationRecord.from_model(op)
+        for op in Operation.objects.filter(user=user).select_related('stock_meta').order_by('date', 'sortOrder', 'id')
     )
-    set_user_operations_cache(user, operations)
-    return operations
+    return operations, set_user_operations_cache(user, operations)
+
+
+def get_user_operations(user: User) -> OperationDict:
+    return get_versioned_user_operations(user)[0]
 
 
 def get_user_cash_info(user: User) -> tuple[float, CashFlowList]:
+    return LocalCache.get_or_load(
+        keys.L1_USER_CASH_INFO,
+        user_key(keys.KEY_USER_CASH_INFO, user.pk),
+        lambda: _load_user_cash_info(user),
+    )
+
+
+def _load_user_cash_info(user: User) -> tuple[float, CashFlowList]:
     if (cached := get_user_cash_info_cache(user)) is not None:
         return cached
     income_info = Info.objects.filter(user=user, info_type=Info.InfoType.INCOME_CASH).first()
@@ -135,10 +229,8 @@ def get_user_cash_info(user: User) -> tuple[float, CashFlowList]:
 
 
 def clear_user_cache(user_id: int) -> None:
-    clear_user_operations(user_id)
-    clear_user_cash_info(user_id)
-    clear_calculated_target(user_id)
-    clear_nav_analysis(user_id)
+    """operations / cash_info / calculated_target / nav_analysis / watchlist 随版本整体失效；账本按操作摘要自校验。"""
+    bump_user_data_version(user_id)
 
 
 @receiver([post_save, post_delete], sender=Operation)
@@ -149,5 +241,10 @@ def clear_user_cache_on_model_change(sender, instance, **kwargs) -> None:
         sender == Info and instance.info_type != Info.InfoType.INCOME_CASH
     ) or not instance.user_id:
         return
-    clear_user_cache(instance.user_id)
-    logger.info(f"[Redis] {sender.__name__} 变化，清除用户 {instance.user_id} 的缓存")
+    # 批量增删（admin 批量删除、分红生成）在提交后按用户合并为一次版本递增
+    InvalidationBatcher.defer(_clear_user_cache_on_change, instance.user_id)
+
+
+def _clear_user_cache_on_change(user_id: int) -> None:
+    clear_user_cache(user_id)
+    logger.info(f"[Redis] 用户 {user_id} 数据变化，清除其缓存")
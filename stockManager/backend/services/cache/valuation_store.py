@@ -3,19 +3,16 @@
 A 股与港股统一走百度 opendata：A 股 market=ab，港股 market=hk。
 base_close 取实时行情的 yesterdayClose，epsTtm=close/peTTM、bvps=close/pbMRQ。
 """
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
 from django.core.cache import cache
 
 from backend.common.cache import Cache
 from backend.common import logger
 from backend.common.domain.market import to_baidu_params
 from backend.common.types import RealtimePriceDict, ValuationData
-from backend.datasource import fetch_pe_pb
+from backend.datasource import fetch_many_pe_pb
 from backend.services.cache import keys
 
 _VALUATION_TIMEOUT = 5
-_MAX_WORKERS = 8
 
 
 def _valuation_from_pe_pb(
@@ -53,38 +50,34 @@ def get_cached_valuations(codes: list[str]) -> tuple[dict[str, ValuationData], l
     return result, missing
 
 
-def _fetch_single_valuation(code: str, price_map: RealtimePriceDict) -> tuple[str, ValuationData]:
-    try:
-        baidu = to_baidu_params(code)
-        price_data = price_map.get(code) or {}
-        base_close = price_data.get("yesterdayClose")
-        entry = ValuationData(epsTtm=None, bvps=None)
-        if baidu and base_close:
-            market, pure_code = baidu
-            pe_ttm, pb = fetch_pe_pb(pure_code, market, timeout=_VALUATION_TIMEOUT)
-            entry = _valuation_from_pe_pb(base_close, pe_ttm, pb)
-    except Exception as e:
-        logger.warning(f"估值拉取失败 {code}: {e}")
-        entry = ValuationData(epsTtm=None, bvps=None)
-    _cache_valuation(code, entry)
-    return code, entry
+def _base_close(code: str, price_map: RealtimePriceDict) -> float | None:
+    return (price_map.get(code) or {}).get("yesterdayClose")
 
 
 def fetch_and_cache_valuations(
     codes: list[str],
     price_map: RealtimePriceDict,
 ) -> dict[str, ValuationData]:
-    """有界并发拉取估值并写缓存（A 股与港股统一走百度）。"""
+    """批量拉取估值并写缓存（A 股与港股统一走百度，并发受 http_client 百度 host 上限约束）。"""
     if not codes:
         return {}
 
+    targets: dict[str, tuple[str, str]] = {}
+    for code in codes:
+        if (baidu := to_baidu_params(code)) and _base_close(code, price_map):
+            market, pure_code = baidu
+            targets[code] = (pure_code, market)
+    try:
+        pe_pb = fetch_many_pe_pb(targets, timeout=_VALUATION_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"估值批量拉取失败 {len(targets)} 只: {e}")
+        pe_pb = {}
+
     result: dict[str, ValuationData] = {}
-    with ThreadPoolExecutor(max_workers=_MAX_WORKERS) as executor:
-        futures = [
-            executor.submit(_fetch_single_valuation, code, price_map)
-            for code in codes
-        ]
-        for future in as_completed(futures):
-            code, entry = future.result()
-            result[code] = entry
+    for code in codes:
+        pe_ttm, pb = pe_pb.get(code, (None, None))
+        result[code] = _valuation_from_pe_pb(_base_close(code, price_map), pe_ttm, pb)
+        # 在 targets 中却无结果即上游熔断：本次返回空估值，不写缓存，下次再拉
+        if code in pe_pb or code not in targets:
+            _cache_valuation(code, result[code])
     return result
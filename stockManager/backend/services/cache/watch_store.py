@@ -7,13 +7,20 @@ from django.db.models import F
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from backend.common.cache import InvalidationBatcher, LocalCache
 from backend.common.types import WatchItemDict
 from backend.models import WatchItem
-from backend.services.cache import keys
+from backend.services.cache import keys, user_store
+
+LocalCache.register(keys.L1_USER_WATCHLIST, keys.TTL_L1_USER_DATA)
 
 
 def get_user_watchlist(user: User) -> list[WatchItemDict]:
-    key = keys.KEY_USER_WATCHLIST.format(user_id=user.pk)
+    key = user_store.user_key(keys.KEY_USER_WATCHLIST, user.pk)
+    return LocalCache.get_or_load(keys.L1_USER_WATCHLIST, key, lambda: _load_user_watchlist(user, key))
+
+
+def _load_user_watchlist(user: User, key: str) -> list[WatchItemDict]:
     if (cached := cache.get(key)) is not None:
         return cached
     items = cast(
@@ -37,9 +44,10 @@ def get_user_watchlist(user: User) -> list[WatchItemDict]:
 
 
 def clear_user_watchlist(user_id: int) -> None:
-    cache.delete(keys.KEY_USER_WATCHLIST.format(user_id=user_id))
+    # 关注列表与其他用户级 key 共用数据版本
+    user_store.bump_user_data_version(user_id)
 
 
 @receiver([post_save, post_delete], sender=WatchItem)
 def clear_watchlist_on_change(sender, instance, **kwargs) -> None:
-    clear_user_watchlist(instance.user_id)
+    InvalidationBatcher.defer(clear_user_watchlist, instance.user_id)
@@ -1,4 +1,4 @@
 """盈亏与净值纯计算（无 cache / datasource / 编排）"""
-from backend.services.calculation.holdings import Calculator, StockHold
+from backend.services.calculation.holdings import Calculator, StockHold, StockLedger
 
-__all__ = ['Calculator', 'StockHold']
+__all__ = ['Calculator', 'StockHold', 'StockLedger']
@@ -1,5 +1,6 @@
 """持仓盈亏域：单股指标与组合汇总（纯计算）"""
 from backend.services.calculation.holdings.calculator import Calculator
+from backend.services.calculation.holdings.single_metrics import StockLedger
 from backend.services.calculation.holdings.stock_hold import StockHold
 
-__all__ = ['Calculator', 'StockHold']
+__all__ = ['Calculator', 'StockHold', 'StockLedger']
@@ -5,6 +5,7 @@
 from backend.common.types import CashFlowList, OperationDict, OverallData, RealtimePriceDict, StockData
 from backend.models import StockMeta as StockMetaModel
 from backend.services.calculation.holdings.overall import compute_overall
+from backend.services.calculation.holdings.single_metrics import StockLedger, compute_stock_ledger
 from backend.services.calculation.holdings.single_stock import build_single_stock
 
 
@@ -18,8 +19,10 @@ class Calculator:
         realtime_prices: RealtimePriceDict,
         stock_meta_dict: dict[str, StockMetaModel],
         hkd_cny_rate: float = 0.86,
+        ledgers: dict[str, StockLedger] | None = None,
     ) -> list[StockData]:
-        """从 operation_list 与外部行情/元数据计算每只股票的指标。"""
+        """从 operation_list 与外部行情/元数据计算每只股票的指标；ledgers 命中的股票不再回放操作。"""
+        ledgers = ledgers or {}
         return [
             build_single_stock(
                 code,
@@ -27,10 +30,23 @@ class Calculator:
                 realtime_prices.get(code),
                 stock_meta_dict.get(code),
                 hkd_cny_rate,
+                ledgers.get(code),
             )
             for code, operations in operation_list.items()
         ]
 
+    @classmethod
+    def calculate_ledgers(
+        cls,
+        operation_list: OperationDict,
+        hkd_cny_rate: float = 0.86,
+    ) -> dict[str, StockLedger]:
+        """回放操作得到各股价格无关账本（可缓存，行情变化时复用）。"""
+        return {
+            code: compute_stock_ledger(operations, hkd_cny_rate)
+            for code, operations in operation_list.items()
+        }
+
     @classmethod
     def calculate_overall(
         cls,
@@ -38,8 +54,9 @@ class Calculator:
         income_cash: float = 0.0,
         cash_flow_list: CashFlowList | None = None,
         hkd_cny_rate: float = 0.86,
+        hkd_cny_rate_fetched_at: str | None = None,
     ) -> OverallData:
         """从 stock_list、income_cash、cash_flow_list 计算整体指标（金额已为 CNY）。"""
         return compute_overall(
-            stock_list, income_cash, cash_flow_list or [], hkd_cny_rate
+            stock_list, income_cash, cash_flow_list or [], hkd_cny_rate, hkd_cny_rate_fetched_at
         )
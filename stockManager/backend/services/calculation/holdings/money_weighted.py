@@ -5,15 +5,12 @@ from backend.common.constants import OperationType
 from backend.common.domain.operations import apply_net_invested
 from backend.common.domain.settlement import buy_outflow_cny
 from backend.common.utils import operation_sort_key
-from backend.models import Operation
+from backend.common.domain.operation_record import OperationRecord
 from backend.common.thresholds import MIN_MONEY, MIN_QTY
 
 
-def calculate_money_weighted_return(
-    operations: list[Operation],
-    offset_total: float,
-) -> float:
-    """资金加权累计收益率：offsetTotal(CNY) / 加权平均占用资金(CNY)。"""
+def weighted_capital_cny(operations: list[OperationRecord]) -> float:
+    """加权平均占用资金（CNY，价格无关）；无持仓天数时回退峰值净投入或累计买入。"""
     if not (sorted_ops := sorted(operations, key=operation_sort_key)):
         return 0.0
 
@@ -46,12 +43,22 @@ def calculate_money_weighted_return(
         holding_days += tail_days
 
     if holding_days >= MIN_MONEY:
-        adjusted_begin = dollar_days / holding_days
-    else:
-        adjusted_begin = (
-            peak_net_invested
-            if peak_net_invested >= MIN_MONEY
-            else total_buy_amount
-        )
+        return dollar_days / holding_days
+    return (
+        peak_net_invested
+        if peak_net_invested >= MIN_MONEY
+        else total_buy_amount
+    )
+
 
-    return offset_total / adjusted_begin if adjusted_begin >= MIN_MONEY else 0.0
+def money_weighted_return(offset_total: float, weighted_capital: float) -> float:
+    """offsetTotal(CNY) / 加权平均占用资金(CNY)；占用资金过小时返回 0。"""
+    return offset_total / weighted_capital if weighted_capital >= MIN_MONEY else 0.0
+
+
+def calculate_money_weighted_return(
+    operations: list[OperationRecord],
+    offset_total: float,
+) -> float:
+    """资金加权累计收益率：offsetTotal(CNY) / 加权平均占用资金(CNY)。"""
+    return money_weighted_return(offset_total, weighted_capital_cny(operations))
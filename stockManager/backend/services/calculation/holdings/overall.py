@@ -52,6 +52,7 @@ def compute_overall(
     income_cash: float,
     cash_flow_list: CashFlowList,
     hkd_cny_rate: float = 0.86,
+    hkd_cny_rate_fetched_at: str | None = None,
 ) -> OverallData:
     """计算整体指标（个股金额已为 CNY，直接相加）。"""
     to_return = cast(OverallData, {})
@@ -87,5 +88,6 @@ def compute_overall(
     ]
 
     to_return["hkdCnyRate"] = hkd_cny_rate
+    to_return["hkdCnyRateFetchedAt"] = hkd_cny_rate_fetched_at
 
     return to_return
@@ -1,6 +1,6 @@
 """单股操作账本：一次遍历计算持股、成本、摊薄等指标（双账本）。"""
 import datetime
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, fields
 
 from backend.common.constants import OperationType
 from backend.common.domain.operations import apply_operation_to_hold, dividend_multiplier
@@ -13,8 +13,9 @@ from backend.common.domain.settlement import (
     sell_proceeds_native,
     trade_fee_cny,
 )
-from backend.models import Operation
+from backend.common.domain.operation_record import OperationRecord
 from backend.common.thresholds import MIN_MONEY, MIN_QTY
+from backend.services.calculation.holdings.money_weighted import weighted_capital_cny
 
 
 @dataclass(frozen=True)
@@ -63,7 +64,7 @@ class SingleStockMetrics:
 
 
 def compute_single_metrics(
-    operations: list[Operation],
+    operations: list[OperationRecord],
     hkd_cny_rate: float = 0.86,
 ) -> SingleStockMetrics:
     """一次遍历计算所有单股账本指标（原币展示账本 + 人民币资金账本）。"""
@@ -169,3 +170,31 @@ def compute_single_metrics(
         total_fee_cny=total_fee_cny,
         holding_duration=holding_duration,
     )
+
+
+@dataclass(frozen=True)
+class StockLedger:
+    """单股价格无关部分：账本 metrics + 加权平均占用资金；新价到来时只需重拼 StockData。"""
+    metrics: SingleStockMetrics
+    weighted_capital_cny: float
+
+    def to_dict(self) -> dict[str, float]:
+        return {**asdict(self.metrics), "weighted_capital_cny": self.weighted_capital_cny}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "StockLedger":
+        return cls(
+            metrics=SingleStockMetrics(**{f.name: data[f.name] for f in fields(SingleStockMetrics)}),
+            weighted_capital_cny=data["weighted_capital_cny"],
+        )
+
+
+def compute_stock_ledger(
+    operations: list[OperationRecord],
+    hkd_cny_rate: float = 0.86,
+) -> StockLedger:
+    """按操作全量回放一次，得到可跨价格复用的单股账本。"""
+    return StockLedger(
+        metrics=compute_single_metrics(operations, hkd_cny_rate),
+        weighted_capital_cny=weighted_capital_cny(operations),
+    )
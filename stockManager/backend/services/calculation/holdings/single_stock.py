@@ -7,10 +7,15 @@ from typing import cast
 from backend.common import logger
 from backend.common.domain.market import is_hk_code
 from backend.common.types import RealtimePriceData, StockData
-from backend.models import Operation, StockMeta as StockMetaModel
+from backend.common.domain.operation_record import OperationRecord
+from backend.models import StockMeta as StockMetaModel
 from backend.common.thresholds import MIN_QTY
-from backend.services.calculation.holdings.money_weighted import calculate_money_weighted_return
-from backend.services.calculation.holdings.single_metrics import SingleStockMetrics, compute_single_metrics
+from backend.services.calculation.holdings.money_weighted import money_weighted_return
+from backend.services.calculation.holdings.single_metrics import (
+    SingleStockMetrics,
+    StockLedger,
+    compute_stock_ledger,
+)
 
 
 def _resolve_stock_name(
@@ -82,7 +87,7 @@ def attach_pnl_fields(
     code: str,
     single_real_time: RealtimePriceData,
     metrics: SingleStockMetrics,
-    operations: list[Operation],
+    weighted_capital: float,
     total_value: float,
     total_value_yesterday: float,
     hkd_cny_rate: float,
@@ -95,7 +100,7 @@ def attach_pnl_fields(
         "offsetCurrent": metrics.offset_current_cny(current_price, fx),
         "offsetCurrentRatio": metrics.offset_current_ratio(current_price),
         "offsetTotal": offset_total,
-        "moneyWeightedReturn": calculate_money_weighted_return(operations, offset_total),
+        "moneyWeightedReturn": money_weighted_return(offset_total, weighted_capital),
         "totalCost": metrics.total_fee_cny,
         "totalOffsetToday": metrics.offset_today_cny(
             total_value, total_value_yesterday, current_price, fx
@@ -106,17 +111,20 @@ def attach_pnl_fields(
 
 def build_single_stock(
     code: str,
-    operations: list[Operation],
+    operations: list[OperationRecord],
     single_real_time: RealtimePriceData | None,
     stock_meta: StockMetaModel | None = None,
     hkd_cny_rate: float = 0.86,
+    ledger: StockLedger | None = None,
 ) -> StockData:
-    """计算单个股票的指标"""
+    """计算单个股票的指标；传入 ledger 时跳过操作回放，仅按行情重算价格相关字段。"""
     if not single_real_time:
         logger.warning(f"无法获取股票 {code} 的实时价格")
         single_real_time = _default_realtime_price()
 
-    metrics = compute_single_metrics(operations, hkd_cny_rate)
+    if ledger is None:
+        ledger = compute_stock_ledger(operations, hkd_cny_rate)
+    metrics = ledger.metrics
 
     result = cast(StockData, {})
     result.update(attach_price_fields(code, single_real_time, stock_meta))
@@ -125,7 +133,7 @@ def build_single_stock(
         code,
         single_real_time,
         metrics,
-        operations,
+        ledger.weighted_capital_cny,
         result["totalValue"],
         result["totalValueYesterday"],
         hkd_cny_rate,
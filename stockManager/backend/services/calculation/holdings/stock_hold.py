@@ -3,7 +3,7 @@
 """
 import datetime
 
-from backend.models import Operation
+from backend.common.domain.operation_record import OperationRecord
 from backend.common.domain.operations import apply_operation_to_hold
 from backend.common.types import OperationDict
 from backend.common.utils import operation_sort_key
@@ -30,7 +30,7 @@ class StockHold:
         ]
     
     @classmethod
-    def calculate_hold_count_at_date(cls, operations: list[Operation], target_date: datetime.date) -> float:
+    def calculate_hold_count_at_date(cls, operations: list[OperationRecord], target_date: datetime.date) -> float:
         """计算到指定日期时的持仓数"""
         current_hold = 0.0
         for operation in operations:
@@ -5,7 +5,7 @@ from datetime import date, datetime
 
 from backend.common.types import CashFlowList, OperationDict
 from backend.common.utils import operation_sort_key
-from backend.models import Operation
+from backend.common.domain.operation_record import OperationRecord
 from backend.common.thresholds import MIN_MONEY
 
 
@@ -16,7 +16,7 @@ def _parse_flow_date(value: str | date) -> date:
 
 
 def resolve_start_date(
-    operations: list[Operation],
+    operations: list[OperationRecord],
     cash_flows: CashFlowList,
 ) -> date | None:
     dates: list[date] = []
@@ -46,9 +46,9 @@ def _align_events_to_sessions(
 
 def group_operations(
     operation_list: OperationDict,
-) -> tuple[list[Operation], dict[date, list[Operation]]]:
+) -> tuple[list[OperationRecord], dict[date, list[OperationRecord]]]:
     all_ops = [op for ops in operation_list.values() for op in ops]
-    by_date: dict[date, list[Operation]] = defaultdict(list)
+    by_date: dict[date, list[OperationRecord]] = defaultdict(list)
     for op in all_ops:
         by_date[op.date].append(op)
     for day in by_date:
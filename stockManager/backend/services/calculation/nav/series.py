@@ -2,11 +2,13 @@
 from datetime import date
 from typing import NamedTuple
 
+import numpy as np
+
 from backend.common import logger
 from backend.common.domain.market import is_hk_code
 from backend.common.domain.operations import apply_operation_to_hold, operation_cash_delta_cny
 from backend.common.types import CashFlowList, DailyCloseByCode, OperationDict
-from backend.models import Operation
+from backend.common.domain.operation_record import OperationRecord
 from backend.common.thresholds import EPS, MIN_MONEY, MIN_QTY
 from backend.services.calculation.nav.events import (
     _align_events_to_sessions,
@@ -56,7 +58,7 @@ def _apply_cash_flow(
 def _apply_operation_cash_and_hold(
     holdings: dict[str, float],
     cash: float,
-    operation: Operation,
+    operation: OperationRecord,
 ) -> float:
     code = operation.code
     hold = holdings.get(code, 0.0)
@@ -98,10 +100,10 @@ def _mark_to_market(
 def _compute_nav_series(
     *,
     sessions: list[date],
-    operations_by_date: dict[date, list[Operation]],
+    operations_by_date: dict[date, list[OperationRecord]],
     flows_by_date: dict[date, list[float]],
     prices: DailyCloseByCode,
-    hkd_cny_rate: float,
+    hkd_cny_rates: list[float],
     start_nav: float = 1.0,
     start_units: float = 0.0,
     start_cash: float = 0.0,
@@ -123,7 +125,7 @@ def _compute_nav_series(
             last_closes[code] = series[sessions[0]]
 
     rows: list[NavDayRow] = []
-    for day in sessions:
+    for day, hkd_cny_rate in zip(sessions, hkd_cny_rates, strict=True):
         for amount in flows_by_date.get(day, []):
             nav, units, cash = _apply_cash_flow(
                 amount, nav=nav, units=units, cash=cash
@@ -150,20 +152,208 @@ def _compute_nav_series(
     return rows
 
 
+# ==================== 向量化回放（session × code 矩阵） ====================
+
+
+def _ffill_rows(matrix: np.ndarray) -> np.ndarray:
+    """按行向下前向填充 NaN（首行 NaN 保持）。"""
+    rows, cols = matrix.shape
+    idx = np.where(np.isnan(matrix), 0, np.arange(rows)[:, None])
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return matrix[idx, np.arange(cols)]
+
+
+def _seed_close(series: dict[date, float], first_session: date) -> float:
+    """与循环引擎一致：首个交易日之前最近一日收盘，否则首日收盘。"""
+    if before := [d for d in series if d < first_session]:
+        px = series[max(before)]
+    elif first_session in series:
+        px = series[first_session]
+    else:
+        return np.nan
+    return px if px > 0 else np.nan
+
+
+def _replay_holdings(
+    sessions: list[date],
+    codes: list[str],
+    operations_by_date: dict[date, list[OperationRecord]],
+    start_holdings: dict[str, float],
+) -> tuple[np.ndarray, np.ndarray]:
+    """逐笔回放持股（仅事件日），返回 (持股矩阵 S×C, 交易现金变动向量 S)。"""
+    col = {code: j for j, code in enumerate(codes)}
+    day_index = {d: i for i, d in enumerate(sessions)}
+    holds = np.full((len(sessions), len(codes)), np.nan)
+    op_cash = np.zeros(len(sessions))
+    current = dict(start_holdings)
+    for day in sorted(operations_by_date):
+        if (i := day_index.get(day)) is None:
+            continue
+        for operation in operations_by_date[day]:
+            code = operation.code
+            hold = current.get(code, 0.0)
+            op_cash[i] += operation_cash_delta_cny(operation, hold)
+            if abs(new_hold := apply_operation_to_hold(hold, operation)) < MIN_QTY:
+                new_hold = 0.0
+            current[code] = new_hold
+            holds[i, col[code]] = new_hold
+    start_row = np.array([start_holdings.get(code, 0.0) for code in codes])
+    filled = _ffill_rows(holds)
+    return np.where(np.isnan(filled), start_row, filled), op_cash
+
+
+def _close_matrix(
+    sessions: list[date],
+    codes: list[str],
+    prices: DailyCloseByCode,
+    held: np.ndarray,
+) -> np.ndarray:
+    """持有日收盘价矩阵：缺价沿用上一持有日价格（或首日种子价），与循环引擎 last_closes 口径一致。"""
+    day_index = {d: i for i, d in enumerate(sessions)}
+    closes = np.full((len(sessions) + 1, len(codes)), np.nan)
+    for j, code in enumerate(codes):
+        if not (series := prices.get(code)):
+            continue
+        closes[0, j] = _seed_close(series, sessions[0])
+        for d, px in series.items():
+            if (i := day_index.get(d)) is not None and px > 0:
+                closes[i + 1, j] = px
+    closes[1:][~held] = np.nan
+    return _ffill_rows(closes)[1:]
+
+
+def _log_missing_closes(
+    sessions: list[date],
+    codes: list[str],
+    missing: np.ndarray,
+) -> None:
+    for j in np.flatnonzero(missing.any(axis=0)):
+        first_day = sessions[int(np.argmax(missing[:, j]))]
+        logger.warning(
+            f"[nav] 持仓 {codes[j]} 无可用收盘价（首次见于 {first_day}），市值按 0"
+        )
+
+
+def _units_and_nav(
+    asset: np.ndarray,
+    flows_at: dict[int, list[float]],
+    *,
+    nav: float,
+    units: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """份额仅在出入金日变化：按出入金日切段，段内 nav = asset / units。"""
+    n = len(asset)
+    navs = np.empty(n)
+    units_arr = np.empty(n)
+    starts = sorted({0, *flows_at})
+    for seg_idx, i in enumerate(starts):
+        end = starts[seg_idx + 1] if seg_idx + 1 < len(starts) else n
+        for amount in flows_at.get(i, []):
+            nav, units, _cash = _apply_cash_flow(amount, nav=nav, units=units, cash=0.0)
+
+        if units <= EPS:
+            # 无份额：首次资产 > MIN_MONEY 的当日以资产建仓，nav 记 1
+            if (hits := np.flatnonzero(asset[i:end] > MIN_MONEY)).size == 0:
+                nav = nav if nav > 0 else 1.0
+                navs[i:end] = nav
+                units_arr[i:end] = units
+                continue
+            j = i + int(hits[0])
+            navs[i:j] = nav if nav > 0 else 1.0
+            units_arr[i:j] = units
+            units = float(asset[j])
+            navs[j] = 1.0
+            units_arr[j] = units
+            i = j + 1
+
+        navs[i:end] = asset[i:end] / units
+        units_arr[i:end] = units
+        nav = float(navs[end - 1])
+    return navs, units_arr
+
+
+def _compute_nav_series_numpy(
+    *,
+    sessions: list[date],
+    operations_by_date: dict[date, list[OperationRecord]],
+    flows_by_date: dict[date, list[float]],
+    prices: DailyCloseByCode,
+    hkd_cny_rates: list[float],
+    start_nav: float = 1.0,
+    start_units: float = 0.0,
+    start_cash: float = 0.0,
+    start_holdings: dict[str, float] | None = None,
+) -> list[NavDayRow]:
+    """向量化回放：收盘价矩阵 × 持股矩阵得市值，逐段求份额与净值；结果与循环引擎一致。"""
+    if not sessions:
+        return []
+    start_holdings = dict(start_holdings or {})
+    codes = sorted(
+        set(prices)
+        | set(start_holdings)
+        | {op.code for ops in operations_by_date.values() for op in ops}
+    )
+    day_index = {d: i for i, d in enumerate(sessions)}
+
+    holds, op_cash = _replay_holdings(sessions, codes, operations_by_date, start_holdings)
+    held = np.abs(holds) >= MIN_QTY
+    closes = _close_matrix(sessions, codes, prices, held)
+    if (missing := held & np.isnan(closes)).any():
+        _log_missing_closes(sessions, codes, missing)
+
+    is_hk = np.array([is_hk_code(code) for code in codes], dtype=bool)
+    fx = np.where(is_hk, np.asarray(hkd_cny_rates, dtype=float)[:, None], 1.0)
+    mv = (np.where(held & ~missing, holds * np.nan_to_num(closes), 0.0) * fx).sum(axis=1)
+
+    flows_at = {
+        i: amounts
+        for d, amounts in flows_by_date.items()
+        if (i := day_index.get(d)) is not None
+    }
+    for i, amounts in flows_at.items():
+        op_cash[i] += sum(a for a in amounts if abs(a) >= MIN_MONEY)
+    cash = start_cash + np.cumsum(op_cash)
+    asset = cash + mv
+
+    navs, units = _units_and_nav(
+        asset,
+        flows_at,
+        nav=start_nav if start_nav > 0 else 1.0,
+        units=start_units,
+    )
+    return [
+        NavDayRow(date=d, nav=nav, units=u, asset=a, cash=c)
+        for d, nav, u, a, c in zip(
+            sessions, navs.tolist(), units.tolist(), asset.tolist(), cash.tolist(), strict=True
+        )
+    ]
+
+
+_NAV_ENGINES = {
+    'loop': _compute_nav_series,
+    'numpy': _compute_nav_series_numpy,
+}
+
+
 def compute_nav_rows(
     *,
     operation_list: OperationDict,
     cash_flow_list: CashFlowList,
     sessions: list[date],
     prices: DailyCloseByCode,
-    hkd_cny_rate: float,
+    hkd_cny_rates: list[float],
     event_cutoff: date | None = None,
     start_nav: float = 1.0,
     start_units: float = 0.0,
     start_cash: float = 0.0,
     start_holdings: dict[str, float] | None = None,
+    engine: str = 'loop',
 ) -> list[NavDayRow]:
-    """给定交易日与收盘价，回放净值序列（无 I/O）。"""
+    """给定交易日、收盘价与逐日 HKD/CNY 汇率，回放净值序列（无 I/O）。engine: loop | numpy。"""
+    if (replay := _NAV_ENGINES.get(engine)) is None:
+        raise ValueError('engine 须为 loop 或 numpy')
+    if len(hkd_cny_rates) != len(sessions):
+        raise ValueError('hkd_cny_rates 须与 sessions 等长')
     _all_ops, ops_by_date = group_operations(operation_list)
     flows_by_date = group_cash_flows(cash_flow_list)
 
@@ -174,12 +364,12 @@ def compute_nav_rows(
             else by_date
         )
 
-    return _compute_nav_series(
+    return replay(
         sessions=sessions,
         operations_by_date=_align_events_to_sessions(_after(ops_by_date), sessions),
         flows_by_date=_align_events_to_sessions(_after(flows_by_date), sessions),
         prices=prices,
-        hkd_cny_rate=hkd_cny_rate,
+        hkd_cny_rates=hkd_cny_rates,
         start_nav=start_nav,
         start_units=start_units,
         start_cash=start_cash,
@@ -4,7 +4,7 @@ from datetime import date
 from backend.common.domain.operations import apply_operation_to_hold
 from backend.common.types import DateRangeList, HoldingWindows, OperationDict
 from backend.common.utils import operation_sort_key
-from backend.models import Operation
+from backend.common.domain.operation_record import OperationRecord
 from backend.common.thresholds import MIN_QTY
 from backend.services.calculation.holdings.stock_hold import StockHold
 
@@ -19,7 +19,7 @@ def holdings_at(operation_list: OperationDict, target: date) -> dict[str, float]
     }
 
 
-def _windows_for_ops(ops: list[Operation], end: date) -> DateRangeList:
+def _windows_for_ops(ops: list[OperationRecord], end: date) -> DateRangeList:
     if not (sorted_ops := sorted(ops, key=operation_sort_key)):
         return []
     hold = 0.0
@@ -0,0 +1 @@
+"""后端测试（python manage.py test backend.tests）"""
@@ -0,0 +1,214 @@
+"""交易日历二分索引与 exchange_calendars（XSHG / XHKG）一致性"""
+import random
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta
+
+from django.test import SimpleTestCase
+
+from backend.common.domain.calendar import (
+    _MARKET_SESSION_MINUTES,
+    TZ_SHANGHAI,
+    TradingCalendar,
+)
+from backend.common.domain.market import Market
+
+_SAMPLES = 400
+_FAR_PAST = date(1900, 1, 2)
+_FAR_FUTURE = date(2200, 1, 3)
+# 港股 2012 年起午休为 12:00-13:00，此前的时段与本地固定时段不同，盘中对照从该年之后开始
+_INTRADAY_FROM = date(2013, 1, 1)
+_INTRADAY_DAYS = 80
+
+
+def _expected_sessions(market: Market) -> list[date]:
+    """exchange_calendars 全量交易日，截到与本地索引（快照或现算）重叠的区间。"""
+    days = TradingCalendar._index(market).days
+    first, last = date.fromordinal(days[0]), date.fromordinal(days[-1])
+    return [
+        ts.date()
+        for ts in TradingCalendar.get_calendar(market).sessions
+        if first <= ts.date() <= last
+    ]
+
+
+def _expected_intervals(market: Market, sessions: list[date]) -> dict[date, list[tuple[datetime, datetime]]]:
+    """exchange_calendars 各交易日实际时段（UTC）：有午休为上午、下午两段，半日市只有一段。"""
+    schedule = TradingCalendar.get_calendar(market).schedule
+    result: dict[date, list[tuple[datetime, datetime]]] = {}
+    for day, row in schedule.loc[str(_INTRADAY_FROM):str(sessions[-1])].iterrows():
+        open_at, close_at = row["open"].to_pydatetime(), row["close"].to_pydatetime()
+        if row.isna()["break_start"]:
+            result[day.date()] = [(open_at, close_at)]
+        else:
+            result[day.date()] = [
+                (open_at, row["break_start"].to_pydatetime()),
+                (row["break_end"].to_pydatetime(), close_at),
+            ]
+    return result
+
+
+def _matches_fixed_minutes(market: Market, intervals: list[tuple[datetime, datetime]]) -> bool:
+    """该日时段是否与本地固定时段一致（半日市等特殊日由本地按整日处理，不参与盘中对照）。"""
+    minutes = [
+        tuple((t.astimezone(TZ_SHANGHAI).hour * 60 + t.astimezone(TZ_SHANGHAI).minute) for t in interval)
+        for interval in intervals
+    ]
+    return minutes == [tuple(period) for period in _MARKET_SESSION_MINUTES[market]]
+
+
+def _probes(intervals: list[tuple[datetime, datetime]]) -> list[datetime]:
+    """开盘、午休、收盘前后各一分钟及午休中、盘后晚间的探测时刻（升序）。"""
+    minute = timedelta(minutes=1)
+    (morning_open, lunch_start), (lunch_end, close) = intervals
+    return [
+        morning_open - timedelta(hours=2),
+        morning_open - minute, morning_open, morning_open + minute,
+        lunch_start - minute, lunch_start, lunch_start + timedelta(minutes=30),
+        lunch_end - minute, lunch_end, lunch_end + minute,
+        close - minute, close, close + minute,
+        close + timedelta(hours=5),
+    ]
+
+
+class CalendarParityTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.sessions = {market: _expected_sessions(market) for market in (Market.CN, Market.HK)}
+        cls.intervals = {market: _expected_intervals(market, sessions) for market, sessions in cls.sessions.items()}
+
+    def _intraday_cases(self, rng: random.Random, market: Market):
+        """随机抽取与固定时段一致的交易日，逐个给出 (当日探测时刻, 前一交易日至下一交易日的全部时段)。"""
+        by_day = self.intervals[market]
+        days = sorted(by_day)
+        regular = [day for day in days[1:-1] if _matches_fixed_minutes(market, by_day[day])]
+        # 港股圣诞前夕半日市的前一日、A 股国庆后复市日
+        for day in rng.sample(regular, _INTRADAY_DAYS) + [date(2024, 12, 23), date(2024, 10, 8)]:
+            i = days.index(day)
+            yield _probes(by_day[day]), [interval for d in days[i - 1:i + 2] for interval in by_day[d]]
+
+    def test_is_in_trading_hours_at(self):
+        rng = random.Random(5)
+        for market in self.sessions:
+            for probes, nearby in self._intraday_cases(rng, market):
+                for at in probes:
+                    expected = any(start <= at < end for start, end in nearby)
+                    self.assertEqual(TradingCalendar.is_in_trading_hours_at(at, market), expected, f"{market} {at}")
+
+    def test_next_open_at(self):
+        rng = random.Random(6)
+        for market in self.sessions:
+            for probes, nearby in self._intraday_cases(rng, market):
+                for at in probes:
+                    expected = min(start for start, _ in nearby if start > at)
+                    self.assertEqual(TradingCalendar.next_open_at(at, market), expected, f"{market} {at}")
+
+    def test_is_trading_time_passed(self):
+        rng = random.Random(7)
+        for market in self.sessions:
+            for probes, nearby in self._intraday_cases(rng, market):
+                pairs = [(a, b) for i, a in enumerate(probes) for b in probes[i:]]
+                pairs.append((probes[-1], probes[-1] + timedelta(hours=12)))  # 跨夜到下一交易日开盘后
+                for last, current in pairs:
+                    expected = last < current and any(end >= last and start <= current for start, end in nearby)
+                    self.assertEqual(
+                        TradingCalendar.is_trading_time_passed(last, current, market),
+                        expected,
+                        f"{market} {last}~{current}",
+                    )
+
+    def _random_days(self, rng: random.Random, market: Market) -> list[date]:
+        """重叠区间内的随机日期，外加区间首末两天与次首、次末日（边界）；区间外由 test_outside_index 覆盖。"""
+        sessions = self.sessions[market]
+        first, last = sessions[0], sessions[-1]
+        edges = [first, first + timedelta(days=1), last - timedelta(days=1), last]
+        return edges + [first + timedelta(days=rng.randint(0, (last - first).days)) for _ in range(_SAMPLES)]
+
+    def test_is_trading_day(self):
+        rng = random.Random(1)
+        for market, sessions in self.sessions.items():
+            expected = set(sessions)
+            for day in self._random_days(rng, market):
+                self.assertEqual(
+                    TradingCalendar.is_trading_day(day, market), day in expected, f"{market} {day}"
+                )
+
+    def test_known_non_sessions(self):
+        cases = [
+            (Market.CN, date(2024, 2, 12)),   # 春节
+            (Market.CN, date(2024, 10, 1)),   # 国庆
+            (Market.CN, date(2024, 10, 12)),  # 调休补班周六，A 股仍休市
+            (Market.CN, date(2024, 10, 13)),  # 周日
+            (Market.HK, date(2024, 12, 25)),  # 圣诞
+            (Market.HK, date(2024, 4, 1)),    # 复活节星期一
+            (Market.HK, date(2024, 10, 11)),  # 重阳节
+        ]
+        for market, day in cases:
+            self.assertFalse(TradingCalendar.is_trading_day(day, market), f"{market} {day}")
+            self.assertFalse(TradingCalendar.get_calendar(market).is_session(day), f"{market} {day}")
+        # 港股圣诞前夕半日市仍是交易日；A 股 10/8 国庆后复市
+        self.assertTrue(TradingCalendar.is_trading_day(date(2024, 12, 24), Market.HK))
+        self.assertTrue(TradingCalendar.is_trading_day(date(2024, 10, 8), Market.CN))
+
+    def test_is_trading_day_accepts_datetime_and_strings(self):
+        self.assertTrue(TradingCalendar.is_trading_day(datetime(2024, 10, 8, 20, 0), Market.CN))
+        self.assertTrue(TradingCalendar.is_trading_day("2024-10-08", Market.CN))
+        self.assertFalse(TradingCalendar.is_trading_day("2024-10-01", Market.CN))
+        self.assertFalse(TradingCalendar.is_trading_day("NaT", Market.CN))
+
+    def test_next_session(self):
+        rng = random.Random(2)
+        for market, sessions in self.sessions.items():
+            for day in self._random_days(rng, market):
+                if day >= sessions[-1]:
+                    continue
+                self.assertEqual(
+                    TradingCalendar.next_session(day, market), sessions[bisect_right(sessions, day)], f"{market} {day}"
+                )
+
+    def test_sessions_between_and_bounds(self):
+        rng = random.Random(3)
+        for market, sessions in self.sessions.items():
+            days = self._random_days(rng, market)
+            for start in days[:_SAMPLES // 4]:
+                end = min(start + timedelta(days=rng.choice([0, 1, 2, 6, 13, 40, 400])), sessions[-1])
+                expected = [d for d in sessions if start <= d <= end]
+                self.assertEqual(TradingCalendar.sessions_between(start, end, market), expected, f"{market} {start}~{end}")
+                self.assertEqual(
+                    TradingCalendar.session_bounds(start, end, market),
+                    (expected[0], expected[-1]) if expected else None,
+                    f"{market} {start}~{end}",
+                )
+            self.assertEqual(TradingCalendar.sessions_between(days[10], days[10] - timedelta(days=1), market), [])
+
+    def test_latest_closed_session(self):
+        rng = random.Random(4)
+        for market, sessions in self.sessions.items():
+            expected_set = set(sessions)
+            close_minute = _MARKET_SESSION_MINUTES[market][-1][1]
+            close_at = time(close_minute // 60, close_minute % 60)
+            for day in self._random_days(rng, market):
+                for at in (time(0, 0), time(9, 0), close_at, time(23, 59)):
+                    as_of = TZ_SHANGHAI.localize(datetime.combine(day, at))
+                    if day in expected_set and at >= close_at:
+                        expected = day
+                    else:
+                        expected = max((d for d in sessions if d < day), default=None)
+                    if expected is None:
+                        continue
+                    self.assertEqual(
+                        TradingCalendar.latest_closed_session(as_of, market), expected, f"{market} {as_of}"
+                    )
+
+    def test_outside_index(self):
+        for market, sessions in self.sessions.items():
+            self.assertFalse(TradingCalendar.is_trading_day(_FAR_PAST, market))
+            self.assertFalse(TradingCalendar.is_trading_day(_FAR_FUTURE, market))
+            self.assertIsNone(TradingCalendar.next_session(_FAR_FUTURE, market))
+            self.assertEqual(TradingCalendar.sessions_between(_FAR_FUTURE, _FAR_FUTURE + timedelta(days=30), market), [])
+            self.assertIsNone(TradingCalendar.session_bounds(_FAR_PAST, _FAR_PAST + timedelta(days=30), market))
+            index_first = date.fromordinal(TradingCalendar._index(market).days[0])
+            self.assertEqual(TradingCalendar.next_session(_FAR_PAST, market), index_first)
+            self.assertEqual(TradingCalendar.session_bounds(_FAR_PAST, sessions[0], market), (index_first, sessions[0]))
+            with self.assertRaises(RuntimeError):
+                TradingCalendar.latest_closed_session(TZ_SHANGHAI.localize(datetime(1900, 1, 2, 12, 0)), market)
@@ -0,0 +1,82 @@
+"""日 K 缺口补拉：停牌至今 / 退市的尾段记为已知缺失，请求出错的代码留作未决缺口"""
+from datetime import date, timedelta
+from unittest import mock
+
+from django.test import TestCase
+
+from backend.common.domain.calendar import TradingCalendar
+from backend.common.domain.market import Market
+from backend.models import StockPriceCoverage, StockPriceMissing
+from backend.services.cache import daily_price_store
+
+_SUSPENDED = "sh600000"
+_DELISTED = "sz000002"
+_BROKEN = "sz000003"
+
+
+class DailyPriceGapFillTest(TestCase):
+    def setUp(self):
+        self.end = TradingCalendar.latest_closed_session(market=Market.CN)
+        self.start = self.end - timedelta(days=500)
+        sessions = TradingCalendar.sessions_between(self.start, self.end, Market.CN)
+        # 停牌：最后 20 个交易日无成交；退市：约 250 天前起无任何行（整块应答为空节点）
+        self.last_bar = {
+            _SUSPENDED: sessions[-21],
+            _DELISTED: TradingCalendar.sessions_between(self.start, self.end - timedelta(days=250), Market.CN)[-1],
+        }
+        self.calls: list[tuple[str, str, str]] = []
+        patches = [
+            mock.patch("backend.datasource.historicalDaily.fetch_kline_node", side_effect=self._fake_node),
+            mock.patch("backend.datasource.historicalDaily.sleep"),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _fake_node(self, code: str, *, period: str, start: str, end: str, **_kwargs) -> dict | None:
+        self.calls.append((code, start, end))
+        if code == _BROKEN:
+            raise ConnectionError("connection reset")
+        rows = [
+            [d.isoformat(), "10", "10.5", "11", "9", "1000"]
+            for d in TradingCalendar.sessions_between(date.fromisoformat(start), date.fromisoformat(end), Market.CN)
+            if d <= self.last_bar[code]
+        ]
+        if not rows:
+            return None if code == _DELISTED else {period: []}
+        return {period: rows}
+
+    def _windows(self, *codes: str) -> dict[str, list[tuple[date, date]]]:
+        return {code: [(self.start, self.end)] for code in codes}
+
+    def _assert_tail_missing(self, code: str) -> None:
+        tail = TradingCalendar.sessions_between(self.last_bar[code] + timedelta(days=1), self.end, Market.CN)
+        ranges = list(StockPriceMissing.objects.filter(code=code).values_list("start", "end"))
+        self.assertTrue(ranges, code)
+        for d in tail:
+            self.assertTrue(any(start <= d <= end for start, end in ranges), f"{code} {d} 未记为已知缺失")
+        self.assertTrue(all(start > self.last_bar[code] for start, _ in ranges), ranges)
+        covered_until = StockPriceCoverage.objects.filter(code=code).order_by("-end").values_list("end", flat=True)
+        self.assertEqual(covered_until.first(), self.last_bar[code])
+
+    def test_empty_tails_become_known_missing(self):
+        closes, unresolved = daily_price_store.ensure_daily_prices_for_windows(self._windows(_SUSPENDED, _DELISTED))
+
+        self.assertEqual(unresolved, {})
+        for code in (_SUSPENDED, _DELISTED):
+            self.assertEqual(max(closes[code]), self.last_bar[code])
+            self._assert_tail_missing(code)
+
+        self.calls.clear()
+        _closes, unresolved = daily_price_store.ensure_daily_prices_for_windows(self._windows(_SUSPENDED, _DELISTED))
+        self.assertEqual(unresolved, {})
+        self.assertEqual(self.calls, [], "已知缺失到期前不应再回源")
+
+    def test_request_errors_stay_unresolved(self):
+        _closes, unresolved = daily_price_store.ensure_daily_prices_for_windows(self._windows(_SUSPENDED, _BROKEN))
+
+        self.assertEqual(list(unresolved), [_BROKEN])
+        self.assertEqual(unresolved[_BROKEN][0][0], TradingCalendar.next_session(self.start - timedelta(days=1), Market.CN))
+        self.assertFalse(StockPriceMissing.objects.filter(code=_BROKEN).exists())
+        self.assertFalse(StockPriceCoverage.objects.filter(code=_BROKEN).exists())
+        self._assert_tail_missing(_SUSPENDED)
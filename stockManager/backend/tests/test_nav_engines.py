@@ -0,0 +1,124 @@
+"""净值回放 loop / numpy 两种引擎一致性（随机交易、出入金与逐日港币汇率）"""
+import random
+from datetime import date, timedelta
+from functools import partial
+
+from django.test import SimpleTestCase
+
+from backend.common.constants import OperationType
+from backend.common.domain.calendar import TradingCalendar
+from backend.common.domain.operation_record import OperationRecord
+from backend.common.types import CashFlowList, DailyCloseByCode, OperationDict
+from backend.services.calculation.nav import compute_nav_rows
+
+_TRIALS = 25
+_REL_TOL = 1e-9
+_SESSIONS = TradingCalendar.sessions_between(date(2018, 1, 1), date(2025, 12, 31))
+
+
+def _make_operations(rng: random.Random, codes: list[str], sessions: list[date]) -> OperationDict:
+    """逐代码随机买卖 / 分红，持仓不为负；部分操作落在非交易日（回放并入下一交易日）。"""
+    operations: OperationDict = {}
+    pk = 0
+    for code in codes:
+        hold = 0
+        records: list[OperationRecord] = []
+        for d in sorted(rng.sample(sessions, min(len(sessions), rng.randint(2, 40)))):
+            pk += 1
+            roll = rng.random()
+            if hold <= 0 or roll < 0.5:
+                kind, count = OperationType.BUY, rng.randint(1, 10) * 100
+                hold += count
+            elif roll < 0.9:
+                kind, count = OperationType.SELL, rng.choice([hold, rng.randint(1, hold)])
+                hold -= count
+            else:
+                kind, count = OperationType.DIVIDEND, 0
+            records.append(OperationRecord(
+                code=code,
+                id=pk,
+                date=d - timedelta(days=rng.choice([0, 0, 0, 1])),
+                sortOrder=0,
+                operationType=kind.value,
+                price=rng.uniform(5, 50),
+                count=count,
+                fee=rng.uniform(0, 5),
+                amount=rng.uniform(100, 5000) if code.startswith("hk") else None,
+                comment="",
+                cash=rng.uniform(0, 0.5),
+                stock=rng.choice([0.0, 0.1]),
+                reserve=0.0,
+            ))
+        operations[code] = records
+    return operations
+
+
+def _make_prices(rng: random.Random, codes: list[str], sessions: list[date]) -> DailyCloseByCode:
+    """少数代码整体无价、少数交易日缺价或为脏数据（非正价），覆盖前值沿用路径。"""
+    return {
+        code: {
+            d: rng.uniform(5, 50) if rng.random() > 0.02 else -1.0
+            for d in sessions
+            if rng.random() > 0.05
+        }
+        for code in codes
+        if rng.random() > 0.05
+    }
+
+
+def _make_cash_flows(rng: random.Random, sessions: list[date]) -> CashFlowList:
+    return [
+        {
+            "date": str(rng.choice(sessions) + timedelta(days=rng.choice([0, 2]))),
+            "amount": rng.choice([1, -1, 1, 1]) * rng.uniform(0, 100000),
+        }
+        for _ in range(rng.randint(0, 20))
+    ]
+
+
+class NavEngineParityTest(SimpleTestCase):
+    def test_numpy_matches_loop(self):
+        rng = random.Random(7)
+        for trial in range(_TRIALS):
+            codes = (
+                [f"sh60{i:04d}" for i in range(rng.randint(0, 20))]
+                + [f"hk{i:05d}" for i in range(rng.randint(0, 5))]
+            )
+            sessions = _SESSIONS[rng.randint(0, 800):]
+            compute = partial(
+                compute_nav_rows,
+                operation_list=_make_operations(rng, codes, sessions),
+                cash_flow_list=_make_cash_flows(rng, sessions),
+                sessions=sessions,
+                prices=_make_prices(rng, codes, sessions),
+                hkd_cny_rates=[rng.uniform(0.8, 0.95) for _ in sessions],
+                event_cutoff=rng.choice([None, sessions[100]]),
+                start_nav=rng.choice([1.0, 1.3]),
+                start_units=rng.choice([0.0, 5000.0]),
+                start_cash=rng.choice([0.0, 1000.0]),
+                start_holdings=({codes[0]: 300.0} if codes and rng.random() < 0.5 else {}),
+            )
+            loop_rows = compute(engine="loop")
+            numpy_rows = compute(engine="numpy")
+
+            self.assertEqual(len(loop_rows), len(numpy_rows), f"trial {trial}")
+            for expected, actual in zip(loop_rows, numpy_rows):
+                self.assertEqual(expected.date, actual.date, f"trial {trial}")
+                for field in ("nav", "units", "asset", "cash"):
+                    want, got = getattr(expected, field), getattr(actual, field)
+                    self.assertLessEqual(
+                        abs(want - got) / max(1.0, abs(want)),
+                        _REL_TOL,
+                        f"trial {trial} {expected.date} {field}: loop={want} numpy={got}",
+                    )
+
+    def test_unknown_engine_rejected(self):
+        with self.assertRaises(ValueError):
+            compute_nav_rows(
+                operation_list={},
+                cash_flow_list=[],
+                sessions=_SESSIONS[:1],
+                prices={},
+                hkd_cny_rates=[0.9],
+                engine="pandas",
+            )
@@ -0,0 +1,66 @@
+"""净值刷新：停牌 / 退市持仓按前值沿用照常落库，仅取价请求出错时截断到首个未决缺口之前"""
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from backend.common.constants import OperationType
+from backend.common.domain.calendar import TradingCalendar
+from backend.common.domain.market import Market
+from backend.common.domain.operation_record import OperationRecord
+from backend.models import PortfolioNavDaily
+from backend.services.app.nav import NavAnalysis
+from backend.services.cache import CacheRepository
+
+_SUSPENDED = "sh600000"
+_BROKEN = "sz000003"
+
+
+class NavRefreshGapTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="nav-gap")
+        self.end = TradingCalendar.latest_closed_session(market=Market.CN)
+        self.buy_date = TradingCalendar.sessions_between(self.end - timedelta(days=120), self.end, Market.CN)[0]
+        self.suspended_from = TradingCalendar.sessions_between(self.end - timedelta(days=30), self.end, Market.CN)[0]
+        patches = [
+            mock.patch("backend.datasource.historicalDaily.fetch_kline_node", side_effect=self._fake_node),
+            mock.patch("backend.datasource.historicalDaily.sleep"),
+            mock.patch.object(
+                CacheRepository,
+                "get_user_cash_info",
+                return_value=(0.0, [{"date": str(self.buy_date - timedelta(days=20)), "amount": 100000.0}]),
+            ),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _fake_node(self, code: str, *, period: str, start: str, end: str, **_kwargs) -> dict:
+        if code == _BROKEN:
+            raise ConnectionError("connection reset")
+        sessions = TradingCalendar.sessions_between(date.fromisoformat(start), date.fromisoformat(end), Market.CN)
+        return {period: [[d.isoformat(), "10", "10", "10", "10", "1"] for d in sessions if d < self.suspended_from]}
+
+    def _buy(self, code: str, pk: int) -> OperationRecord:
+        return OperationRecord(
+            code=code, id=pk, date=self.buy_date, sortOrder=0, operationType=OperationType.BUY.value,
+            price=10.0, count=1000, fee=0.0, amount=None, comment="", cash=0.0, stock=0.0, reserve=0.0,
+        )
+
+    def _refresh(self, *codes: str) -> list[date]:
+        operations = {code: [self._buy(code, pk)] for pk, code in enumerate(codes, start=1)}
+        with mock.patch.object(CacheRepository, "get_user_operations", return_value=operations):
+            NavAnalysis.refresh(self.user, mode="full")
+        return list(PortfolioNavDaily.objects.filter(user=self.user).order_by("date").values_list("date", flat=True))
+
+    def test_suspended_holding_carries_forward(self):
+        dates = self._refresh(_SUSPENDED)
+        self.assertEqual(dates[-1], self.end)
+        last = PortfolioNavDaily.objects.get(user=self.user, date=self.end)
+        self.assertAlmostEqual(last.asset, 100000.0, places=6)
+
+    def test_request_error_truncates_before_first_gap(self):
+        dates = self._refresh(_SUSPENDED, _BROKEN)
+        self.assertTrue(dates)
+        self.assertLess(dates[-1], self.buy_date)
@@ -7,6 +7,7 @@ urlpatterns = [
     path('stocks', stock.stocks, name='stocks'),
     path('dividend', stock.refresh_dividend, name='dividend'),
     path('clearCache', stock.clear_cache, name='clearCache'),
+    path('cacheStats', stock.cache_stats, name='cacheStats'),
     path('updateIncomeCash', stock.update_income_cash, name='updateIncomeCash'),
     path('watchlist', stock.watchlist, name='watchlist'),
     path('watchlist/hidden', stock.update_watch_hidden, name='watchlist_hidden'),
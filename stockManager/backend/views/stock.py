@@ -98,14 +98,22 @@ def update_watch_hidden(request: HttpRequest, data: dict, user: User) -> JsonRes
 def clear_cache(request: HttpRequest, user: User) -> JsonResponse:
     """清理本应用全部 Redis 缓存 - POST /api/clearCache"""
     logger.info(f"clear_cache - 用户: {user.username}, IP: {get_client_ip(request)}")
-    deleted_count = CacheRepository.clear_all()
+    deleted_count, tag_counts = CacheRepository.clear_all()
     return json_response(
         status=ResponseStatus.SUCCESS,
         message="缓存已清理",
-        data={"deletedCount": deleted_count},
+        data={"deletedCount": deleted_count, "tagCounts": tag_counts},
     )
 
 
+@require_superuser
+@handle_exception
+def cache_stats(request: HttpRequest, user: User) -> JsonResponse:
+    """本 worker 进程内上游 / 缓存 / 失效 / 价格刷新计数 - GET /api/cacheStats"""
+    logger.info(f"cache_stats - 用户: {user.username}, IP: {get_client_ip(request)}")
+    return json_response(status=ResponseStatus.SUCCESS, data=CacheRepository.get_runtime_stats())
+
+
 @handle_exception
 def trading_status(request: HttpRequest) -> JsonResponse:
     """获取交易状态 Tag 数据 - GET /api/tradingStatus（公开行情日历，无需登录）"""
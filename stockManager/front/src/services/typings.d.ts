@@ -47,6 +47,7 @@ declare namespace API {
   type MarketStatus = {
     inTradingHours: boolean;
     priceUpdatedAt?: string | null;
+    priceUpdatedAtLatest?: string | null;
   };
 
   type MarketsMetadata = {
@@ -67,6 +68,7 @@ declare namespace API {
     cashFlowList: CashFlowRecord[];
     xirrAnnualized: number;
     hkdCnyRate?: number;
+    hkdCnyRateFetchedAt?: string | null;
   };
 
   type CashFlowRecord = {
@@ -119,7 +121,7 @@ declare namespace API {
   };
 
   type ClearCacheResult = BaseResult & {
-    data?: { deletedCount: number };
+    data?: { deletedCount: number; tagCounts: Record<string, number> };
   };
 
   type WatchItem = {
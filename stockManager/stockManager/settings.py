@@ -52,6 +52,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'backend.common.web.middleware.RequestScopeMiddleware',
 ]
 
 CORS_ALLOW_CREDENTIALS = True
@@ -86,13 +87,38 @@ DATABASES = {
     }
 }
 
+# gtimg 已收盘 K 线本地持久缓存（SQLite），默认与主库同目录（Docker 下随数据卷持久化）
+_kline_cache_env = os.environ.get('KLINE_CACHE_PATH', '').strip()
+KLINE_CACHE_PATH = Path(_kline_cache_env) if _kline_cache_env else DATABASES['default']['NAME'].parent / 'kline_cache.sqlite3'
+
+# 缓存值序列化：orjson（默认，JSON 兼容）| json | msgpack（需安装 msgpack）
+_CACHE_SERIALIZERS = {
+    'orjson': 'backend.common.cache_codec.OrjsonSerializer',
+    'json': 'django_redis.serializers.json.JSONSerializer',
+    'msgpack': 'django_redis.serializers.msgpack.MSGPackSerializer',
+}
+# 超过阈值字节的值 zlib 压缩：zlib（默认）| none；从压缩回退到不压缩前须清空缓存
+_CACHE_COMPRESSORS = {
+    'zlib': 'backend.common.cache_codec.ThresholdCompressor',
+    'none': None,
+}
+_cache_compressor = _CACHE_COMPRESSORS[os.environ.get('CACHE_COMPRESS', 'zlib')]
+
 CACHES = {
     'default': {
         'BACKEND': 'django_redis.cache.RedisCache',
         'LOCATION': os.environ.get('REDIS_URL'),
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
-            'SERIALIZER': 'django_redis.serializers.json.JSONSerializer',
+            'SERIALIZER': _CACHE_SERIALIZERS[os.environ.get('CACHE_SERIALIZER', 'orjson')],
+            **(
+                {
+                    'COMPRESSOR': _cache_compressor,
+                    'COMPRESS_MIN_LENGTH': int(os.environ.get('CACHE_COMPRESS_MIN_LENGTH', '1024')),
+                }
+                if _cache_compressor is not None
+                else {}
+            ),
         },
         'KEY_PREFIX': 'stockmanager',
         'VERSION': 1,